@@ -0,0 +1,372 @@
+"""
+Benchmark de montée en charge du module de matching.
+
+Génère des bases synthétiques au format de data/cv_data.json (1k à 1M profils),
+enregistrées dans une base SQLite temporaire et relues par le dépôt de candidats
+(liste de Candidate, comme en production), rejoue les vraies demandes de l'historique des recherches (search_history.py) sur
+extract_criteria_from_request, fallback_matching et smart_match_candidates,
+puis mesure latences (p50/p95/p99), débit et pic mémoire.
+Les latences sont mesurées à froid (caches par demande vidés avant chaque appel :
+analyse des demandes, cache de matching) et à chaud (demandes déjà vues).
+
+Les résultats sont enregistrés dans data/benchmarks/ et comparés au run précédent
+pour rendre visibles les régressions entre deux versions.
+
+Usage:
+    python benchmark_matching.py
+    python benchmark_matching.py --sizes 1000 10000 100000 1000000 --repeat 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from candidate_model import Candidate
+from candidate_repository import get_candidate_repository
+from candidate_store import get_candidate_store
+from search_history import SEARCH_LOG_FILE, derived_paths
+
+
+CV_DATA_FILE = 'data/cv_data.json'
+RESULTS_DIR = 'data/benchmarks'
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Nombre de profils synthétiques écrits par transaction
+INSERT_BATCH_SIZE = 10000
+
+# Vocabulaire de repli si data/cv_data.json est absent
+FALLBACK_VOCABULARY = {
+    'postes': ['Développeur Python', 'Data Scientist', 'Ingénieur DevOps', 'Développeur Java', 'Médecin Cardiologue'],
+    'competences': ['Python', 'Django', 'Java', 'Spring', 'React', 'Docker', 'Kubernetes', 'AWS', 'SQL', 'Machine Learning'],
+    'langues': ['Français (natif)', 'Anglais (courant)', 'Espagnol (intermédiaire)', 'Arabe (natif)', 'Allemand (notions)'],
+    'formations': ['Master Informatique', 'Diplôme d\'ingénieur', 'Doctorat en Médecine', 'Licence Mathématiques'],
+}
+
+FIRST_NAMES = ['Sarah', 'Karim', 'Léa', 'Thomas', 'Amina', 'Lucas', 'Inès', 'Hugo', 'Yasmine', 'Nicolas']
+LAST_NAMES = ['Dubois', 'Martin', 'Benali', 'Leroy', 'Moreau', 'Haddad', 'Petit', 'Garnier', 'Roux', 'Fontaine']
+
+
+def load_vocabulary(path: str = CV_DATA_FILE) -> Dict[str, List[str]]:
+    """Vocabulaire (postes, compétences, langues, formations) tiré de la vraie base."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cv_data = json.load(f)
+    except (OSError, ValueError):
+        return FALLBACK_VOCABULARY
+    vocabulary = {
+        'postes': sorted({c.get('poste', '') for c in cv_data if c.get('poste')}),
+        'competences': sorted({s for c in cv_data for s in c.get('competences', [])}),
+        'langues': sorted({l for c in cv_data for l in c.get('langues', [])}),
+        'formations': sorted({c.get('formation', '') for c in cv_data if c.get('formation')}),
+    }
+    return {k: v or FALLBACK_VOCABULARY[k] for k, v in vocabulary.items()}
+
+
+def generate_candidates(count: int, vocabulary: Dict[str, List[str]], seed: int = 42) -> List[Dict]:
+    """
+    Génère `count` profils synthétiques au schéma de data/cv_data.json.
+
+    Args:
+        count: Nombre de profils
+        vocabulary: Valeurs possibles (voir load_vocabulary)
+        seed: Graine pour des bases reproductibles d'un run à l'autre
+
+    Returns:
+        Liste de candidats
+    """
+    rng = random.Random(seed)
+    postes = vocabulary['postes']
+    competences = vocabulary['competences']
+    langues = vocabulary['langues']
+    formations = vocabulary['formations']
+    candidates = []
+    for i in range(1, count + 1):
+        prenom = rng.choice(FIRST_NAMES)
+        nom = rng.choice(LAST_NAMES)
+        candidates.append({
+            'id': i,
+            'nom': nom,
+            'prenom': prenom,
+            'email': f"{prenom.lower()}.{nom.lower()}{i}@example.com",
+            'telephone': f"+33 6 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            'poste': rng.choice(postes),
+            'experience': rng.randint(0, 20),
+            'formation': rng.choice(formations),
+            'competences': rng.sample(competences, min(len(competences), rng.randint(3, 10))),
+            'langues': rng.sample(langues, min(len(langues), rng.randint(1, 3))),
+        })
+    return candidates
+
+
+def load_candidates(size: int, vocabulary: Dict[str, List[str]]) -> List[Candidate]:
+    """
+    Complète la base du dossier courant jusqu'à `size` profils synthétiques
+    et retourne la liste du dépôt de candidats (celle que reçoit le matching).
+
+    Les profils générés avec la même graine sont identiques d'une taille à
+    l'autre : seuls ceux qui manquent sont ajoutés (tailles croissantes).
+    """
+    store = get_candidate_store()
+    existing = store.count()
+    profiles = generate_candidates(size, vocabulary)[existing:]
+    for start in range(0, len(profiles), INSERT_BATCH_SIZE):
+        store.write_batch([('add_candidate', (profile, None)) for profile in profiles[start:start + INSERT_BATCH_SIZE]])
+    return get_candidate_repository().candidates()
+
+
+def load_queries(path: str = SEARCH_LOG_FILE) -> List[str]:
+    """
+    Demandes réelles (sans doublon, dans l'ordre) issues de l'historique des recherches.
+    Le journal (ou, à défaut, l'ancien fichier JSON) est lu directement : rien
+    n'est importé ni écrit à côté de la vraie base.
+    """
+    entries: List[Dict] = []
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        else:
+            with open(derived_paths(path)['legacy'], 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+    except (OSError, ValueError):
+        pass
+    queries = []
+    for entry in entries:
+        description = entry.get('description', '')
+        if description.strip() and description not in queries:
+            queries.append(description)
+    return queries or ["Je cherche 3 développeurs Python avec 2 ans d'expérience"]
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    values = np.array(latencies) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def clear_query_caches() -> None:
+    """Vide les caches alimentés par les demandes (analyse des demandes, résultats de matching)."""
+    import query_plan
+    from match_cache import invalidate_match_cache
+
+    query_plan._plan_cache.clear()
+    invalidate_match_cache()
+
+
+def _timed_calls(func: Callable[[str], object], queries: List[str], repeat: int,
+                 reset: Optional[Callable[[], None]] = None) -> Dict:
+    """Latences de `repeat` passages sur les demandes (`reset` appelé hors chrono avant chaque appel)."""
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            if reset is not None:
+                reset()
+            start = time.perf_counter()
+            func(query)
+            latencies.append(time.perf_counter() - start)
+    result = _percentiles(latencies)
+    total = sum(latencies)
+    result['throughput_qps'] = round(len(latencies) / total, 2) if total else None
+    return result
+
+
+def benchmark_function(func: Callable[[str], object], queries: List[str], repeat: int) -> Dict:
+    """
+    Mesure une fonction sur toutes les demandes, à froid puis à chaud.
+
+    Le premier passage (construction des index) est chronométré à part.
+    À froid, les caches par demande sont vidés avant chaque appel (clear_query_caches) ;
+    à chaud, chaque demande a déjà été traitée une fois.
+    Le pic mémoire est mesuré sur un passage dédié à froid (tracemalloc ralentit les appels).
+    """
+    clear_query_caches()
+    start = time.perf_counter()
+    func(queries[0])
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    cold = _timed_calls(func, queries, repeat, reset=clear_query_caches)
+    for query in queries:
+        func(query)
+    warm = _timed_calls(func, queries, repeat)
+
+    tracemalloc.start()
+    for query in queries:
+        clear_query_caches()
+        func(query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'calls': len(queries) * repeat,
+        'warmup_ms': round(warmup_ms, 3),
+        'cold': cold,
+        'warm': warm,
+        'peak_memory_mb': round(peak / (1024 * 1024), 3),
+    }
+
+
+def run_benchmark(sizes: List[int], repeat: int, engine: str, num_candidates: int) -> Dict:
+    """Lance le benchmark pour chaque taille de base et retourne le rapport complet."""
+    vocabulary = load_vocabulary()
+    queries = load_queries()
+    report = {
+        'date': datetime.now().strftime('%d/%m/%Y'),
+        'time': datetime.now().strftime('%H:%M:%S'),
+        'version': _current_version(),
+        'engine': engine,
+        'repeat': repeat,
+        'num_candidates': num_candidates,
+        'queries': len(queries),
+        'results': {},
+    }
+
+    # La base synthétique, les index et caches (data/...) sont écrits dans un
+    # dossier temporaire, jamais à côté de la vraie base
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, 'data'))
+        os.chdir(workdir)
+        try:
+            import matching
+            with open(os.devnull, 'w') as devnull:
+                for size in sorted(set(sizes)):
+                    start = time.perf_counter()
+                    cv_data = load_candidates(size, vocabulary)
+                    generation_s = time.perf_counter() - start
+                    print(f"📦 {size} profils générés et chargés en {generation_s:.1f}s", flush=True)
+
+                    functions = {
+                        'extract_criteria_from_request': matching.extract_criteria_from_request,
+                        'fallback_matching': lambda q: matching.fallback_matching(q, cv_data, num_candidates),
+                        'smart_match_candidates': lambda q: matching.smart_match_candidates(
+                            q, cv_data, num_candidates, engine=engine),
+                    }
+                    size_results = {}
+                    for name, func in functions.items():
+                        # Les print() du matching ne doivent pas fausser les mesures
+                        with contextlib.redirect_stdout(devnull):
+                            size_results[name] = benchmark_function(func, queries, repeat)
+                        r = size_results[name]
+                        print(f"   ⏱️  {name}: à froid p50 {r['cold']['p50_ms']} ms | p95 {r['cold']['p95_ms']} ms | "
+                              f"{r['cold']['throughput_qps']} req/s | à chaud p50 {r['warm']['p50_ms']} ms | "
+                              f"pic {r['peak_memory_mb']} Mo", flush=True)
+                    report['results'][str(size)] = size_results
+                    del cv_data
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def save_report(report: Dict, results_dir: str = RESULTS_DIR) -> str:
+    """Enregistre le rapport (un fichier JSON par run) et retourne son chemin."""
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(results_dir, f"matching_{stamp}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_previous_report(engine: str, results_dir: str = RESULTS_DIR,
+                         exclude: Optional[str] = None) -> Optional[Dict]:
+    """Dernier rapport enregistré avec le même moteur (hors `exclude`), ou None."""
+    if not os.path.isdir(results_dir):
+        return None
+    files = sorted(
+        (f for f in os.listdir(results_dir)
+         if f.startswith('matching_') and f.endswith('.json') and os.path.join(results_dir, f) != exclude),
+        reverse=True,
+    )
+    for name in files:
+        try:
+            with open(os.path.join(results_dir, name), 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if report.get('engine') == engine:
+            return report
+    return None
+
+
+def compare_reports(current: Dict, previous: Dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Compare deux rapports sur p50/p95 à froid et à chaud (mêmes tailles et fonctions).
+    Les rapports antérieurs à la séparation froid/chaud ne sont pas comparables.
+
+    Returns:
+        Lignes lisibles, marquées ❌ si la latence dépasse l'ancienne de plus de `tolerance`
+    """
+    lines = []
+    for size, functions in current['results'].items():
+        for name, metrics in functions.items():
+            old = previous.get('results', {}).get(size, {}).get(name)
+            if not old:
+                continue
+            for phase in ('cold', 'warm'):
+                for key in ('p50_ms', 'p95_ms'):
+                    old_value = old.get(phase, {}).get(key)
+                    if not old_value:
+                        continue
+                    value = metrics[phase][key]
+                    ratio = value / old_value
+                    mark = '❌' if ratio > 1 + tolerance else '✅'
+                    lines.append(f"{mark} {size} profils | {name} | {phase} {key}: {old_value} -> {value} ({ratio:.2f}x)")
+    return lines
+
+
+def _current_version() -> str:
+    """Commit git courant (ou 'local' hors dépôt git)."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge du matching")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Tailles de base à tester (ex: 1000 10000 100000 1000000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre de passages sur les demandes")
+    parser.add_argument('--engine', default='keywords', choices=['keywords', 'bm25', 'snapshot', 'ollama'],
+                        help="Moteur utilisé par smart_match_candidates")
+    parser.add_argument('--num-candidates', type=int, default=4)
+    parser.add_argument('--no-save', action='store_true', help="Ne pas enregistrer le rapport")
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmark matching: tailles {args.sizes}, moteur {args.engine}")
+    report = run_benchmark(args.sizes, args.repeat, args.engine, args.num_candidates)
+
+    if args.no_save:
+        return
+    path = save_report(report)
+    print(f"💾 Résultats enregistrés: {path}")
+    previous = load_previous_report(args.engine, exclude=path)
+    if previous:
+        print(f"📊 Comparaison avec {previous.get('version')} ({previous.get('date')} {previous.get('time')}):")
+        for line in compare_reports(report, previous):
+            print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
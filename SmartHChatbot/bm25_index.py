@@ -0,0 +1,360 @@
+"""
+Moteur de classement BM25 local (sans LLM).
+Les statistiques des documents (fréquences des termes, longueurs) sont
+calculées une fois puis sauvegardées à côté de la base de candidats.
+Un nouveau candidat est ajouté en fin de journal (data/bm25_index.journal.jsonl),
+sans réécrire l'index : le chargement rejoue le journal sur l'instantané et
+la compaction fusionne le journal dans l'instantané.
+"""
+
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from candidate_index import TOKEN_PATTERN, field_text
+from candidate_repository import get_candidate_repository
+from candidate_store import get_candidate_store
+
+
+BM25_INDEX_FILE = 'data/bm25_index.json'
+BM25_JOURNAL_FILE = 'data/bm25_index.journal.jsonl'
+BM25_INDEX_VERSION = 2
+
+# Au-delà de ce nombre d'ajouts journalisés, l'instantané est réécrit
+BM25_JOURNAL_MAX_ENTRIES = 500
+
+# Paramètres BM25 classiques
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Poids des champs (un token du poste compte double)
+FIELD_WEIGHTS = {'competences': 1, 'poste': 2, 'formation': 1, 'langues': 1}
+
+
+def source_signature() -> int:
+    """Version de la base de candidats (change à chaque ajout)."""
+    return get_candidate_store().version()
+
+
+def document_terms(candidate: Dict) -> Dict[str, int]:
+    """Fréquences pondérées des termes d'un candidat (compétences, poste, formation, langues)."""
+    terms: Dict[str, int] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in TOKEN_PATTERN.findall(field_text(candidate, field)):
+            terms[token] = terms.get(token, 0) + weight
+    return terms
+
+
+class BM25Index:
+    """
+    Index BM25: pour chaque terme, positions des candidats et fréquences.
+
+    Les listes de positions restent triées : un ajout incrémental se fait
+    simplement en fin de liste.
+    """
+
+    def __init__(self):
+        self.ids: List = []
+        self.doc_len: List[int] = []
+        self.postings: Dict[str, List[List[int]]] = {}
+        self.source: Optional[int] = None
+        self._arrays: Dict[str, tuple] = {}
+        self._doc_len_array: Optional[np.ndarray] = None
+
+    @classmethod
+    def build(cls, cv_data: List[Dict]) -> 'BM25Index':
+        """Construit l'index complet d'une liste de candidats."""
+        index = cls()
+        for candidate in cv_data:
+            index.add(candidate)
+        return index
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BM25Index':
+        index = cls()
+        index.ids = data['ids']
+        index.doc_len = data['doc_len']
+        index.postings = data['postings']
+        index.source = data.get('source')
+        return index
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': BM25_INDEX_VERSION,
+            'source': self.source,
+            'ids': self.ids,
+            'doc_len': self.doc_len,
+            'postings': self.postings,
+        }
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def add(self, candidate: Dict) -> None:
+        """Ajoute un candidat en fin d'index (mise à jour incrémentale)."""
+        self.add_document(candidate.get('id'), document_terms(candidate))
+
+    def add_document(self, doc_id, terms: Dict[str, int]) -> None:
+        """Ajoute un document déjà découpé en termes (voir document_terms)."""
+        row = len(self.ids)
+        for term, tf in terms.items():
+            rows_tfs = self.postings.setdefault(term, [[], []])
+            rows_tfs[0].append(row)
+            rows_tfs[1].append(tf)
+            self._arrays.pop(term, None)
+        self.ids.append(doc_id)
+        self.doc_len.append(sum(terms.values()))
+        self._doc_len_array = None
+
+    def matches(self, cv_data: List[Dict]) -> bool:
+        """
+        Vrai si l'index a les mêmes ids, dans le même ordre.
+        Ne vérifie pas le contenu : suffisant seulement pour la liste de la base
+        à la version `source`.
+        """
+        return len(cv_data) == self.size and all(
+            c.get('id') == doc_id for c, doc_id in zip(cv_data, self.ids)
+        )
+
+    def _term_arrays(self, term: str) -> Optional[tuple]:
+        arrays = self._arrays.get(term)
+        if arrays is None and term in self.postings:
+            rows, tfs = self.postings[term]
+            arrays = (np.array(rows, dtype=np.int32), np.array(tfs, dtype=np.float64))
+            self._arrays[term] = arrays
+        return arrays
+
+    def score(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        Scores BM25 de tous les candidats pour une liste de termes.
+
+        Args:
+            terms: Termes de la requête (tokens en minuscules)
+
+        Returns:
+            np.ndarray de forme (size,)
+        """
+        scores = np.zeros(self.size, dtype=np.float64)
+        if not self.size:
+            return scores
+        if self._doc_len_array is None:
+            self._doc_len_array = np.array(self.doc_len, dtype=np.float64)
+        doc_len = self._doc_len_array
+        avg_len = doc_len.mean() or 1.0
+        for term in set(terms):
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            rows, tfs = arrays
+            idf = math.log(1 + (self.size - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[rows] / avg_len)
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+        return scores
+
+    def save(self, path: str = BM25_INDEX_FILE) -> None:
+        """Sauvegarde atomique de l'index."""
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Erreur sauvegarde index BM25: {e}")
+
+
+def load_bm25_index(path: str = BM25_INDEX_FILE, journal_path: str = BM25_JOURNAL_FILE) -> Optional[BM25Index]:
+    """
+    Charge l'instantané puis rejoue le journal des ajouts.
+
+    Les entrées déjà présentes dans l'instantané (compaction interrompue) sont ignorées.
+
+    Returns:
+        L'index, ou None s'il est absent, illisible, d'une autre version
+        ou si le journal ne suit pas l'instantané
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != BM25_INDEX_VERSION:
+        return None
+    index = BM25Index.from_dict(data)
+
+    replayed = 0
+    for entry in _read_journal(journal_path):
+        if entry['row'] < index.size:
+            continue
+        if entry['row'] != index.size:
+            return None
+        index.add_document(entry['id'], entry['terms'])
+        index.source = entry['source']
+        replayed += 1
+    _bm25_cache['journal_entries'] = replayed
+    return index
+
+
+def _read_journal(journal_path: str) -> List[Dict]:
+    entries = []
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Dernière ligne incomplète (arrêt pendant l'écriture)
+                    break
+    except OSError:
+        pass
+    return entries
+
+
+def _append_journal(entry: Dict, journal_path: str = BM25_JOURNAL_FILE) -> None:
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_snapshot(index: BM25Index) -> None:
+    """Réécrit l'instantané complet puis vide le journal (appelé sous _bm25_lock)."""
+    index.save()
+    try:
+        os.remove(BM25_JOURNAL_FILE)
+    except OSError:
+        pass
+    _bm25_cache['journal_entries'] = 0
+
+
+# Index en mémoire et liste de candidats (objet) qu'il décrit, None si inconnue
+_bm25_cache: Dict[str, object] = {'index': None, 'data': None, 'journal_entries': 0}
+_bm25_lock = threading.Lock()
+
+
+def get_bm25_index(cv_data: List[Dict]) -> BM25Index:
+    """
+    Retourne l'index BM25 de `cv_data`.
+
+    Ordre de recherche: index en mémoire (même liste, vérifiée en temps
+    constant), puis fichier sauvegardé (+ journal) s'il est à la version
+    courante de la base, sinon reconstruction complète.
+    Seul l'index des candidats de la base (get_candidate_repository) est
+    sauvegardé ; celui d'une autre liste reste en mémoire. Une liste de dicts
+    modifiée sur place doit être signalée avec invalidate_bm25_index.
+
+    Args:
+        cv_data: Liste des CV au format JSON
+
+    Returns:
+        BM25Index prêt à l'emploi
+    """
+    with _bm25_lock:
+        index = _bm25_cache['index']
+        if index is not None and _bm25_cache['data'] is cv_data and index.size == len(cv_data):
+            return index
+
+        # Version lue avant la liste: au pire plus ancienne que son contenu (reconstruction)
+        source = source_signature()
+        if cv_data is get_candidate_repository().candidates():
+            if index is None or index.source != source or not index.matches(cv_data):
+                index = load_bm25_index()
+            if index is None or index.source != source or not index.matches(cv_data):
+                index = BM25Index.build(cv_data)
+                index.source = source
+                _write_snapshot(index)
+        else:
+            index = BM25Index.build(cv_data)
+        _bm25_cache['index'] = index
+        _bm25_cache['data'] = cv_data
+        return index
+
+
+def invalidate_bm25_index(cv_data: Optional[List[Dict]] = None) -> None:
+    """Oublie l'index en mémoire (toutes listes, ou seulement `cv_data`, par exemple modifiée sur place)."""
+    with _bm25_lock:
+        if cv_data is None or _bm25_cache['data'] is cv_data:
+            _bm25_cache['index'] = None
+            _bm25_cache['data'] = None
+
+
+def add_candidate_to_bm25_index(candidate: Dict, previous_source: Optional[int],
+                                source: Optional[int] = None) -> None:
+    """
+    Ajoute un candidat à l'index, juste après son ajout dans la base.
+    Coût constant: une ligne ajoutée au journal, l'instantané n'est pas réécrit
+    (sauf compaction automatique au-delà de BM25_JOURNAL_MAX_ENTRIES).
+
+    Si l'index sauvegardé ne correspondait pas à la base avant l'ajout
+    (`previous_source`), il est supprimé et sera reconstruit à la prochaine recherche.
+    Les ajouts d'un même lot (candidate_writer) sont appliqués dans l'ordre,
+    chacun avec ses propres versions avant/après.
+
+    Args:
+        candidate: Candidat ajouté (avec son id)
+        previous_source: Version de la base avant l'ajout
+        source: Version de la base après l'ajout (relue dans la base si absente)
+    """
+    with _bm25_lock:
+        index = _bm25_cache['index']
+        if index is None or index.source != previous_source:
+            index = load_bm25_index()
+        if index is None:
+            return
+        if index.source != previous_source:
+            _bm25_cache['index'] = None
+            for path in (BM25_INDEX_FILE, BM25_JOURNAL_FILE):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+
+        terms = document_terms(candidate)
+        if source is None:
+            source = source_signature()
+        try:
+            _append_journal({'row': index.size, 'id': candidate.get('id'), 'terms': terms, 'source': source})
+        except OSError as e:
+            print(f"⚠️ Erreur journal index BM25: {e}")
+            _bm25_cache['index'] = None
+            return
+        index.add_document(candidate.get('id'), terms)
+        index.source = source
+        _bm25_cache['index'] = index
+        # La liste de la version suivante sera rapprochée par ses ids (voir get_bm25_index)
+        _bm25_cache['data'] = None
+        _bm25_cache['journal_entries'] += 1
+        if _bm25_cache['journal_entries'] >= BM25_JOURNAL_MAX_ENTRIES:
+            _write_snapshot(index)
+
+
+def compact_bm25_index() -> bool:
+    """
+    Fusionne le journal dans l'instantané (à appeler après un import de CVs).
+
+    Returns:
+        True si une compaction a eu lieu
+    """
+    with _bm25_lock:
+        index = _bm25_cache['index']
+        if index is None:
+            index = load_bm25_index()
+            if index is None:
+                return False
+            _bm25_cache['index'] = index
+        if not _bm25_cache['journal_entries']:
+            return False
+        _write_snapshot(index)
+        return True
+
+
+def compact_bm25_index_in_background() -> threading.Thread:
+    """Lance compact_bm25_index dans un thread (ne bloque pas l'appelant)."""
+    thread = threading.Thread(target=compact_bm25_index, name='bm25-compaction', daemon=True)
+    thread.start()
+    return thread
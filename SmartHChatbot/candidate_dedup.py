@@ -0,0 +1,77 @@
+"""
+Clés de dédoublonnage des candidats.
+Chaque candidat est indexé par email normalisé, téléphone, nom sans accents
+et empreinte du contenu : une vérification de doublon devient une simple
+recherche de clé dans la base.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+
+# Types de clés stockées dans la table dedup_keys
+KEY_FINGERPRINT = 'fingerprint'
+KEY_EMAIL = 'email'
+KEY_PHONE = 'phone'
+KEY_NAME = 'name'
+
+
+def fold_accents(text: str) -> str:
+    """Minuscules, accents retirés, espaces fusionnés ("  Léa  Benoît" -> "lea benoit")."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+
+def normalize_phone(phone: str) -> str:
+    """Chiffres du numéro, sans indicatif ("+33 6 12 34 56 78" et "06 12 34 56 78" -> "612345678")."""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-9:] if len(digits) >= 9 else digits
+
+
+def _text(candidate: Dict, field: str) -> str:
+    return (candidate.get(field) or '').strip().lower()
+
+
+def content_fingerprint(candidate: Dict) -> str:
+    """
+    Empreinte des champs comparés par candidate_exists (email, nom, prénom, poste,
+    expérience, formation, compétences triées) : deux CV strictement identiques
+    ont la même empreinte.
+    """
+    experience = candidate.get('experience', 0)
+    if isinstance(experience, (int, float)) and not isinstance(experience, bool):
+        experience = float(experience)
+    payload = [
+        _text(candidate, 'email'),
+        _text(candidate, 'nom'),
+        _text(candidate, 'prenom'),
+        _text(candidate, 'poste'),
+        experience,
+        _text(candidate, 'formation'),
+        sorted(c.strip().lower() for c in candidate.get('competences', [])),
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def dedup_keys(candidate: Dict) -> List[Tuple[str, str]]:
+    """
+    Clés de dédoublonnage d'un candidat (les clés vides sont omises).
+
+    Returns:
+        Liste de (type de clé, valeur)
+    """
+    keys = [(KEY_FINGERPRINT, content_fingerprint(candidate))]
+    email = _text(candidate, 'email')
+    if email:
+        keys.append((KEY_EMAIL, email))
+    phone = normalize_phone(candidate.get('telephone', ''))
+    if phone:
+        keys.append((KEY_PHONE, phone))
+    name_tokens = sorted(fold_accents(f"{candidate.get('prenom', '')} {candidate.get('nom', '')}").split())
+    if name_tokens:
+        keys.append((KEY_NAME, ' '.join(name_tokens)))
+    return keys
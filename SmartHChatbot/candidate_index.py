@@ -0,0 +1,224 @@
+"""
+Index inversé des candidats pour le matching par mots-clés.
+Associe chaque token normalisé (compétences, poste, formation, langues)
+aux positions des candidats qui le contiennent.
+
+Chaque liste de positions est un tableau NumPy : l'index forme ainsi une
+matrice creuse candidats x vocabulaire (une colonne par token) exploitable
+par le scoring vectorisé de matching.py.
+"""
+
+import hashlib
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# Même découpage que les requêtes recruteur (voir matching.py)
+TOKEN_PATTERN = re.compile(r"[a-zA-ZÀ-ÿ0-9+#]+")
+
+# Champs indexés pour chaque candidat
+INDEXED_FIELDS = ('competences', 'poste', 'formation', 'langues')
+
+# Au-delà, le cache des recherches par mot-clé est vidé
+MAX_CACHED_LOOKUPS = 4096
+
+EMPTY_ROWS = np.zeros(0, dtype=np.int32)
+
+
+def field_text(candidate: Dict, field: str) -> str:
+    """Retourne le texte normalisé (minuscules) d'un champ candidat."""
+    if field in ('competences', 'langues'):
+        return ' '.join(candidate.get(field, [])).lower()
+    return candidate.get(field, '').lower()
+
+
+def experience_value(candidate: Dict) -> float:
+    """Expérience numérique d'un candidat (0 si absente ou invalide)."""
+    try:
+        return float(candidate.get('experience', 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def candidates_fingerprint(cv_data: List[Dict]) -> str:
+    """
+    Empreinte SHA-256 du contenu d'une liste de candidats.
+
+    Coût proportionnel à la taille de la base : calculée à la construction d'un
+    index (CandidateIndex.fingerprint), jamais à chaque recherche.
+
+    Args:
+        cv_data: Liste des CV au format JSON
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    for candidate in cv_data:
+        digest.update(json.dumps(dict(candidate), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class KeywordLookup(ABC):
+    """
+    Recherches par mot-clé communes aux index de candidats (voir aussi candidate_snapshot.py).
+    Les sous-classes fournissent `size` et `rows_containing`.
+    """
+
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        """Nombre de candidats indexés."""
+
+    @abstractmethod
+    def rows_containing(self, field: str, keyword: str) -> np.ndarray:
+        """Positions triées des candidats dont le champ contient `keyword` (sous-chaîne)."""
+
+    def keyword_matrix(self, field: str, keywords: List[str]) -> np.ndarray:
+        """
+        Matrice booléenne mots-clés x candidats pour un champ.
+
+        Args:
+            field: Champ indexé
+            keywords: Mots-clés (une ligne par mot-clé, dans cet ordre)
+
+        Returns:
+            np.ndarray de forme (len(keywords), size)
+        """
+        matrix = np.zeros((len(keywords), self.size), dtype=bool)
+        for i, keyword in enumerate(keywords):
+            matrix[i, self.rows_containing(field, keyword)] = True
+        return matrix
+
+    def any_mask(self, field: str, keywords: Iterable[str]) -> np.ndarray:
+        """Masque des candidats dont le champ contient au moins un des mots-clés."""
+        mask = np.zeros(self.size, dtype=bool)
+        for keyword in keywords:
+            mask[self.rows_containing(field, keyword)] = True
+        return mask
+
+
+class CandidateIndex(KeywordLookup):
+    """
+    Index inversé token -> positions des candidats, construit une seule fois.
+
+    Les recherches conservent la sémantique "sous-chaîne" du matching historique :
+    un mot-clé correspond à un candidat s'il apparaît dans le texte du champ.
+    """
+
+    def __init__(self, cv_data: List[Dict], warm_terms: Iterable[str] = ()):
+        self.cv_data = cv_data
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lookups: Dict[tuple, np.ndarray] = {}
+        self._fingerprint: Optional[str] = None
+
+        # Vecteur d'expérience, encodé une seule fois
+        self.experience = np.fromiter(
+            (experience_value(c) for c in cv_data), dtype=np.float64, count=self.size
+        )
+
+        for field in INDEXED_FIELDS:
+            field_postings: Dict[str, List[int]] = {}
+            for row, candidate in enumerate(cv_data):
+                for token in set(TOKEN_PATTERN.findall(field_text(candidate, field))):
+                    field_postings.setdefault(token, []).append(row)
+            self.postings[field] = {
+                token: np.array(rows, dtype=np.int32) for token, rows in field_postings.items()
+            }
+
+        # Résoudre à l'avance les variantes connues (keyword_variations, rôles, langues)
+        for term in warm_terms:
+            for field in INDEXED_FIELDS:
+                self.rows_containing(field, term)
+
+    @property
+    def size(self) -> int:
+        return len(self.cv_data)
+
+    @property
+    def fingerprint(self) -> str:
+        """Empreinte SHA-256 du contenu de la base (calculée une seule fois, à la demande)."""
+        if self._fingerprint is None:
+            self._fingerprint = candidates_fingerprint(self.cv_data)
+        return self._fingerprint
+
+    def rows_containing(self, field: str, keyword: str) -> np.ndarray:
+        """
+        Positions des candidats dont le champ contient `keyword` (sous-chaîne).
+
+        Args:
+            field: Champ indexé (competences, poste, formation, langues)
+            keyword: Mot-clé déjà en minuscules
+
+        Returns:
+            Tableau trié (sans doublon) des positions dans cv_data
+        """
+        key = (field, keyword)
+        cached = self._lookups.get(key)
+        if cached is not None:
+            return cached
+
+        parts = TOKEN_PATTERN.findall(keyword)
+        if not parts:
+            # Mot-clé sans caractère indexable : vérification directe
+            rows = np.array(
+                [row for row, cand in enumerate(self.cv_data) if keyword in field_text(cand, field)],
+                dtype=np.int32,
+            )
+        else:
+            # Un mot-clé d'un seul token ne peut pas chevaucher un séparateur :
+            # il suffit de chercher les tokens du vocabulaire qui le contiennent.
+            probe = max(parts, key=len)
+            columns = [token_rows for token, token_rows in self.postings[field].items() if probe in token]
+            rows = np.unique(np.concatenate(columns)) if columns else EMPTY_ROWS
+            if TOKEN_PATTERN.fullmatch(keyword) is None:
+                # Mot-clé composé ("machine learning", "full-stack") : confirmer sur le texte
+                rows = np.array(
+                    [row for row in rows if keyword in field_text(self.cv_data[row], field)],
+                    dtype=np.int32,
+                )
+
+        if len(self._lookups) >= MAX_CACHED_LOOKUPS:
+            self._lookups.clear()
+        self._lookups[key] = rows
+        return rows
+
+
+_index_cache: Dict[str, object] = {'data': None, 'size': None, 'index': None}
+
+
+def get_candidate_index(cv_data: List[Dict], warm_terms: Iterable[str] = ()) -> CandidateIndex:
+    """
+    Retourne l'index de `cv_data`, construit une seule fois par liste.
+
+    L'index est réutilisé tant que la même liste (même objet, même taille) est
+    passée : vérification en temps constant, sans hacher la base à chaque
+    recherche. La liste du dépôt (get_candidate_repository) est remplacée par
+    une nouvelle à chaque version de la base ; une liste de dicts modifiée sur
+    place doit être signalée avec invalidate_candidate_index.
+
+    Args:
+        cv_data: Liste des CV au format JSON
+        warm_terms: Termes à résoudre dès la construction
+
+    Returns:
+        CandidateIndex prêt à l'emploi
+    """
+    if _index_cache['data'] is not cv_data or _index_cache['size'] != len(cv_data):
+        _index_cache['index'] = CandidateIndex(cv_data, warm_terms)
+        _index_cache['data'] = cv_data
+        _index_cache['size'] = len(cv_data)
+    return _index_cache['index']
+
+
+def invalidate_candidate_index(cv_data: Optional[List[Dict]] = None) -> None:
+    """Oublie l'index en cache (toutes listes, ou seulement `cv_data`, par exemple modifiée sur place)."""
+    if cv_data is None or _index_cache['data'] is cv_data:
+        _index_cache['data'] = None
+        _index_cache['size'] = None
+        _index_cache['index'] = None
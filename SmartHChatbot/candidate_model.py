@@ -0,0 +1,158 @@
+"""
+Modèle mémoire des candidats et des résultats de matching.
+
+Candidate remplace le dict d'un profil dans le cache partagé (candidate_repository) :
+attributs en __slots__ et compétences/langues internées (une seule chaîne "Python"
+pour toute la base). MatchResult référence le candidat au lieu de le copier.
+
+Les deux classes se lisent comme des dicts (candidate['nom'], .get(), in, dict(...)),
+le code existant (UI, emails, contrats) les utilise donc sans changement.
+Elles ne sont pas modifiables : to_dict() retourne une copie dict.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+# Champs stockés en attributs, dans l'ordre du format JSON (les autres vont dans `extra`)
+CANDIDATE_FIELDS = (
+    'id', 'nom', 'prenom', 'email', 'telephone', 'poste', 'experience',
+    'formation', 'competences', 'langues', 'cv_url', 'linkedin', 'disponibilite',
+)
+
+# Champs listes, stockés en tuples de chaînes internées
+INTERNED_LIST_FIELDS = ('competences', 'langues')
+
+_MISSING = object()
+
+
+def _intern_all(values) -> tuple:
+    return tuple(sys.intern(v) if isinstance(v, str) else v for v in values)
+
+
+def _as_dict(mapping: Mapping) -> Dict:
+    return mapping.to_dict() if hasattr(mapping, 'to_dict') else dict(mapping)
+
+
+class Candidate(Mapping):
+    """Profil candidat compact, en lecture seule."""
+
+    __slots__ = CANDIDATE_FIELDS + ('extra',)
+
+    def __init__(self, data: Dict):
+        for field in CANDIDATE_FIELDS:
+            value = data.get(field, _MISSING)
+            if field in INTERNED_LIST_FIELDS and isinstance(value, list):
+                value = _intern_all(value)
+            object.__setattr__(self, field, value)
+        extra = {k: v for k, v in data.items() if k not in CANDIDATE_FIELDS}
+        object.__setattr__(self, 'extra', extra or None)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'Candidate':
+        """Candidat à partir d'un dict (retourné tel quel si c'est déjà un Candidate)."""
+        return data if isinstance(data, cls) else cls(data)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Candidate est en lecture seule (utiliser to_dict())")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in CANDIDATE_FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for field in CANDIDATE_FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: Any) -> bool:
+        # Comparable à un dict (sélections de l'UI, conversations rechargées depuis le JSON)
+        if self is other:
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == _as_dict(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Candidate(id={self.get('id')!r}, nom={self.get('nom')!r}, prenom={self.get('prenom')!r})"
+
+    def to_dict(self) -> Dict:
+        """Copie dict modifiable (listes pour les champs internés)."""
+        return {key: list(value) if key in INTERNED_LIST_FIELDS and isinstance(value, tuple) else value
+                for key, value in self.items()}
+
+    # Compatibilité avec le code qui copiait le dict du candidat
+    copy = to_dict
+
+
+class MatchResult(Mapping):
+    """Candidat retenu par le matching : référence vers le profil, score et raison."""
+
+    __slots__ = ('candidate', 'match_score', 'match_reason')
+
+    def __init__(self, candidate: Mapping, match_score: int, match_reason: str):
+        object.__setattr__(self, 'candidate', candidate)
+        object.__setattr__(self, 'match_score', match_score)
+        object.__setattr__(self, 'match_reason', match_reason)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("MatchResult est en lecture seule (utiliser to_dict())")
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'match_score':
+            return self.match_score
+        if key == 'match_reason':
+            return self.match_reason
+        return self.candidate[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.candidate:
+            if key not in ('match_score', 'match_reason'):
+                yield key
+        yield 'match_score'
+        yield 'match_reason'
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: Any) -> bool:
+        # Comparable à un dict (sélections de l'UI, conversations rechargées depuis le JSON)
+        if self is other:
+            return True
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == _as_dict(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"MatchResult(id={self.get('id')!r}, match_score={self.match_score!r})"
+
+    def to_dict(self) -> Dict:
+        """Dict équivalent à l'ancienne copie du candidat enrichie du score et de la raison."""
+        data = _as_dict(self.candidate)
+        data['match_score'] = self.match_score
+        data['match_reason'] = self.match_reason
+        return data
+
+    copy = to_dict
+
+
+def to_jsonable(obj: Any) -> Any:
+    """Fonction `default` pour json.dumps : Candidate/MatchResult en dict, le reste en texte."""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    return str(obj)
@@ -0,0 +1,101 @@
+"""
+Cache mémoire des candidats, partagé par tout le processus (Streamlit, Teams).
+Les candidats sont chargés une fois depuis la base SQLite et rechargés
+uniquement quand la version de la base change (ajout d'un candidat, même
+par un autre processus). Comme la base ne fait qu'ajouter des candidats,
+seules les nouvelles lignes sont lues : la vue = liste déjà chargée + ajouts.
+Les structures dérivées (id -> candidat, index) sont construites à la demande
+et invalidées en même temps que la liste. Les profils sont des Candidate
+(voir candidate_model.py) : compacts et en lecture seule.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from candidate_model import Candidate
+from candidate_store import CandidateStore, get_candidate_store
+
+
+class CandidateRepository:
+    """
+    Liste des candidats en mémoire + structures dérivées.
+
+    Tant que la base ne change pas, candidates() retourne le même objet liste :
+    les caches indexés sur cette liste (index inversé, index BM25) restent valides.
+    La liste et les structures dérivées sont partagées : ne pas les modifier.
+    """
+
+    def __init__(self, store: Optional[CandidateStore] = None):
+        self._store = store
+        self._lock = threading.RLock()
+        self._version: Optional[int] = None
+        self._candidates: List[Candidate] = []
+        self._derived: Dict[str, Any] = {}
+
+    @property
+    def store(self) -> CandidateStore:
+        if self._store is None:
+            self._store = get_candidate_store()
+        return self._store
+
+    def _refresh(self) -> None:
+        """Met la liste à jour si la version de la base a changé."""
+        version = self.store.version()
+        if version == self._version:
+            return
+        candidates = None
+        if self._version is not None and self._candidates:
+            # Ajouts seulement: lire les lignes après le dernier id connu
+            added = [Candidate(c) for c in self.store.candidates_after(self._candidates[-1].get('id', 0))]
+            if len(self._candidates) + len(added) == self.store.count():
+                candidates = self._candidates + added
+        if candidates is None:
+            candidates = [Candidate(c) for c in self.store.all_candidates()]
+        # Nouvel objet liste: les caches indexés sur l'ancienne liste sont invalidés
+        self._candidates = candidates
+        self._derived = {}
+        self._version = version
+
+    def candidates(self) -> List[Candidate]:
+        """Tous les candidats (rechargés seulement si la base a changé)."""
+        with self._lock:
+            self._refresh()
+            return self._candidates
+
+    def derived(self, name: str, builder: Callable[[List[Dict]], Any]) -> Any:
+        """
+        Structure dérivée de la liste des candidats, construite une seule fois par version.
+
+        Args:
+            name: Nom de la structure (clé du cache)
+            builder: Fonction construisant la structure à partir de la liste
+
+        Returns:
+            La structure en cache (reconstruite si la base a changé)
+        """
+        with self._lock:
+            self._refresh()
+            if name not in self._derived:
+                self._derived[name] = builder(self._candidates)
+            return self._derived[name]
+
+    def by_id(self) -> Dict[int, Candidate]:
+        """Dictionnaire id -> candidat."""
+        return self.derived('by_id', lambda candidates: {c.get('id'): c for c in candidates})
+
+    def get(self, candidate_id: int) -> Optional[Candidate]:
+        return self.by_id().get(candidate_id)
+
+    def invalidate(self) -> None:
+        """Force un rechargement au prochain accès."""
+        with self._lock:
+            self._version = None
+            self._derived = {}
+
+
+_repository = CandidateRepository()
+
+
+def get_candidate_repository() -> CandidateRepository:
+    """Retourne le cache de candidats partagé du processus."""
+    return _repository
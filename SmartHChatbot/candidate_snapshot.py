@@ -0,0 +1,314 @@
+"""
+Instantané binaire en colonnes de la base de candidats, pour le matching sur
+de très grandes bases : le fichier est projeté en mémoire (mmap) et lu sans
+copie ni décodage JSON, seuls les candidats retenus sont reconstruits en dict.
+
+Un fichier par version de la base (data/snapshots/candidates_v<version>.snap) :
+- SNAPSHOT_MAGIC, longueur de l'en-tête (uint64), en-tête JSON décrivant les tableaux
+- tableaux NumPy alignés sur ALIGNMENT octets :
+  ids (int64), experience (float64),
+  competences/poste/formation: positions des candidats par token en CSR
+  (<champ>_post_indptr, <champ>_post_rows),
+  langues: masque de bits des langues de chaque candidat (langues_bits),
+  vocabulaire et texte de chaque champ, enregistrements JSON : tas d'octets UTF-8
+  (<nom>_heap) + table d'offsets (<nom>_offsets).
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from candidate_index import (EMPTY_ROWS, INDEXED_FIELDS, MAX_CACHED_LOOKUPS, TOKEN_PATTERN,
+                             KeywordLookup, experience_value, field_text)
+from candidate_store import CandidateStore, get_candidate_store
+
+
+SNAPSHOT_DIR = 'data/snapshots'
+SNAPSHOT_MAGIC = b'SHSNAP01'
+ALIGNMENT = 64
+
+# Champ stocké en masque de bits (peu de valeurs distinctes) plutôt qu'en CSR
+BITMASK_FIELD = 'langues'
+
+
+def snapshot_path(version: int, directory: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(directory, f"candidates_v{version}.snap")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _string_heap(strings: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """Table d'offsets (int64, len + 1) et tas d'octets d'une liste de chaînes encodées."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(strings), dtype=np.uint8)
+
+
+def build_candidate_snapshot(path: str, records: Iterable[str], source: int) -> int:
+    """
+    Écrit l'instantané à partir des candidats JSON (un seul candidat décodé à la fois).
+
+    Args:
+        path: Fichier de destination (remplacé atomiquement)
+        records: Données JSON brutes des candidats, dans l'ordre de la base
+        source: Version de la base décrite
+
+    Returns:
+        Nombre de candidats écrits
+    """
+    ids, experience, raw = [], [], []
+    vocab: Dict[str, Dict[str, int]] = {field: {} for field in INDEXED_FIELDS}
+    tokens: Dict[str, List[int]] = {field: [] for field in INDEXED_FIELDS}
+    indptr: Dict[str, List[int]] = {field: [0] for field in INDEXED_FIELDS}
+    texts: Dict[str, List[bytes]] = {field: [] for field in INDEXED_FIELDS}
+
+    for data in records:
+        candidate = json.loads(data)
+        ids.append(candidate.get('id', 0))
+        experience.append(experience_value(candidate))
+        raw.append(data.encode('utf-8'))
+        for field in INDEXED_FIELDS:
+            text = field_text(candidate, field)
+            texts[field].append(text.encode('utf-8'))
+            field_vocab = vocab[field]
+            for token in set(TOKEN_PATTERN.findall(text)):
+                tokens[field].append(field_vocab.setdefault(token, len(field_vocab)))
+            indptr[field].append(len(tokens[field]))
+
+    size = len(ids)
+    arrays = {
+        'ids': np.array(ids, dtype=np.int64),
+        'experience': np.array(experience, dtype=np.float64),
+    }
+    arrays['records_offsets'], arrays['records_heap'] = _string_heap(raw)
+    for field in INDEXED_FIELDS:
+        token_ids = np.array(tokens[field], dtype=np.int64)
+        rows = np.repeat(np.arange(size, dtype=np.int32), np.diff(np.array(indptr[field], dtype=np.int64)))
+        vocab_size = len(vocab[field])
+        if field == BITMASK_FIELD:
+            bits = np.zeros((size, max(1, (vocab_size + 63) // 64)), dtype=np.uint64)
+            np.bitwise_or.at(bits, (rows, token_ids // 64),
+                             np.left_shift(np.uint64(1), (token_ids % 64).astype(np.uint64)))
+            arrays[f'{field}_bits'] = bits
+        else:
+            # Tri stable: les positions restent croissantes pour chaque token
+            order = np.argsort(token_ids, kind='stable')
+            post_indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+            np.cumsum(np.bincount(token_ids, minlength=vocab_size), out=post_indptr[1:])
+            arrays[f'{field}_post_indptr'] = post_indptr
+            arrays[f'{field}_post_rows'] = rows[order]
+        arrays[f'{field}_vocab_offsets'], arrays[f'{field}_vocab_heap'] = _string_heap(
+            [token.encode('utf-8') for token in vocab[field]])
+        arrays[f'{field}_text_offsets'], arrays[f'{field}_text_heap'] = _string_heap(texts[field])
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'source': source, 'size': size, 'arrays': layout}).encode('utf-8')
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return size
+
+
+class SnapshotRecords:
+    """Vue séquence des candidats de l'instantané : chaque dict est décodé à la demande."""
+
+    def __init__(self, offsets: np.ndarray, heap: np.ndarray):
+        self._offsets = offsets
+        self._heap = heap
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> Dict:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return json.loads(self._heap[start:end].tobytes().decode('utf-8'))
+
+
+class CandidateSnapshot(KeywordLookup):
+    """
+    Instantané projeté en mémoire, interrogeable comme CandidateIndex
+    (mêmes résultats de rows_containing, donc même scoring dans matching.py).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} n'est pas un instantané de candidats")
+        (header_size,) = struct.unpack_from('<Q', self._mmap, len(SNAPSHOT_MAGIC))
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header = json.loads(self._mmap[header_start:header_start + header_size].decode('utf-8'))
+        data_start = _align(header_start + header_size)
+
+        self.source = header['source']
+        self._size = header['size']
+        self._arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header['arrays'].items():
+            dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+            count = int(np.prod(shape))
+            if count == 0:
+                array = np.zeros(shape, dtype=dtype)
+            else:
+                array = np.frombuffer(self._mmap, dtype=dtype, count=count,
+                                      offset=data_start + spec['offset']).reshape(shape)
+            self._arrays[name] = array
+
+        self.ids = self._arrays['ids']
+        self.experience = self._arrays['experience']
+        self.records = SnapshotRecords(self._arrays['records_offsets'], self._arrays['records_heap'])
+        self._vocab: Dict[str, List[str]] = {}
+        self._lookups: Dict[tuple, np.ndarray] = {}
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _string(self, name: str, i: int) -> str:
+        offsets = self._arrays[f'{name}_offsets']
+        return self._arrays[f'{name}_heap'][offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def field_text(self, row: int, field: str) -> str:
+        """Texte normalisé du champ d'un candidat (comme candidate_index.field_text)."""
+        return self._string(f'{field}_text', row)
+
+    def vocabulary(self, field: str) -> List[str]:
+        """Tokens du champ, par identifiant (décodés une seule fois)."""
+        if field not in self._vocab:
+            count = len(self._arrays[f'{field}_vocab_offsets']) - 1
+            self._vocab[field] = [self._string(f'{field}_vocab', i) for i in range(count)]
+        return self._vocab[field]
+
+    def _rows_with_tokens(self, field: str, token_ids: List[int]) -> np.ndarray:
+        if not token_ids:
+            return EMPTY_ROWS
+        if field == BITMASK_FIELD:
+            bits = self._arrays[f'{field}_bits']
+            query = np.zeros(bits.shape[1], dtype=np.uint64)
+            for token_id in token_ids:
+                query[token_id // 64] |= np.uint64(1) << np.uint64(token_id % 64)
+            return np.flatnonzero((bits & query).any(axis=1)).astype(np.int32)
+        indptr, rows = self._arrays[f'{field}_post_indptr'], self._arrays[f'{field}_post_rows']
+        return np.unique(np.concatenate([rows[indptr[t]:indptr[t + 1]] for t in token_ids]))
+
+    def rows_containing(self, field: str, keyword: str) -> np.ndarray:
+        """Positions des candidats dont le champ contient `keyword` (voir CandidateIndex.rows_containing)."""
+        key = (field, keyword)
+        cached = self._lookups.get(key)
+        if cached is not None:
+            return cached
+
+        parts = TOKEN_PATTERN.findall(keyword)
+        if not parts:
+            rows = np.array(
+                [row for row in range(self.size) if keyword in self.field_text(row, field)],
+                dtype=np.int32,
+            )
+        else:
+            probe = max(parts, key=len)
+            token_ids = [i for i, token in enumerate(self.vocabulary(field)) if probe in token]
+            rows = self._rows_with_tokens(field, token_ids)
+            if TOKEN_PATTERN.fullmatch(keyword) is None:
+                rows = np.array(
+                    [row for row in rows if keyword in self.field_text(row, field)],
+                    dtype=np.int32,
+                )
+
+        if len(self._lookups) >= MAX_CACHED_LOOKUPS:
+            self._lookups.clear()
+        self._lookups[key] = rows
+        return rows
+
+
+_snapshot_cache: Dict[str, Optional[CandidateSnapshot]] = {'snapshot': None}
+_snapshot_lock = threading.Lock()
+
+# Instantanés encore utilisés dans ce processus (chemin absolu -> instantané), ex. recherche en cours
+_open_snapshots: "weakref.WeakValueDictionary[str, CandidateSnapshot]" = weakref.WeakValueDictionary()
+
+
+def _remove_old_snapshots(current: str) -> None:
+    """
+    Supprime les instantanés des autres versions que plus rien n'utilise dans ce processus.
+    Un fichier encore projeté par un autre processus (suppression refusée sous Windows)
+    est conservé et signalé : il sera supprimé à un prochain nettoyage (nouvelle
+    version ou démarrage).
+    """
+    directory = os.path.dirname(current) or '.'
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not (name.startswith('candidates_v') and name.endswith('.snap')) or path == current:
+            continue
+        if os.path.abspath(path) in _open_snapshots:
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"⚠️ Ancien instantané {name} conservé (encore ouvert ?), nouvel essai au prochain nettoyage: {e}")
+
+
+def get_candidate_snapshot(store: Optional[CandidateStore] = None) -> CandidateSnapshot:
+    """
+    Retourne l'instantané de la version courante de la base.
+    Il est projeté depuis le disque s'il existe déjà, sinon construit puis projeté.
+    Appelé au démarrage par SharedResources.warm_up (moteur "snapshot") : le premier
+    appel du processus, comme chaque changement de version, supprime aussi les
+    instantanés que plus personne n'utilise.
+
+    Args:
+        store: Base de candidats (base par défaut si absente)
+
+    Returns:
+        CandidateSnapshot prêt à l'emploi
+    """
+    store = store or get_candidate_store()
+    with _snapshot_lock:
+        version = store.version()
+        snapshot = _snapshot_cache['snapshot']
+        if snapshot is not None and snapshot.source == version:
+            return snapshot
+
+        path = snapshot_path(version)
+        snapshot = None
+        if os.path.exists(path):
+            try:
+                snapshot = CandidateSnapshot(path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Instantané illisible, reconstruction: {e}")
+        if snapshot is None:
+            with store.read_snapshot() as (source, records):
+                path = snapshot_path(source)
+                count = build_candidate_snapshot(path, records, source)
+            snapshot = CandidateSnapshot(path)
+            print(f"✅ Instantané de {count} candidats écrit dans {path}")
+        _open_snapshots[os.path.abspath(path)] = snapshot
+        # L'ancien instantané n'est plus référencé par le cache avant le nettoyage
+        _snapshot_cache['snapshot'] = snapshot
+        _remove_old_snapshots(path)
+        return snapshot
+
+
+if __name__ == "__main__":
+    # Construction de l'instantané avant le démarrage des services (déploiement)
+    snapshot = get_candidate_snapshot()
+    print(f"📦 {snapshot.size} candidats dans {snapshot.path}")
@@ -0,0 +1,486 @@
+"""
+Base de candidats SQLite.
+Remplace la relecture/réécriture complète de data/cv_data.json : recherches par
+email, nom, expérience ou compétence via des index, ajout d'un candidat en une
+seule insertion. Le fichier JSON existant est importé une seule fois (migration).
+La table dedup_keys (voir candidate_dedup.py) rend la détection de doublons directe,
+les tables cv_minhash/lsh_buckets (voir cv_minhash.py) celle des CV quasi identiques.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from candidate_dedup import KEY_FINGERPRINT, content_fingerprint, dedup_keys
+from cv_minhash import NEAR_DUPLICATE_THRESHOLD, estimated_similarity, lsh_band_keys
+
+
+DB_FILE = 'data/candidates.db'
+CV_DATA_FILE = 'data/cv_data.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    email_norm TEXT NOT NULL DEFAULT '',
+    full_name_norm TEXT NOT NULL DEFAULT '',
+    experience REAL NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_email ON candidates(email_norm);
+CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates(full_name_norm);
+CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates(experience);
+
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    skill TEXT NOT NULL,
+    PRIMARY KEY (skill, candidate_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    PRIMARY KEY (kind, key, candidate_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cv_minhash (
+    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+    signature BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, candidate_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def normalize_name(nom: str, prenom: str) -> str:
+    """Nom complet normalisé ("nom prenom" en minuscules), comme la recherche par nom."""
+    return f"{(nom or '').strip()} {(prenom or '').strip()}".lower()
+
+
+def _experience_value(candidate: Dict) -> float:
+    try:
+        return float(candidate.get('experience', 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CandidateStore:
+    """
+    Accès à la base de candidats.
+    Une connexion par opération : utilisable depuis Streamlit, Teams et les threads de synchro.
+    """
+
+    def __init__(self, path: str = DB_FILE, json_path: str = CV_DATA_FILE):
+        self.path = path
+        self.json_path = json_path
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.migrate_from_json()
+        self._backfill_dedup_keys()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ==================== MIGRATION ====================
+    def migrate_from_json(self) -> int:
+        """
+        Importe data/cv_data.json une seule fois (ids et ordre conservés).
+        La vérification et l'import se font dans une même transaction BEGIN IMMEDIATE :
+        si plusieurs processus démarrent ensemble, un seul importe le fichier.
+        Un id absent ou déjà utilisé dans le fichier est remplacé par un nouvel id (signalé).
+
+        Returns:
+            Nombre de candidats importés (0 si la migration a déjà été faite)
+        """
+        with self._write_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone():
+                return 0
+            candidates = []
+            if os.path.exists(self.json_path):
+                try:
+                    with open(self.json_path, 'r', encoding='utf-8') as f:
+                        candidates = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Migration impossible depuis {self.json_path}: {e}")
+                    return 0
+            next_id = 1
+            used_ids = set()
+            duplicates = []
+            for candidate in candidates:
+                candidate_id = candidate.get('id')
+                if isinstance(candidate_id, int) and candidate_id not in used_ids:
+                    used_ids.add(candidate_id)
+                    next_id = max(next_id, candidate_id + 1)
+            for candidate in candidates:
+                candidate_id = candidate.get('id')
+                if isinstance(candidate_id, int) and candidate_id in used_ids:
+                    used_ids.discard(candidate_id)
+                else:
+                    if isinstance(candidate_id, int):
+                        duplicates.append(candidate_id)
+                    candidate['id'] = next_id
+                    next_id += 1
+                self._insert(conn, candidate)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)", (self.json_path,))
+            self._bump_version(conn)
+        if duplicates:
+            print(f"⚠️ Ids en double dans {self.json_path} ({sorted(set(duplicates))}) : nouveaux ids attribués")
+        if candidates:
+            print(f"✅ {len(candidates)} candidats importés de {self.json_path} vers {self.path}")
+        return len(candidates)
+
+    def _backfill_dedup_keys(self) -> None:
+        """Calcule les clés de dédoublonnage des bases créées avant leur introduction."""
+        with self._write_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'dedup_keys'").fetchone():
+                return
+            rows = conn.execute("SELECT data FROM candidates").fetchall()
+            for (data,) in rows:
+                self._insert_dedup_keys(conn, json.loads(data))
+            conn.execute("INSERT INTO meta (key, value) VALUES ('dedup_keys', '1')")
+
+    # ==================== LECTURE ====================
+    def all_candidates(self) -> List[Dict]:
+        """Tous les candidats, dans l'ordre des ids (ordre historique du fichier JSON)."""
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute("SELECT data FROM candidates ORDER BY id")]
+
+    def candidates_after(self, last_id: int) -> List[Dict]:
+        """Candidats ajoutés après `last_id` (ordre des ids)."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT data FROM candidates WHERE id > ? ORDER BY id", (last_id,))
+            return [json.loads(row[0]) for row in rows]
+
+    @contextmanager
+    def read_snapshot(self) -> Iterator[Tuple[int, Iterator[str]]]:
+        """
+        Version de la base et données JSON brutes des candidats (ordre des ids),
+        lues dans une même transaction : les ajouts concurrents n'y apparaissent pas.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            version = int(row[0]) if row else 0
+            yield version, (data for (data,) in conn.execute("SELECT data FROM candidates ORDER BY id"))
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def first(self, limit: int) -> List[Dict]:
+        """Les `limit` premiers candidats."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT data FROM candidates ORDER BY id LIMIT ?", (limit,))
+            return [json.loads(row[0]) for row in rows]
+
+    def get(self, candidate_id: int) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_email(self, email: str) -> List[Dict]:
+        """Candidats ayant cet email (comparaison insensible à la casse)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM candidates WHERE email_norm = ? ORDER BY id", ((email or '').strip().lower(),)
+            )
+            return [json.loads(row[0]) for row in rows]
+
+    def find_by_name(self, search: str) -> List[Dict]:
+        """
+        Candidats dont le nom complet ("nom prenom") contient la saisie,
+        ou chacun de ses mots. Recherche exacte par index d'abord.
+
+        Args:
+            search: Nom saisi par l'utilisateur
+
+        Returns:
+            Liste des candidats trouvés (ordre des ids)
+        """
+        search_name = search.lower()
+        parts = search_name.strip().split()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM candidates WHERE full_name_norm = ? ORDER BY id", (search_name.strip(),)
+            ).fetchall()
+            if not rows:
+                # Correspondance partielle: parcours de la seule colonne indexée des noms
+                conditions = " AND ".join(["instr(full_name_norm, ?) > 0"] * len(parts)) or "0"
+                rows = conn.execute(
+                    f"SELECT data FROM candidates WHERE instr(full_name_norm, ?) > 0 OR ({conditions}) ORDER BY id",
+                    [search_name] + parts,
+                ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find_by_skill(self, skill: str) -> List[Dict]:
+        """Candidats ayant exactement cette compétence (insensible à la casse)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT c.data FROM candidate_skills s JOIN candidates c ON c.id = s.candidate_id "
+                "WHERE s.skill = ? ORDER BY c.id",
+                (skill.strip().lower(),),
+            )
+            return [json.loads(row[0]) for row in rows]
+
+    def find_by_min_experience(self, min_experience: float) -> List[Dict]:
+        """Candidats ayant au moins `min_experience` années d'expérience."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM candidates WHERE experience >= ? ORDER BY id", (min_experience,)
+            )
+            return [json.loads(row[0]) for row in rows]
+
+    def has_fingerprint(self, candidate: Dict) -> bool:
+        """Vrai si un candidat strictement identique (même empreinte de contenu) existe."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM dedup_keys WHERE kind = ? AND key = ? LIMIT 1",
+                (KEY_FINGERPRINT, content_fingerprint(candidate)),
+            ).fetchone()
+        return row is not None
+
+    def possible_duplicates(self, candidate: Dict) -> List[Tuple[str, int]]:
+        """
+        Candidats partageant une clé avec `candidate` (email, téléphone, nom sans accents).
+
+        Returns:
+            Liste de (type de clé, id du candidat existant)
+        """
+        keys = [(kind, key) for kind, key in dedup_keys(candidate) if kind != KEY_FINGERPRINT]
+        matches = []
+        with self._connect() as conn:
+            for kind, key in keys:
+                rows = conn.execute(
+                    "SELECT candidate_id FROM dedup_keys WHERE kind = ? AND key = ? ORDER BY candidate_id",
+                    (kind, key),
+                )
+                matches.extend((kind, row[0]) for row in rows)
+        return matches
+
+    def find_near_duplicates(self, signature: np.ndarray,
+                             threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Tuple[int, float]]:
+        """
+        CV quasi identiques à une signature MinHash (voir cv_minhash.py).
+        Seuls les candidats partageant au moins une bande LSH sont comparés.
+
+        Args:
+            signature: Signature MinHash du texte du CV reçu
+            threshold: Similarité estimée minimale
+
+        Returns:
+            Liste de (id du candidat, similarité estimée), la plus proche d'abord
+        """
+        if not len(signature):
+            return []
+        band_keys = list(enumerate(lsh_band_keys(signature)))
+        with self._connect() as conn:
+            candidate_ids = set()
+            for band, bucket in band_keys:
+                rows = conn.execute(
+                    "SELECT candidate_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+                candidate_ids.update(row[0] for row in rows)
+            matches = []
+            for candidate_id in candidate_ids:
+                row = conn.execute(
+                    "SELECT signature FROM cv_minhash WHERE candidate_id = ?", (candidate_id,)
+                ).fetchone()
+                similarity = estimated_similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+                if similarity >= threshold:
+                    matches.append((candidate_id, similarity))
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+    def version(self) -> int:
+        """Compteur incrémenté à chaque modification de la base."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    # ==================== ÉCRITURE ====================
+    def write_batch(self, writes: List[Tuple[str, tuple]]) -> List:
+        """
+        Applique plusieurs écritures dans une seule transaction (un seul fsync).
+        Chaque écriture a son point de sauvegarde : une écriture en erreur est
+        annulée sans empêcher les autres d'être validées.
+
+        Args:
+            writes: Liste de (opération, arguments), opération parmi
+                'add_candidate' (candidate, signature) et 'add_minhash' (candidate_id, signature)
+
+        Returns:
+            Résultat de chaque écriture, dans l'ordre (l'exception levée si elle a échoué)
+        """
+        return self.write_batch_with_versions(writes)[0]
+
+    def write_batch_with_versions(self, writes: List[Tuple[str, tuple]]) -> Tuple[List, List[Optional[Tuple[int, int]]]]:
+        """
+        Comme write_batch, en indiquant la version de la base avant et après chaque écriture.
+        Chaque candidat ajouté incrémente la version : dans un même lot, les ajouts
+        ont des versions consécutives (l'index BM25 les suit un par un).
+
+        Returns:
+            (résultats, versions) : versions[i] vaut (avant, après) pour un candidat
+            ajouté, None pour une écriture sans changement de version ou en erreur
+        """
+        handlers = {'add_candidate': self._add_candidate, 'add_minhash': self._insert_minhash}
+        results = []
+        versions: List[Optional[Tuple[int, int]]] = []
+        with self._write_lock, self._connect() as conn:
+            # Verrou d'écriture pris d'emblée: les autres processus attendent la fin du lot
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            version = int(row[0]) if row else 0
+            for op, args in writes:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = handlers[op](conn, *args)
+                    change = None
+                    if op == 'add_candidate':
+                        self._bump_version(conn)
+                        change = (version, version + 1)
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append(e)
+                    versions.append(None)
+                    continue
+                results.append(result)
+                versions.append(change)
+                if change is not None:
+                    version = change[1]
+        return results, versions
+
+    def add_candidate(self, candidate: Dict, signature: Optional[np.ndarray] = None) -> int:
+        """
+        Insère un candidat avec un nouvel id (max + 1, attribué par SQLite).
+        Pour regrouper les écritures concurrentes, passer par candidate_writer.
+
+        Args:
+            candidate: Données du candidat (l'id est ajouté au dictionnaire)
+            signature: Signature MinHash du texte du CV (optionnelle)
+
+        Returns:
+            Id attribué
+        """
+        result = self.write_batch([('add_candidate', (candidate, signature))])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def add_minhash(self, candidate_id: int, signature: np.ndarray) -> None:
+        """Enregistre la signature MinHash du CV d'un candidat et ses bandes LSH."""
+        result = self.write_batch([('add_minhash', (candidate_id, signature))])[0]
+        if isinstance(result, Exception):
+            raise result
+
+    def _add_candidate(self, conn: sqlite3.Connection, candidate: Dict,
+                       signature: Optional[np.ndarray] = None) -> int:
+        # Id attribué par SQLite à l'insertion (max + 1), sans lecture préalable
+        candidate['id'] = None
+        self._insert(conn, candidate)
+        if signature is not None:
+            self._insert_minhash(conn, candidate['id'], signature)
+        return candidate['id']
+
+    def _insert_minhash(self, conn: sqlite3.Connection, candidate_id: int, signature: np.ndarray) -> None:
+        if not len(signature):
+            return
+        signature = np.asarray(signature, dtype=np.uint32)
+        conn.execute(
+            "INSERT OR REPLACE INTO cv_minhash (candidate_id, signature) VALUES (?, ?)",
+            (candidate_id, signature.tobytes()),
+        )
+        conn.execute("DELETE FROM lsh_buckets WHERE candidate_id = ?", (candidate_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets (band, bucket, candidate_id) VALUES (?, ?, ?)",
+            [(band, bucket, candidate_id) for band, bucket in enumerate(lsh_band_keys(signature))],
+        )
+
+    def _insert(self, conn: sqlite3.Connection, candidate: Dict) -> None:
+        """Insère un candidat ; si son id est None, SQLite attribue max + 1 (INTEGER PRIMARY KEY)."""
+        columns = (
+            (candidate.get('email') or '').strip().lower(),
+            normalize_name(candidate.get('nom', ''), candidate.get('prenom', '')),
+            _experience_value(candidate),
+        )
+        if candidate.get('id') is None:
+            cursor = conn.execute(
+                "INSERT INTO candidates (email_norm, full_name_norm, experience, data) VALUES (?, ?, ?, '')",
+                columns,
+            )
+            candidate['id'] = cursor.lastrowid
+            conn.execute(
+                "UPDATE candidates SET data = ? WHERE id = ?",
+                (json.dumps(candidate, ensure_ascii=False), candidate['id']),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO candidates (id, email_norm, full_name_norm, experience, data) VALUES (?, ?, ?, ?, ?)",
+                (candidate['id'],) + columns + (json.dumps(candidate, ensure_ascii=False),),
+            )
+        skills = {s.strip().lower() for s in candidate.get('competences', []) if s and s.strip()}
+        conn.executemany(
+            "INSERT INTO candidate_skills (candidate_id, skill) VALUES (?, ?)",
+            [(candidate['id'], skill) for skill in skills],
+        )
+        self._insert_dedup_keys(conn, candidate)
+
+    def _insert_dedup_keys(self, conn: sqlite3.Connection, candidate: Dict) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO dedup_keys (kind, key, candidate_id) VALUES (?, ?, ?)",
+            [(kind, key, candidate['id']) for kind, key in dedup_keys(candidate)],
+        )
+
+    def _bump_version(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('version', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+
+_stores: Dict[str, CandidateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_candidate_store(path: str = DB_FILE) -> CandidateStore:
+    """Retourne la base de candidats (créée et migrée au premier appel)."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = CandidateStore(path)
+            _stores[key] = store
+        return store
+
+
+if __name__ == "__main__":
+    store = get_candidate_store()
+    print(f"📊 {store.count()} candidats dans {store.path}")
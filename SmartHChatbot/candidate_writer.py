@@ -0,0 +1,178 @@
+"""
+Écrivain unique des candidats (group commit).
+Streamlit, le bot Teams et la synchro des emails soumettent leurs écritures à une
+file ; un thread les regroupe par lot (fenêtre de BATCH_WINDOW secondes) et les
+valide en une seule transaction SQLite, donc un seul fsync par lot. L'appelant
+n'est acquitté qu'une fois le lot durable.
+Entre processus, les lots sont sérialisés par le verrou d'écriture de SQLite
+(BEGIN IMMEDIATE dans CandidateStore.write_batch).
+Un ajout peut fournir un rappel on_commit, exécuté dans le thread d'écriture,
+dans l'ordre des écritures, avec les versions de la base avant/après l'ajout
+(mise à jour de l'index BM25, voir cv_extractor.add_candidate_to_database).
+Un import (synchro des emails) soumet tous ses ajouts d'un coup avec
+add_candidates : ils sont validés ensemble, en une seule transaction.
+"""
+
+import functools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from candidate_store import DB_FILE, CandidateStore, get_candidate_store
+
+
+# Attente maximale pour regrouper les écritures concurrentes (secondes)
+BATCH_WINDOW = 0.005
+MAX_BATCH_SIZE = 256
+
+# Rappel après validation d'un ajout: (résultat, version avant, version après)
+CommitCallback = Callable[[object, int, int], None]
+
+# Écriture en file: (opération, arguments, Future, rappel)
+Write = Tuple[str, tuple, Future, Optional[CommitCallback]]
+
+
+class CandidateWriter:
+    """File d'écritures d'une base de candidats, validées par lots."""
+
+    def __init__(self, store: Optional[CandidateStore] = None,
+                 batch_window: float = BATCH_WINDOW, max_batch_size: int = MAX_BATCH_SIZE):
+        self._store = store
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        # Chaque élément est un groupe d'écritures validées dans le même lot
+        self._queue: "queue.Queue[List[Write]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def store(self) -> CandidateStore:
+        if self._store is None:
+            self._store = get_candidate_store()
+        return self._store
+
+    def submit(self, op: str, *args, on_commit: Optional[CommitCallback] = None) -> Future:
+        """
+        Ajoute une écriture à la file (voir CandidateStore.write_batch pour les opérations).
+
+        Args:
+            on_commit: Rappel (résultat, version avant, version après) exécuté après
+                validation du lot, avant de résoudre la Future (seulement si la version a changé)
+
+        Returns:
+            Future résolue avec le résultat une fois le lot validé
+        """
+        future: Future = Future()
+        self._queue.put([(op, args, future, on_commit)])
+        self._ensure_thread()
+        return future
+
+    def add_candidate(self, candidate: Dict, signature: Optional[np.ndarray] = None,
+                      timeout: Optional[float] = None, on_commit: Optional[CommitCallback] = None) -> int:
+        """
+        Ajoute un candidat et attend que son lot soit écrit sur disque.
+
+        Args:
+            candidate: Données du candidat (l'id est ajouté au dictionnaire)
+            signature: Signature MinHash du texte du CV (optionnelle)
+            timeout: Attente maximale en secondes (None = illimitée)
+            on_commit: Rappel (id, version avant, version après) dans le thread d'écriture
+
+        Returns:
+            Id attribué
+        """
+        return self.submit('add_candidate', candidate, signature, on_commit=on_commit).result(timeout)
+
+    def add_candidates(self, candidates: List[Tuple[Dict, Optional[np.ndarray]]], timeout: Optional[float] = None,
+                       on_commit: Optional[Callable[[Dict, object, int, int], None]] = None) -> List:
+        """
+        Ajoute plusieurs candidats dans un même lot (une seule transaction, un seul fsync,
+        quel que soit leur nombre) et attend qu'il soit écrit sur disque.
+
+        Args:
+            candidates: Liste de (données du candidat, signature MinHash ou None)
+            timeout: Attente maximale en secondes (None = illimitée)
+            on_commit: Rappel (candidat, id, version avant, version après) exécuté pour
+                chaque ajout validé, dans l'ordre, dans le thread d'écriture
+
+        Returns:
+            Pour chaque candidat, dans l'ordre : id attribué ou exception levée
+        """
+        group: List[Write] = [
+            ('add_candidate', (candidate, signature), Future(),
+             functools.partial(on_commit, candidate) if on_commit is not None else None)
+            for candidate, signature in candidates
+        ]
+        if not group:
+            return []
+        self._queue.put(group)
+        self._ensure_thread()
+        results = []
+        for _, _, future, _ in group:
+            try:
+                results.append(future.result(timeout))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def add_minhash(self, candidate_id: int, signature: np.ndarray, timeout: Optional[float] = None) -> None:
+        """Enregistre la signature MinHash d'un candidat et attend que son lot soit écrit."""
+        self.submit('add_minhash', candidate_id, signature).result(timeout)
+
+    def _ensure_thread(self) -> None:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='candidate-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            # Un groupe (add_candidates) n'est jamais découpé, même au-delà de max_batch_size
+            batch = list(self._queue.get())
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.extend(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch: List[Write]) -> None:
+        try:
+            results, versions = self.store.write_batch_with_versions([(op, args) for op, args, _, _ in batch])
+        except Exception as e:
+            print(f"❌ Erreur d'écriture des candidats ({len(batch)} opérations): {e}")
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future, on_commit), result, change in zip(batch, results, versions):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                continue
+            if on_commit is not None and change is not None:
+                try:
+                    on_commit(result, *change)
+                except Exception as e:
+                    print(f"⚠️ Erreur après l'écriture d'un candidat: {e}")
+            future.set_result(result)
+
+
+_writers: Dict[str, CandidateWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_candidate_writer(path: str = DB_FILE) -> CandidateWriter:
+    """Retourne l'écrivain partagé du processus pour la base `path`."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = CandidateWriter(get_candidate_store(path))
+            _writers[key] = writer
+        return writer
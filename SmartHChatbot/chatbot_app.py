@@ -4,10 +4,13 @@ Interface Streamlit moderne avec chat interactif et boutons d'action
 """
 
 import streamlit as st
-import json
-import os
+import time
 from datetime import datetime
 from chatbot_engine import ChatbotEngine
+from contract_cache import get_contract_cache
+from conversation_index import get_conversation_index
+from conversation_log import ConversationWriter, delete_conversation_files, read_conversation
+from shared_resources import get_shared_resources
 
 # Configuration de la page
 st.set_page_config(
@@ -54,97 +57,85 @@ st.markdown("""
 
 # ==================== FONCTIONS HISTORIQUE ====================
 
-def _to_serializable(obj):
-    """Convertit récursivement en objets JSON-sérialisables (datetime -> isoformat)."""
-    if isinstance(obj, dict):
-        return {k: _to_serializable(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_to_serializable(v) for v in obj]
-    if isinstance(obj, set):
-        return [_to_serializable(v) for v in obj]
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    return obj
-
-def save_conversation():
-    """Sauvegarde la conversation actuelle."""
+# Affichage: seuls les messages récents et une page de candidats sont construits à chaque rerun
+MESSAGES_WINDOW = 10
+CANDIDATES_PER_PAGE = 5
+
+# Intervalle de rafraîchissement pendant un travail en arrière-plan (secondes)
+JOB_POLL_INTERVAL = 1.0
+
+
+def reset_display_state():
+    """Réinitialise la fenêtre de messages et la pagination des candidats."""
+    st.session_state.visible_messages = MESSAGES_WINDOW
+    st.session_state.candidate_pages = {}
+    st.session_state.expanded_data = set()
+
+
+def _conversation_title() -> str:
+    """Titre basé sur le premier message de l'utilisateur."""
+    first_user_msg = next((m['content'] for m in st.session_state.messages if m['role'] == 'user'), None)
+    if first_user_msg:
+        return first_user_msg[:50] + ("..." if len(first_user_msg) > 50 else "")
+    return "Nouvelle conversation"
+
+
+def save_conversation(force_checkpoint: bool = False):
+    """
+    Sauvegarde la conversation actuelle : seuls les nouveaux messages sont écrits,
+    le contexte est enregistré périodiquement (ou tout de suite si force_checkpoint).
+    """
     if not st.session_state.messages:
         return
     
-    history_dir = "data/chat_history"
-    os.makedirs(history_dir, exist_ok=True)
-    
     conversation_id = st.session_state.get('conversation_id')
     if not conversation_id:
         conversation_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         st.session_state.conversation_id = conversation_id
     
-    # Créer un titre basé sur le premier message
-    title = "Nouvelle conversation"
-    if st.session_state.messages:
-        first_user_msg = next((m['content'] for m in st.session_state.messages if m['role'] == 'user'), None)
-        if first_user_msg:
-            title = first_user_msg[:50] + ("..." if len(first_user_msg) > 50 else "")
-    
-    conversation_data = {
-        "id": conversation_id,
-        "title": title,
-        "timestamp": datetime.now().isoformat(),
-        "messages": st.session_state.messages,
-        "context": st.session_state.chatbot.user_context
-    }
+    writer = st.session_state.get('conversation_writer')
+    if writer is None or writer.conversation_id != conversation_id:
+        writer = ConversationWriter(conversation_id)
+        st.session_state.conversation_writer = writer
     
-    filepath = os.path.join(history_dir, f"{conversation_id}.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(_to_serializable(conversation_data), f, ensure_ascii=False, indent=2)
+    title = _conversation_title()
+    if writer.save(st.session_state.messages, st.session_state.chatbot.user_context, title, force_checkpoint):
+        get_conversation_index().upsert(conversation_id, title, datetime.now().isoformat(),
+                                        len(st.session_state.messages))
 
 
 def load_conversation(conversation_id: str):
     """Charge une conversation sauvegardée."""
-    filepath = os.path.join("data/chat_history", f"{conversation_id}.json")
+    data = read_conversation(conversation_id)
     
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+    if data is not None:
         st.session_state.conversation_id = conversation_id
-        st.session_state.messages = data.get('messages', [])
-        st.session_state.chatbot.user_context = data.get('context', {})
+        st.session_state.messages = data['messages']
+        st.session_state.chatbot.set_context(data['context'])
         st.session_state.current_actions = []
+        st.session_state.pending_jobs = []
+        reset_display_state()
+        # Un ancien fichier JSON est converti en journal à la prochaine sauvegarde
+        st.session_state.conversation_writer = ConversationWriter(conversation_id, persisted=data)
 
 
-def get_conversation_history():
-    """Récupère la liste des conversations sauvegardées."""
-    history_dir = "data/chat_history"
-    if not os.path.exists(history_dir):
-        return []
-    
-    conversations = []
-    for filename in os.listdir(history_dir):
-        if filename.endswith('.json'):
-            filepath = os.path.join(history_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                conversations.append({
-                    'id': data['id'],
-                    'title': data.get('title', 'Sans titre'),
-                    'timestamp': data.get('timestamp', ''),
-                    'message_count': len(data.get('messages', []))
-                })
-            except:
-                pass
-    
-    # Trier par date (plus récent en premier)
-    conversations.sort(key=lambda x: x['timestamp'], reverse=True)
-    return conversations
+def get_conversation_history(limit: int = 10, offset: int = 0):
+    """Récupère une page des conversations sauvegardées (plus récentes d'abord), depuis l'index."""
+    return get_conversation_index().page(limit, offset)
+
+
+def get_conversation_stats():
+    """Nombre de conversations et de messages sauvegardés."""
+    return get_conversation_index().stats()
 
 
 def delete_conversation(conversation_id: str):
     """Supprime une conversation."""
-    filepath = os.path.join("data/chat_history", f"{conversation_id}.json")
-    if os.path.exists(filepath):
-        os.remove(filepath)
+    delete_conversation_files(conversation_id)
+    get_conversation_index().remove(conversation_id)
+    if conversation_id == st.session_state.get('conversation_id'):
+        # La conversation affichée sera réécrite en entier si elle continue
+        st.session_state.pop('conversation_writer', None)
 
 
 def new_conversation():
@@ -153,11 +144,36 @@ def new_conversation():
     st.session_state.current_actions = []
     st.session_state.chatbot.clear_context()
     st.session_state.conversation_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    st.session_state.pop('conversation_writer', None)
+    st.session_state.pending_jobs = []
+    reset_display_state()
 
 # ==================== FONCTIONS ====================
 
-def display_data(data: dict):
-    """Affiche les candidats trouvés et les contrats générés."""
+def _has_displayable_data(data: dict) -> bool:
+    """Vrai si les données d'un message contiennent des candidats ou un contrat (voir display_data)."""
+    return bool(data) and bool(data.get('matched_candidates') or data.get('contract_path'))
+
+
+def display_data(data: dict, key: str = "", expanded: bool = True):
+    """
+    Affiche les candidats trouvés et les contrats générés.
+    
+    Args:
+        data: Données du message
+        key: Clé unique du message (widgets et pagination)
+        expanded: Afficher directement; sinon un bouton affiche les détails à la demande
+    """
+    if not _has_displayable_data(data):
+        return
+    candidates = data.get('matched_candidates') or []
+    
+    if not expanded and key not in st.session_state.expanded_data:
+        label = f"👥 Afficher les {len(candidates)} candidats" if candidates else "📄 Afficher le contrat"
+        if st.button(label, key=f"expand_{key}"):
+            st.session_state.expanded_data.add(key)
+            st.rerun()
+        return
     
     # Afficher le bouton de téléchargement du contrat s'il existe
     if 'contract_path' in data and data['contract_path']:
@@ -167,11 +183,9 @@ def display_data(data: dict):
         contract_path = data['contract_path']
         contract_filename = data.get('contract_filename', 'contrat.pdf')
         
-        # Vérifier que le fichier existe
-        if os.path.exists(contract_path):
-            with open(contract_path, 'rb') as pdf_file:
-                pdf_data = pdf_file.read()
-            
+        # Contenu lu une fois puis servi depuis le cache (relu seulement si le fichier change)
+        pdf_data = get_contract_cache().read(contract_path)
+        if pdf_data is not None:
             st.download_button(
                 label="📥 Télécharger le PDF",
                 data=pdf_data,
@@ -187,11 +201,16 @@ def display_data(data: dict):
             st.error(f"❌ Le fichier {contract_path} n'existe pas")
         st.markdown("---")
     
-    if 'matched_candidates' in data and data['matched_candidates']:
+    if candidates:
         st.markdown("---")
         st.markdown("### 👥 Candidats trouvés")
         
-        for i, candidate in enumerate(data['matched_candidates'], 1):
+        # Une page de cartes par rerun
+        num_pages = (len(candidates) + CANDIDATES_PER_PAGE - 1) // CANDIDATES_PER_PAGE
+        page = min(st.session_state.candidate_pages.get(key, 0), num_pages - 1)
+        first = page * CANDIDATES_PER_PAGE
+        
+        for i, candidate in enumerate(candidates[first:first + CANDIDATES_PER_PAGE], first + 1):
             # Afficher chaque candidat dans une card
             st.markdown(f"""
             <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
@@ -233,26 +252,77 @@ def display_data(data: dict):
                 st.info(f"💡 **Pourquoi ce candidat:** {candidate['match_reason']}")
             
             st.markdown("---")
+        
+        if num_pages > 1:
+            col_prev, col_info, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("◀ Précédents", key=f"cand_prev_{key}", disabled=page == 0):
+                    st.session_state.candidate_pages[key] = page - 1
+                    st.rerun()
+            with col_info:
+                last = min(first + CANDIDATES_PER_PAGE, len(candidates))
+                st.caption(f"Candidats {first + 1}–{last} sur {len(candidates)} (page {page + 1}/{num_pages})")
+            with col_next:
+                if st.button("Suivants ▶", key=f"cand_next_{key}", disabled=page == num_pages - 1):
+                    st.session_state.candidate_pages[key] = page + 1
+                    st.rerun()
 
 
-def handle_action(action: str):
-    """Gère les clics sur les boutons."""
-    result = st.session_state.chatbot.execute_action(action)
+def add_bot_result(result: dict):
+    """Ajoute la réponse d'une action aux messages ; une action longue est suivie jusqu'à son résultat."""
+    data = dict(result.get('data') or {})
+    job_id = data.pop('job_id', None)
     
     bot_message = {
         "role": "assistant",
         "content": result.get('message', 'Action exécutée'),
-        "data": result.get('data', {})  # ✅ AJOUT: Inclure les données (candidats)
+        "data": data  # ✅ AJOUT: Inclure les données (candidats)
     }
     
     st.session_state.messages.append(bot_message)
     st.session_state.current_actions = result.get('actions', [])
+    if job_id:
+        st.session_state.pending_jobs.append((job_id, st.session_state.conversation_id))
+
+
+def poll_pending_jobs():
+    """Ajoute aux messages le résultat des travaux terminés et retourne l'état de ceux en cours."""
+    running = []
+    for pending in list(st.session_state.pending_jobs):
+        job_id, conversation_id = pending
+        if conversation_id != st.session_state.conversation_id:
+            # Travail lancé dans une autre conversation: son résultat n'a plus lieu d'être affiché
+            st.session_state.pending_jobs.remove(pending)
+            continue
+        state = st.session_state.chatbot.poll_job(job_id)
+        if state['finished']:
+            st.session_state.pending_jobs.remove(pending)
+            add_bot_result(state['result'])
+        else:
+            running.append(state)
+    return running
+
+
+def handle_action(action: str):
+    """Gère les clics sur les boutons (recherche et synchro s'exécutent en arrière-plan)."""
+    result = st.session_state.chatbot.execute_action(action, background=True)
+    add_bot_result(result)
     
     st.rerun()
 
 
 # ==================== INITIALISATION ====================
 
+@st.cache_resource
+def load_shared_resources():
+    """Ressources partagées par toutes les sessions (préchauffées une fois par processus)."""
+    resources = get_shared_resources()
+    resources.warm_up()
+    return resources
+
+
+load_shared_resources()
+
 if 'chatbot' not in st.session_state:
     st.session_state.chatbot = ChatbotEngine()
 
@@ -265,24 +335,30 @@ if 'current_actions' not in st.session_state:
 if 'conversation_id' not in st.session_state:
     st.session_state.conversation_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+if 'visible_messages' not in st.session_state:
+    reset_display_state()
+
+if 'pending_jobs' not in st.session_state:
+    st.session_state.pending_jobs = []
+
 # ==================== SIDEBAR - HISTORIQUE ====================
 
 with st.sidebar:
     st.markdown("### 📜 Historique des conversations")
     
     if st.button("➕ Nouvelle conversation", use_container_width=True, type="primary"):
-        save_conversation()  # Sauvegarder l'actuelle avant
+        save_conversation(force_checkpoint=True)  # Sauvegarder l'actuelle avant
         new_conversation()
         st.rerun()
     
     st.markdown("---")
     
     # Afficher l'historique
-    conversations = get_conversation_history()
+    conversations = get_conversation_history(limit=10)
     
     if conversations:
         st.markdown("**Conversations récentes:**")
-        for conv in conversations[:10]:  # Limiter à 10
+        for conv in conversations:
             col1, col2 = st.columns([4, 1])
             
             with col1:
@@ -296,7 +372,7 @@ with st.sidebar:
                     help=f"{date_str} - {conv['message_count']} messages",
                     use_container_width=True
                 ):
-                    save_conversation()  # Sauvegarder avant de charger
+                    save_conversation(force_checkpoint=True)  # Sauvegarder avant de charger
                     load_conversation(conv['id'])
                     st.rerun()
             
@@ -309,8 +385,7 @@ with st.sidebar:
         st.markdown("---")
         
         # Statistiques
-        total_convs = len(conversations)
-        total_msgs = sum(c['message_count'] for c in conversations)
+        total_convs, total_msgs = get_conversation_stats()
         st.markdown(f"📊 **Stats:** {total_convs} conv. | {total_msgs} messages")
     else:
         st.info("Aucune conversation sauvegardée")
@@ -329,14 +404,35 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Afficher les messages
-for message in st.session_state.messages:
+# Résultats des travaux en arrière-plan terminés depuis le dernier rerun
+running_jobs = poll_pending_jobs()
+
+# Afficher les messages (seulement les plus récents, les anciens à la demande)
+messages = st.session_state.messages
+start = max(0, len(messages) - st.session_state.visible_messages)
+if start:
+    if st.button(f"⬆️ Afficher les messages précédents ({start} masqués)", key="show_older_messages",
+                 use_container_width=True):
+        st.session_state.visible_messages += MESSAGES_WINDOW
+        st.rerun()
+
+# Seules les données du dernier message qui en a sont dépliées d'office
+last_with_data = next(
+    (i for i in range(len(messages) - 1, start - 1, -1) if _has_displayable_data(messages[i].get("data"))), None
+)
+
+for idx in range(start, len(messages)):
+    message = messages[idx]
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
         
         # Afficher les données (candidats) si présentes
         if "data" in message and message["data"]:
-            display_data(message["data"])
+            display_data(message["data"], key=str(idx), expanded=idx == last_with_data)
+
+# Progression des travaux en cours
+for job in running_jobs:
+    st.progress(job['progress'], text=job['progress_message'] or "⏳ Traitement en cours...")
 
 # Boutons d'action
 if st.session_state.current_actions:
@@ -363,23 +459,24 @@ if user_input:
         "content": user_input
     })
     
-    # Traiter avec chatbot
-    response = st.session_state.chatbot.process_message(user_input)
+    with st.chat_message("user"):
+        st.markdown(user_input)
+    
+    # Traiter avec chatbot (la réponse arrive en flux)
+    response = st.session_state.chatbot.process_message_stream(user_input)
     
     # Si l'intent est "search_candidates", lancer la recherche automatiquement
+    # (la réponse d'Ollama n'est alors pas générée)
     if response.get('intent') == 'search_candidates':
-        search_result = st.session_state.chatbot.execute_action('execute_search')
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": search_result.get('message', ''),
-            "data": search_result.get('data', {})
-        })
-        st.session_state.current_actions = search_result.get('actions', [])
+        search_result = st.session_state.chatbot.execute_action('execute_search', background=True)
+        add_bot_result(search_result)
     else:
-        # Ajouter réponse du bot
+        # Afficher la réponse au fil des fragments, puis l'ajouter aux messages
+        with st.chat_message("assistant"):
+            response_text = st.write_stream(response['response_stream'])
         st.session_state.messages.append({
             "role": "assistant",
-            "content": response.get('response', ''),
+            "content": str(response_text).strip(),
             "data": response.get('data', {})
         })
         # Mettre à jour les actions
@@ -390,13 +487,14 @@ if user_input:
     
     st.rerun()
 
-# Sauvegarder périodiquement
-if st.session_state.messages:
-    save_conversation()
-
-# Sauvegarder périodiquement
+# Sauvegarder périodiquement (ne réécrit rien si la conversation n'a pas changé)
 if st.session_state.messages:
     save_conversation()
 
 st.markdown("---")
 st.markdown("<p style='text-align: center; color: #666;'>🤖 SMART-HIRE v2.0</p>", unsafe_allow_html=True)
+
+# Suivre les travaux en cours: nouveau rerun jusqu'à leur résultat
+if running_jobs:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
@@ -5,24 +5,134 @@ Gestion des intentions, actions et contexte pour l'assistant.
 
 import json
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 from datetime import datetime, timedelta
 import requests
 from linkedin_auto_post import generate_linkedin_post_content
+from candidate_model import to_jsonable
+from candidate_repository import get_candidate_repository
+from candidate_store import get_candidate_store
+from job_runner import FAILED, get_job_runner, report_progress
+from search_history import get_search_history
+from shared_resources import OLLAMA_BASE_URL, get_shared_resources
 
-# Import LinkedIn OAuth avec gestion d'erreur
-_linkedin_oauth = None
-try:
-    from linkedin_oauth import linkedin_oauth as _imported_oauth
-    _linkedin_oauth = _imported_oauth
-except Exception as e:  # pragma: no cover
-    print(f"⚠️ Erreur import linkedin_oauth: {e}")
-    _linkedin_oauth = None
-
+# Actions longues exécutables en arrière-plan (execute_action(..., background=True))
+BACKGROUND_ACTIONS = {"execute_search", "sync_now"}
 
 def get_linkedin_oauth():
     """Retourne l'instance LinkedIn OAuth (ou None si indisponible)."""
-    return _linkedin_oauth
+    return get_shared_resources().linkedin_oauth
+
+
+def run_search(job_desc: str, num_candidates: int) -> Tuple[Dict, Dict]:
+    """
+    Recherche des candidats pour une offre, sans lire ni modifier le contexte d'un
+    chatbot : exécutable dans un travail en arrière-plan.
+
+    Args:
+        job_desc: Description du poste
+        num_candidates: Nombre de candidats souhaités
+
+    Returns:
+        (résultat au format d'execute_action, clés à mettre à jour dans le contexte)
+    """
+    result = {"success": True, "message": "", "actions": [], "data": {}}
+    context_updates: Dict = {}
+    from matching import MATCHING_ENGINE, smart_match_candidates
+    try:
+        # Le moteur "snapshot" lit l'instantané de la base: inutile de charger tous les candidats
+        cv_data = [] if MATCHING_ENGINE == "snapshot" else get_candidate_repository().candidates()
+        report_progress(0.1, "🔍 Recherche des meilleurs profils...")
+        smart = smart_match_candidates(job_desc, cv_data, num_candidates)
+        matched = smart.get('candidates', [])
+        report_progress(0.9, "💾 Enregistrement de la recherche...")
+        try:
+            get_search_history().record(job_desc, num_candidates, matched)
+        except OSError as e:
+            print(f"⚠️ Historique des recherches non enregistré: {e}")
+        if smart.get('has_results'):
+            context_updates["matched_candidates"] = matched
+            result["message"] = f"✅ Excellent ! J'ai trouvé {len(matched)} candidat(s) correspondant à votre recherche !"
+            result["data"] = {"matched_candidates": matched}
+            result["actions"] = [
+                {"label": "📧 Inviter aux entretiens", "action": "send_invitations", "style": "primary"},
+                {"label": "⭐ Ajouter aux favoris", "action": "add_favorite", "style": "secondary"},
+                {"label": "📄 Voir les détails", "action": "view_details", "style": "secondary"},
+            ]
+        else:
+            context_updates["pending_linkedin_post"] = job_desc
+            context_updates["job_title"] = job_desc[:50]
+            reason = smart.get('reason', "Aucun profil correspondant.")
+            result["message"] = (
+                "😔 Aucun candidat ne correspond actuellement.\n\n"
+                f"Motif: {reason}\n\n"
+                "**Solution:** Publier l'offre sur LinkedIn pour attirer des candidats !"
+            )
+            result["actions"] = [
+                {"label": "🔗 Publier sur LinkedIn", "action": "publish_linkedin_job", "style": "primary"},
+                {"label": "✏️ Personnaliser le post", "action": "customize_linkedin_post", "style": "secondary"},
+                {"label": "⏭️ Essayer une autre recherche", "action": "new_search", "style": "secondary"},
+            ]
+    except Exception as e:
+        result["success"] = False
+        result["message"] = f"❌ Erreur lors de la recherche: {e}"
+    return result, context_updates
+
+
+def run_email_sync() -> Dict:
+    """Synchronise les CVs reçus par email (résultat au format d'execute_action)."""
+    result = {"success": True, "message": "", "actions": [], "data": {}}
+    try:
+        import os
+        from sync_emails import sync_emails_with_database
+        email_address = os.getenv("SENDER_EMAIL") or os.getenv("SMTP_SENDER")
+        app_password = os.getenv("SENDER_PASSWORD") or os.getenv("SMTP_PASSWORD")
+        imap_server = os.getenv("IMAP_SERVER", "imap.gmail.com")
+        if not email_address or not app_password:
+            try:
+                from smtp_config import SMTP_CONFIG
+                email_address = email_address or SMTP_CONFIG.get("sender_email")
+                app_password = app_password or SMTP_CONFIG.get("sender_password")
+            except Exception:
+                pass
+        if not email_address or not app_password:
+            result["message"] = "❌ Credentials email manquants. Configurez SENDER_EMAIL et SENDER_PASSWORD."
+            result["actions"] = [{"label": "❌ Fermer", "action": "acknowledge", "style": "secondary"}]
+            return result
+        summary = sync_emails_with_database(email_address, app_password, imap_server)
+        msg = [
+            "📥 **Synchronisation terminée**",
+            f"- Connexion: {'✅' if summary.get('connected') else '❌'}",
+            f"- Emails trouvés: {summary.get('emails_found', 0)}",
+            f"- CVs traités: {summary.get('cvs_processed', 0)}",
+            f"- Candidats ajoutés: {summary.get('cvs_added', 0)}",
+        ]
+        added = summary.get("candidates_added") or []
+        if added:
+            noms = ", ".join([f"{c.get('prenom','')} {c.get('nom','')}" for c in added[:5]])
+            msg.append(f"- Nouveaux: {noms}")
+            if len(added) > 5:
+                msg.append(f"- (+{len(added)-5} autres)")
+        errs = summary.get("errors") or []
+        if errs:
+            msg.append(f"⚠️ Erreurs: {len(errs)} (voir log console)")
+        result["message"] = "\n".join(msg)
+        result["actions"] = [
+            {"label": "✅ OK", "action": "acknowledge", "style": "primary"},
+            {"label": "🔍 Nouvelle recherche", "action": "new_search", "style": "secondary"},
+        ]
+    except Exception as e:
+        result["message"] = f"❌ Erreur synchronisation: {e}"
+        result["actions"] = [{"label": "❌ Fermer", "action": "acknowledge", "style": "secondary"}]
+
+    return result
+
+
+def _run_background_action(action: str, params: Dict) -> Tuple[Dict, Dict]:
+    """Corps d'un travail en arrière-plan : (résultat, clés à mettre à jour dans le contexte)."""
+    if action == "execute_search":
+        return run_search(params["job_description"], params["num_candidates"])
+    return run_email_sync(), {}
 
 
 class ChatbotEngine:
@@ -32,6 +142,8 @@ class ChatbotEngine:
         self.conversation_history: List[Dict] = []
         self.user_context: Dict = {}
         self.pending_action: Optional[str] = None
+        # Travaux soumis depuis que le contexte actuel est en place (dont poll_job applique le résultat)
+        self._context_jobs: set = set()
 
     # ==================== INTENT DETECTION ====================
     def detect_intent(self, message: str) -> Tuple[str, float]:
@@ -76,33 +188,68 @@ class ChatbotEngine:
         return params
 
     # ==================== RESPONSE GENERATION ====================
-    def generate_response_with_ollama(self, user_message: str, context: Dict) -> str:
-        """Appel Ollama pour une réponse courte, fallback si indisponible."""
-        OLLAMA_API_URL = "http://localhost:11434/api/generate"
+    def stream_response_with_ollama(self, user_message: str, context: Dict) -> Iterator[str]:
+        """
+        Appel Ollama en streaming : produit les fragments de la réponse dès leur arrivée.
+        Si Ollama est indisponible avant le premier fragment, produit la réponse de secours.
+
+        Args:
+            user_message: Message de l'utilisateur
+            context: Contexte actuel
+
+        Yields:
+            Fragments de texte de la réponse
+        """
+        OLLAMA_API_URL = f"{OLLAMA_BASE_URL}/api/generate"
+        resources = get_shared_resources()
         system_context = (
             "Tu es SMART-HIRE, un assistant IA de recrutement friendly et professionnel.\n"
             "Tu aides sur : recherche candidats, invitations, contrats, sync emails, LinkedIn.\n"
-            f"Contexte actuel: {json.dumps(context, ensure_ascii=False)}\n"
+            f"Contexte actuel: {json.dumps(context, ensure_ascii=False, default=to_jsonable)}\n"
             "Réponds en 2-3 phrases max, ton clair et amical."
         )
         prompt = f"{system_context}\n\nUtilisateur: {user_message}\n\nAssistant:"
-        try:
-            response = requests.post(
-                OLLAMA_API_URL,
-                json={
-                    "model": "gemma:2b",
-                    "prompt": prompt,
-                    "stream": False,
-                    "temperature": 0.7,
-                    "num_predict": 150,
-                },
-                timeout=10,
-            )
-            if response.status_code == 200:
-                return response.json().get("response", "").strip()
-        except Exception:
-            pass
-        return self.generate_fallback_response(user_message, context)
+        started = False
+        if resources.ollama_available():
+            try:
+                with resources.http.post(
+                    OLLAMA_API_URL,
+                    json={
+                        "model": "gemma:2b",
+                        "prompt": prompt,
+                        "stream": True,
+                        "temperature": 0.7,
+                        "num_predict": 150,
+                    },
+                    timeout=10,
+                    stream=True,
+                ) as response:
+                    if response.status_code == 200:
+                        # Une ligne JSON par fragment: {"response": "...", "done": false}
+                        for line in response.iter_lines(chunk_size=None):
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            token = chunk.get("response", "")
+                            if token:
+                                if not started:
+                                    token = token.lstrip()
+                                if token:
+                                    started = True
+                                    yield token
+                            if chunk.get("done"):
+                                break
+            except requests.exceptions.ConnectionError:
+                if not started:
+                    resources.record_ollama(False)
+            except Exception:
+                pass
+        if not started:
+            yield self.generate_fallback_response(user_message, context)
+
+    def generate_response_with_ollama(self, user_message: str, context: Dict) -> str:
+        """Appel Ollama pour une réponse courte, fallback si indisponible."""
+        return "".join(self.stream_response_with_ollama(user_message, context)).strip()
 
     def generate_fallback_response(self, user_message: str, context: Dict) -> str:
         intent, _ = self.detect_intent(user_message)
@@ -122,6 +269,22 @@ class ChatbotEngine:
 
     # ==================== CHAT PIPELINE ====================
     def process_message(self, user_message: str) -> Dict:
+        result = self.process_message_stream(user_message)
+        result["response"] = "".join(result.pop("response_stream")).strip()
+        return result
+
+    def process_message_stream(self, user_message: str) -> Dict:
+        """
+        Comme process_message, mais la réponse n'est pas attendue : result["response_stream"]
+        produit ses fragments au fil de la génération (l'UI les affiche dès le premier).
+        La réponse complète est ajoutée à l'historique une fois le flux consommé.
+
+        Args:
+            user_message: Message de l'utilisateur
+
+        Returns:
+            Dict intent, confidence, actions, data, timestamp et response_stream
+        """
         self.conversation_history.append({
             "role": "user",
             "message": user_message,
@@ -130,7 +293,9 @@ class ChatbotEngine:
 
         # Vérifier si on attend un nom de candidat
         if self.user_context.get("awaiting_candidate_name"):
-            return self._handle_candidate_name_input(user_message)
+            result = self._handle_candidate_name_input(user_message)
+            result["response_stream"] = iter([result.pop("response", "")])
+            return result
 
         intent, confidence = self.detect_intent(user_message)
         params = self.extract_parameters(user_message, intent)
@@ -142,7 +307,7 @@ class ChatbotEngine:
             action_result = self.execute_action("start_contract_generation", params)
             # Enrichir le résultat pour qu'il ait la même structure que process_message
             result = {
-                "response": action_result.get("message", ""),
+                "response_stream": iter([action_result.get("message", "")]),
                 "intent": intent,
                 "confidence": confidence,
                 "actions": action_result.get("actions", []),
@@ -156,12 +321,11 @@ class ChatbotEngine:
             })
             return result
 
-        response_text = self.generate_response_with_ollama(user_message, self.user_context)
         actions = self.get_suggested_actions(intent, params)
         data = self.get_relevant_data(intent, params)
 
-        result = {
-            "response": response_text,
+        return {
+            "response_stream": self._stream_reply(user_message, dict(self.user_context)),
             "intent": intent,
             "confidence": confidence,
             "actions": actions,
@@ -169,18 +333,24 @@ class ChatbotEngine:
             "timestamp": datetime.now().isoformat(),
         }
 
+    def _stream_reply(self, user_message: str, context: Dict) -> Iterator[str]:
+        """Relaie les fragments d'Ollama puis enregistre la réponse complète dans l'historique."""
+        parts = []
+        for token in self.stream_response_with_ollama(user_message, context):
+            parts.append(token)
+            yield token
         self.conversation_history.append({
             "role": "assistant",
-            "message": response_text,
+            "message": "".join(parts).strip(),
             "timestamp": datetime.now().isoformat(),
         })
-        return result
 
     # ==================== UI HELPERS ====================
     def get_suggested_actions(self, intent: str, params: Dict) -> List[Dict]:
         if intent in ("greeting", "help"):
             return [
                 {"label": "🔍 Rechercher des candidats", "action": "search_candidates", "style": "primary"},
+                {"label": "🔁 Relancer la dernière recherche", "action": "rerun_last_search", "style": "secondary"},
                 {"label": "📊 Voir le dashboard", "action": "view_stats", "style": "secondary"},
                 {"label": "📥 Synchroniser les emails", "action": "sync_emails", "style": "secondary"},
                 {"label": "🔗 Publier sur LinkedIn", "action": "linkedin_post", "style": "secondary"},
@@ -234,8 +404,7 @@ class ChatbotEngine:
             data["search_params"] = params
         elif intent == "view_stats":
             try:
-                with open("data/cv_data.json", "r", encoding="utf-8") as f:
-                    candidates = json.load(f)
+                candidates = get_candidate_repository().candidates()
                 data["total_candidates"] = len(candidates)
                 data["candidates"] = candidates[:5]
             except Exception:
@@ -243,47 +412,31 @@ class ChatbotEngine:
         return data
 
     # ==================== ACTIONS ====================
-    def execute_action(self, action: str, params: Dict = None) -> Dict:
+    def execute_action(self, action: str, params: Dict = None, background: bool = False) -> Dict:
+        """
+        Exécute une action du chatbot.
+
+        Args:
+            action: Nom de l'action
+            params: Paramètres de l'action
+            background: Soumettre les actions longues (BACKGROUND_ACTIONS) au pool de travaux ;
+                le résultat retourné contient alors data["job_id"], à suivre avec poll_job
+
+        Returns:
+            Dict success, message, actions, data
+        """
         if params is None:
             params = {}
+        if background and action in BACKGROUND_ACTIONS:
+            return self._submit_action(action, params)
         result = {"success": True, "message": "", "actions": [], "data": {}}
 
         # -------- Recherche de candidats --------
         if action == "execute_search":
-            from matching import smart_match_candidates
-            try:
-                with open("data/cv_data.json", "r", encoding="utf-8") as f:
-                    cv_data = json.load(f)
-                job_desc = params.get("job_description", self.user_context.get("job_description", ""))
-                num_candidates = params.get("num_candidates", self.user_context.get("num_candidates", 4))
-                smart = smart_match_candidates(job_desc, cv_data, num_candidates)
-                matched = smart.get('candidates', [])
-                if smart.get('has_results'):
-                    self.user_context["matched_candidates"] = matched
-                    result["message"] = f"✅ Excellent ! J'ai trouvé {len(matched)} candidat(s) correspondant à votre recherche !"
-                    result["data"] = {"matched_candidates": matched}
-                    result["actions"] = [
-                        {"label": "📧 Inviter aux entretiens", "action": "send_invitations", "style": "primary"},
-                        {"label": "⭐ Ajouter aux favoris", "action": "add_favorite", "style": "secondary"},
-                        {"label": "📄 Voir les détails", "action": "view_details", "style": "secondary"},
-                    ]
-                else:
-                    self.user_context["pending_linkedin_post"] = job_desc
-                    self.user_context["job_title"] = job_desc[:50]
-                    reason = smart.get('reason', "Aucun profil correspondant.")
-                    result["message"] = (
-                        "😔 Aucun candidat ne correspond actuellement.\n\n"
-                        f"Motif: {reason}\n\n"
-                        "**Solution:** Publier l'offre sur LinkedIn pour attirer des candidats !"
-                    )
-                    result["actions"] = [
-                        {"label": "🔗 Publier sur LinkedIn", "action": "publish_linkedin_job", "style": "primary"},
-                        {"label": "✏️ Personnaliser le post", "action": "customize_linkedin_post", "style": "secondary"},
-                        {"label": "⏭️ Essayer une autre recherche", "action": "new_search", "style": "secondary"},
-                    ]
-            except Exception as e:
-                result["success"] = False
-                result["message"] = f"❌ Erreur lors de la recherche: {e}"
+            job_desc = params.get("job_description", self.user_context.get("job_description", ""))
+            num_candidates = params.get("num_candidates", self.user_context.get("num_candidates", 4))
+            result, context_updates = run_search(job_desc, num_candidates)
+            self.user_context.update(context_updates)
 
         # -------- Inviter aux entretiens (sélection multiple) --------
         elif action == "send_invitations":
@@ -510,48 +663,7 @@ class ChatbotEngine:
 
         # -------- Sync emails --------
         elif action == "sync_now":
-            try:
-                import os
-                from sync_emails import sync_emails_with_database
-                email_address = os.getenv("SENDER_EMAIL") or os.getenv("SMTP_SENDER")
-                app_password = os.getenv("SENDER_PASSWORD") or os.getenv("SMTP_PASSWORD")
-                imap_server = os.getenv("IMAP_SERVER", "imap.gmail.com")
-                if not email_address or not app_password:
-                    try:
-                        from smtp_config import SMTP_CONFIG
-                        email_address = email_address or SMTP_CONFIG.get("sender_email")
-                        app_password = app_password or SMTP_CONFIG.get("sender_password")
-                    except Exception:
-                        pass
-                if not email_address or not app_password:
-                    result["message"] = "❌ Credentials email manquants. Configurez SENDER_EMAIL et SENDER_PASSWORD."
-                    result["actions"] = [{"label": "❌ Fermer", "action": "acknowledge", "style": "secondary"}]
-                    return result
-                summary = sync_emails_with_database(email_address, app_password, imap_server)
-                msg = [
-                    "📥 **Synchronisation terminée**",
-                    f"- Connexion: {'✅' if summary.get('connected') else '❌'}",
-                    f"- Emails trouvés: {summary.get('emails_found', 0)}",
-                    f"- CVs traités: {summary.get('cvs_processed', 0)}",
-                    f"- Candidats ajoutés: {summary.get('cvs_added', 0)}",
-                ]
-                added = summary.get("candidates_added") or []
-                if added:
-                    noms = ", ".join([f"{c.get('prenom','')} {c.get('nom','')}" for c in added[:5]])
-                    msg.append(f"- Nouveaux: {noms}")
-                    if len(added) > 5:
-                        msg.append(f"- (+{len(added)-5} autres)")
-                errs = summary.get("errors") or []
-                if errs:
-                    msg.append(f"⚠️ Erreurs: {len(errs)} (voir log console)")
-                result["message"] = "\n".join(msg)
-                result["actions"] = [
-                    {"label": "✅ OK", "action": "acknowledge", "style": "primary"},
-                    {"label": "🔍 Nouvelle recherche", "action": "new_search", "style": "secondary"},
-                ]
-            except Exception as e:
-                result["message"] = f"❌ Erreur synchronisation: {e}"
-                result["actions"] = [{"label": "❌ Fermer", "action": "acknowledge", "style": "secondary"}]
+            result = run_email_sync()
 
         # -------- LinkedIn publication --------
         elif action == "publish_linkedin_job":
@@ -605,6 +717,22 @@ class ChatbotEngine:
                 "Quel profil cherchez-vous ?\n"
                 "Exemples : '3 développeurs Python', '2 Data Scientists seniors'"
             )
+            result["actions"] = [
+                {"label": "🔍 Lancer une recherche", "action": "search_candidates", "style": "primary"},
+                {"label": "🔁 Relancer la dernière recherche", "action": "rerun_last_search", "style": "secondary"},
+            ]
+
+        elif action == "rerun_last_search":
+            # Seule la dernière ligne du journal est lue (voir search_history.py)
+            last = get_search_history().last()
+            if last and last.get('description', '').strip():
+                self.user_context["job_description"] = last['description']
+                self.user_context["num_candidates"] = last.get('num_candidates_requested') or 4
+                return self.execute_action("execute_search", {
+                    "job_description": last['description'],
+                    "num_candidates": self.user_context["num_candidates"],
+                }, background=background)
+            result["message"] = "ℹ️ Aucune recherche précédente à relancer."
             result["actions"] = [{"label": "🔍 Lancer une recherche", "action": "search_candidates", "style": "primary"}]
 
         elif action == "linkedin_oauth_login":
@@ -950,23 +1078,8 @@ class ChatbotEngine:
         }
         
         try:
-            # Charger les candidats de la base
-            with open("data/cv_data.json", "r", encoding="utf-8") as f:
-                cv_data = json.load(f)
-            
-            # Rechercher le candidat par nom
-            name_parts = user_message.strip().split()
-            found_candidates = []
-            
-            for candidate in cv_data:
-                nom = candidate.get("nom", "").lower()
-                prenom = candidate.get("prenom", "").lower()
-                full_name = f"{nom} {prenom}".lower()
-                search_name = user_message.lower()
-                
-                # Vérifier si le nom correspond
-                if search_name in full_name or all(part.lower() in full_name for part in name_parts):
-                    found_candidates.append(candidate)
+            # Rechercher le candidat par nom (index de la base)
+            found_candidates = get_candidate_store().find_by_name(user_message)
             
             if len(found_candidates) == 1:
                 # Un seul candidat trouvé
@@ -1051,12 +1164,69 @@ class ChatbotEngine:
             {"label": "❌ Annuler", "action": "send_invitations", "style": "secondary"},
         ]
 
+    # ==================== TRAVAUX EN ARRIÈRE-PLAN ====================
+    def _submit_action(self, action: str, params: Dict) -> Dict:
+        """Soumet une action longue au pool de travaux et retourne aussitôt un accusé de réception."""
+        params = dict(params)
+        if action == "execute_search":
+            # Paramètres figés à la soumission (le contexte peut changer pendant la recherche)
+            params.setdefault("job_description", self.user_context.get("job_description", ""))
+            params.setdefault("num_candidates", self.user_context.get("num_candidates", 4))
+        # Le travail ne touche pas au chatbot: le contexte est mis à jour par poll_job
+        job_id = get_job_runner().submit(action, _run_background_action, action, params)
+        self._context_jobs.add(job_id)
+        messages = {
+            "execute_search": "⏳ Recherche des candidats lancée, je vous affiche les résultats dès qu'ils sont prêts.",
+            "sync_now": "⏳ Synchronisation des emails lancée, je vous préviens dès qu'elle est terminée.",
+        }
+        return {"success": True, "message": messages[action], "actions": [], "data": {"job_id": job_id}}
+
+    def poll_job(self, job_id: str) -> Dict:
+        """
+        État d'un travail soumis par execute_action(..., background=True).
+
+        Args:
+            job_id: Id du travail
+
+        Une fois le travail terminé, le premier appel applique au contexte les
+        changements de la recherche, sauf si le contexte a été remplacé depuis la
+        soumission (clear_context, set_context). À appeler depuis le thread qui
+        utilise le chatbot.
+
+        Returns:
+            Dict status, finished, progress, progress_message et, une fois terminé,
+            result (même format qu'execute_action)
+        """
+        job = get_job_runner().get(job_id)
+        if job is None:
+            return {
+                "job_id": job_id, "status": "unknown", "finished": True, "progress": 0.0, "progress_message": "",
+                "result": {"success": False, "message": "❌ Travail introuvable (expiré ou interrompu).",
+                           "actions": [], "data": {}},
+            }
+        state = job.to_dict()
+        if state["status"] == FAILED:
+            state["result"] = {"success": False, "message": f"❌ Erreur pendant l'exécution: {job.error}",
+                               "actions": [], "data": {}}
+        elif state["finished"]:
+            state["result"], context_updates = job.result
+            if job_id in self._context_jobs:
+                self.user_context.update(context_updates)
+        if state["finished"]:
+            self._context_jobs.discard(job_id)
+        return state
+
     def get_conversation_history(self) -> List[Dict]:
         return self.conversation_history
 
     def clear_context(self):
-        self.user_context = {}
+        self.set_context({})
+
+    def set_context(self, context: Dict) -> None:
+        """Remplace le contexte (conversation rechargée) ; les travaux en cours ne le modifieront pas."""
+        self.user_context = context
         self.pending_action = None
+        self._context_jobs = set()
 
 
 # Instance globale du chatbot
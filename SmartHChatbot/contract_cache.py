@@ -0,0 +1,90 @@
+"""
+Cache mémoire des contrats PDF proposés au téléchargement (chatbot_app).
+Le contenu d'un contrat est lu une fois puis servi depuis la mémoire tant que le
+fichier ne change pas (même taille et même date de modification).
+La mémoire occupée est bornée : les contrats les moins récemment affichés sont
+retirés au-delà de CONTRACT_CACHE_MAX_BYTES.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+# Taille maximale du contenu gardé en mémoire (octets)
+CONTRACT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ContractCache:
+    """Cache LRU du contenu des fichiers, borné en octets."""
+
+    def __init__(self, max_bytes: int = CONTRACT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # chemin absolu -> ((mtime_ns, taille), contenu), du moins au plus récemment utilisé
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def read(self, path: str) -> Optional[bytes]:
+        """
+        Contenu du fichier, relu sur disque seulement s'il a changé.
+
+        Args:
+            path: Chemin du contrat
+
+        Returns:
+            Contenu du fichier, ou None s'il n'existe pas
+        """
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            self._discard(key)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        try:
+            with open(key, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._discard(key)
+            return None
+
+        with self._lock:
+            self._discard_locked(key)
+            if len(data) <= self.max_bytes:
+                self._entries[key] = (signature, data)
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._discard_locked(key)
+
+    def _discard_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+_contract_cache = ContractCache()
+
+
+def get_contract_cache() -> ContractCache:
+    """Retourne le cache de contrats partagé du processus."""
+    return _contract_cache
@@ -0,0 +1,138 @@
+"""
+Index des conversations sauvegardées (barre latérale de chatbot_app).
+Titre, date et nombre de messages de chaque conversation sont tenus à jour à
+chaque sauvegarde/suppression : la barre latérale lit une page de l'index
+au lieu d'ouvrir et de décoder tous les fichiers de data/chat_history.
+Les conversations existantes sont indexées une seule fois (migration).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from conversation_log import CHAT_HISTORY_DIR, list_conversation_ids, read_conversation
+
+
+CONVERSATION_INDEX_FILE = os.path.join(CHAT_HISTORY_DIR, 'index.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ConversationIndex:
+    """Index SQLite des conversations (une connexion par opération, comme CandidateStore)."""
+
+    def __init__(self, path: str = CONVERSATION_INDEX_FILE, history_dir: str = CHAT_HISTORY_DIR):
+        self.path = path
+        self.history_dir = history_dir
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self.index_existing()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def index_existing(self) -> int:
+        """
+        Indexe les conversations déjà présentes dans data/chat_history (une seule fois).
+
+        Returns:
+            Nombre de conversations indexées (0 si déjà fait)
+        """
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'indexed_existing'").fetchone():
+                return 0
+            count = 0
+            for conversation_id in list_conversation_ids(self.history_dir):
+                try:
+                    data = read_conversation(conversation_id, self.history_dir)
+                except (OSError, ValueError, AttributeError):
+                    continue
+                self._upsert(conn, data['id'], data['title'], data['timestamp'], len(data['messages']))
+                count += 1
+            conn.execute("INSERT INTO meta (key, value) VALUES ('indexed_existing', '1')")
+        return count
+
+    def upsert(self, conversation_id: str, title: str, timestamp: str, message_count: int) -> None:
+        """Ajoute ou met à jour l'entrée d'une conversation (appelé à chaque sauvegarde)."""
+        with self._connect() as conn:
+            self._upsert(conn, conversation_id, title, timestamp, message_count)
+
+    def _upsert(self, conn: sqlite3.Connection, conversation_id: str, title: str,
+                timestamp: str, message_count: int) -> None:
+        conn.execute(
+            "INSERT INTO conversations (id, title, timestamp, message_count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, timestamp = excluded.timestamp, "
+            "message_count = excluded.message_count",
+            (conversation_id, title, timestamp, message_count),
+        )
+
+    def remove(self, conversation_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+
+    def page(self, limit: int = 10, offset: int = 0) -> List[Dict]:
+        """
+        Conversations les plus récentes d'abord.
+
+        Args:
+            limit: Taille de la page
+            offset: Nombre de conversations à sauter
+
+        Returns:
+            Liste de dicts id, title, timestamp, message_count
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, title, timestamp, message_count FROM conversations "
+                "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [
+            {'id': row[0], 'title': row[1], 'timestamp': row[2], 'message_count': row[3]}
+            for row in rows
+        ]
+
+    def stats(self) -> Tuple[int, int]:
+        """Nombre de conversations et nombre total de messages."""
+        with self._connect() as conn:
+            count, messages = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM conversations"
+            ).fetchone()
+        return count, messages
+
+
+_indexes: Dict[str, ConversationIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_conversation_index(path: str = CONVERSATION_INDEX_FILE) -> ConversationIndex:
+    """Retourne l'index des conversations (construit au premier appel)."""
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ConversationIndex(path)
+            _indexes[key] = index
+        return index
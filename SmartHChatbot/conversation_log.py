@@ -0,0 +1,211 @@
+"""
+Sauvegarde incrémentale des conversations (chatbot_app).
+
+Chaque conversation est un journal append-only data/chat_history/<id>.jsonl
+(une ligne JSON par message) : une sauvegarde n'écrit que les messages ajoutés
+depuis la précédente, et rien du tout si la conversation n'a pas changé.
+Le contexte du chatbot est enregistré à part dans <id>.context.json, au plus
+une fois toutes les CONTEXT_CHECKPOINT_INTERVAL secondes (ou à la demande,
+avant de changer de conversation).
+Les anciennes conversations <id>.json restent lisibles ; elles sont converties
+en journal à leur prochaine sauvegarde.
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+CHAT_HISTORY_DIR = 'data/chat_history'
+
+# Délai minimal entre deux enregistrements du contexte (secondes)
+CONTEXT_CHECKPOINT_INTERVAL = 30
+
+LOG_SUFFIX = '.jsonl'
+CONTEXT_SUFFIX = '.context.json'
+LEGACY_SUFFIX = '.json'
+
+
+def to_serializable(obj: Any) -> Any:
+    """Convertit récursivement en objets JSON-sérialisables (datetime -> isoformat)."""
+    if isinstance(obj, Mapping):
+        return {k: to_serializable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_serializable(v) for v in obj]
+    if isinstance(obj, set):
+        return [to_serializable(v) for v in obj]
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return obj
+
+
+def _paths(conversation_id: str, history_dir: str) -> Dict[str, str]:
+    base = os.path.join(history_dir, conversation_id)
+    return {
+        'log': base + LOG_SUFFIX,
+        'context': base + CONTEXT_SUFFIX,
+        'legacy': base + LEGACY_SUFFIX,
+    }
+
+
+def list_conversation_ids(history_dir: str = CHAT_HISTORY_DIR) -> List[str]:
+    """Ids des conversations présentes sur disque (journaux et anciens fichiers JSON)."""
+    if not os.path.isdir(history_dir):
+        return []
+    ids = set()
+    for filename in os.listdir(history_dir):
+        if filename.endswith(CONTEXT_SUFFIX):
+            continue
+        if filename.endswith(LOG_SUFFIX):
+            ids.add(filename[:-len(LOG_SUFFIX)])
+        elif filename.endswith(LEGACY_SUFFIX):
+            ids.add(filename[:-len(LEGACY_SUFFIX)])
+    return sorted(ids)
+
+
+def read_conversation(conversation_id: str, history_dir: str = CHAT_HISTORY_DIR) -> Optional[Dict]:
+    """
+    Relit une conversation (journal en priorité, sinon ancien fichier JSON).
+
+    Args:
+        conversation_id: Id de la conversation
+        history_dir: Dossier des conversations
+
+    Returns:
+        Dict id, title, timestamp, messages, context et legacy (True pour un
+        ancien fichier JSON), ou None si la conversation n'existe pas
+    """
+    paths = _paths(conversation_id, history_dir)
+    if os.path.exists(paths['log']):
+        messages = []
+        with open(paths['log'], 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # dernière ligne incomplète (arrêt pendant l'écriture)
+                try:
+                    messages.append(json.loads(line))
+                except ValueError:
+                    continue
+        checkpoint = {}
+        if os.path.exists(paths['context']):
+            try:
+                with open(paths['context'], 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Contexte illisible pour la conversation {conversation_id}: {e}")
+        return {
+            'id': conversation_id,
+            'title': checkpoint.get('title', 'Sans titre'),
+            'timestamp': checkpoint.get('timestamp')
+            or datetime.fromtimestamp(os.path.getmtime(paths['log'])).isoformat(),
+            'messages': messages,
+            'context': checkpoint.get('context', {}),
+            'legacy': False,
+        }
+    if os.path.exists(paths['legacy']):
+        with open(paths['legacy'], 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {
+            'id': data.get('id', conversation_id),
+            'title': data.get('title', 'Sans titre'),
+            'timestamp': data.get('timestamp', ''),
+            'messages': data.get('messages', []),
+            'context': data.get('context', {}),
+            'legacy': True,
+        }
+    return None
+
+
+def delete_conversation_files(conversation_id: str, history_dir: str = CHAT_HISTORY_DIR) -> None:
+    """Supprime le journal, le contexte et l'ancien fichier JSON d'une conversation."""
+    for path in _paths(conversation_id, history_dir).values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class ConversationWriter:
+    """Sauvegarde incrémentale d'une conversation (un écrivain par session Streamlit)."""
+
+    def __init__(self, conversation_id: str, history_dir: str = CHAT_HISTORY_DIR,
+                 persisted: Optional[Dict] = None,
+                 checkpoint_interval: float = CONTEXT_CHECKPOINT_INTERVAL):
+        """
+        Args:
+            conversation_id: Id de la conversation
+            history_dir: Dossier des conversations
+            persisted: Conversation relue par read_conversation (journal déjà à jour),
+                None pour une nouvelle conversation ou un ancien fichier JSON à convertir
+            checkpoint_interval: Délai minimal entre deux enregistrements du contexte
+        """
+        self.conversation_id = conversation_id
+        self.history_dir = history_dir
+        self.checkpoint_interval = checkpoint_interval
+        self._paths = _paths(conversation_id, history_dir)
+        self._last_checkpoint: Optional[float] = None
+        self._checkpoint_pending = False
+        self.persisted_messages = 0
+        self._context_json: Optional[str] = None
+        self._title: Optional[str] = None
+        if persisted is not None and not persisted.get('legacy'):
+            self.persisted_messages = len(persisted['messages'])
+            self._context_json = json.dumps(persisted['context'], ensure_ascii=False, sort_keys=True)
+            self._title = persisted['title']
+
+    def save(self, messages: List[Dict], context: Dict, title: str, force_checkpoint: bool = False) -> bool:
+        """
+        Écrit les messages ajoutés depuis la dernière sauvegarde et, si le délai
+        est écoulé (ou force_checkpoint), le contexte s'il a changé.
+
+        Args:
+            messages: Messages de la conversation (liste complète, seule la fin est écrite)
+            context: Contexte du chatbot
+            title: Titre de la conversation
+            force_checkpoint: Enregistrer le contexte sans attendre le délai
+
+        Returns:
+            True si de nouveaux messages ont été écrits
+        """
+        os.makedirs(self.history_dir, exist_ok=True)
+        if len(messages) < self.persisted_messages:
+            # Liste remplacée (conversation réinitialisée): réécriture du journal
+            self.persisted_messages = 0
+
+        new_messages = messages[self.persisted_messages:]
+        if new_messages:
+            # Journal réécrit depuis le début s'il ne contient encore rien de cette session
+            mode = 'a' if self.persisted_messages else 'w'
+            with open(self._paths['log'], mode, encoding='utf-8') as f:
+                for message in new_messages:
+                    f.write(json.dumps(to_serializable(message), ensure_ascii=False) + '\n')
+            self.persisted_messages = len(messages)
+            self._checkpoint_pending = True
+
+        now = time.monotonic()
+        due = (self._last_checkpoint is None
+               or now - self._last_checkpoint >= self.checkpoint_interval)
+        if force_checkpoint or (self._checkpoint_pending and due):
+            self._checkpoint(context, title)
+            self._last_checkpoint = now
+            self._checkpoint_pending = False
+        return bool(new_messages)
+
+    def _checkpoint(self, context: Dict, title: str) -> None:
+        """Enregistre le contexte (remplacement atomique) s'il a changé depuis le dernier point."""
+        context_json = json.dumps(to_serializable(context), ensure_ascii=False, sort_keys=True)
+        if context_json == self._context_json and title == self._title:
+            return
+        checkpoint = {
+            'id': self.conversation_id,
+            'title': title,
+            'timestamp': datetime.now().isoformat(),
+            'context': json.loads(context_json),
+        }
+        tmp_path = self._paths['context'] + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, self._paths['context'])
+        self._context_json = context_json
+        self._title = title
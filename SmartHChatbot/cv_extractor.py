@@ -1,9 +1,14 @@
 import requests
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import io
 import re
 import PyPDF2
+from bm25_index import add_candidate_to_bm25_index
+from candidate_store import get_candidate_store
+from candidate_writer import get_candidate_writer
+from match_cache import invalidate_match_cache
+from shared_resources import OLLAMA_BASE_URL, get_shared_resources
 
 def extract_text_from_pdf(pdf_content: bytes) -> str:
     """
@@ -61,7 +66,7 @@ def extract_cv_data_with_ai(cv_text: str) -> Optional[Dict]:
     if not cv_text or len(cv_text.strip()) < 50:
         return None
     
-    OLLAMA_API_URL = "http://localhost:11434/api/generate"
+    OLLAMA_API_URL = f"{OLLAMA_BASE_URL}/api/generate"
     
     prompt = f"""Tu es un expert en analyse de CV. Analyse le CV suivant et extrais les informations principales au format JSON.
 
@@ -89,9 +94,14 @@ IMPORTANT:
 - Pour les compétences et langues, retourne une liste même si vide
 - Retourne UNIQUEMENT le JSON"""
 
+    resources = get_shared_resources()
+    if not resources.ollama_available():
+        print("            ❌ Ollama non accessible, passage au fallback")
+        return None
+    
     try:
         print(f"            ⏳ Appel Ollama (timeout 30s)...")
-        response = requests.post(
+        response = resources.http.post(
             OLLAMA_API_URL,
             json={
                 "model": "gemma:2b",
@@ -125,6 +135,7 @@ IMPORTANT:
         return None
     except requests.exceptions.ConnectionError:
         print("            ❌ Ollama non accessible, passage au fallback")
+        resources.record_ollama(False)
         return None
     except Exception as e:
         print(f"            ❌ Erreur: {str(e)[:50]}")
@@ -286,7 +297,8 @@ def validate_and_clean_cv_data(cv_data: Dict) -> Dict:
 def candidate_exists(cv_data: Dict) -> bool:
     """
     Vérifie si un CV exactement identique existe déjà dans la base.
-    Compare tous les champs principaux pour détecter les doublons stricts.
+    Compare tous les champs principaux pour détecter les doublons stricts,
+    via leur empreinte dans l'index de dédoublonnage (voir candidate_dedup.py).
     
     Args:
         cv_data: Données du candidat
@@ -294,85 +306,41 @@ def candidate_exists(cv_data: Dict) -> bool:
     Returns:
         True si le CV exact existe déjà, False sinon
     """
-    cv_file = 'data/cv_data.json'
-    
     try:
-        if os.path.exists(cv_file):
-            with open(cv_file, 'r', encoding='utf-8') as f:
-                candidates = json.load(f)
-            
-            # Normaliser les données du nouveau CV
-            new_email = cv_data.get('email', '').strip().lower()
-            new_nom = cv_data.get('nom', '').strip().lower()
-            new_prenom = cv_data.get('prenom', '').strip().lower()
-            new_poste = cv_data.get('poste', '').strip().lower()
-            new_exp = cv_data.get('experience', 0)
-            new_formation = cv_data.get('formation', '').strip().lower()
-            new_competences = sorted([c.strip().lower() for c in cv_data.get('competences', [])])
-            
-            # Comparer avec chaque candidat existant
-            for candidate in candidates:
-                # Normaliser les données du candidat existant
-                cand_email = candidate.get('email', '').strip().lower()
-                cand_nom = candidate.get('nom', '').strip().lower()
-                cand_prenom = candidate.get('prenom', '').strip().lower()
-                cand_poste = candidate.get('poste', '').strip().lower()
-                cand_exp = candidate.get('experience', 0)
-                cand_formation = candidate.get('formation', '').strip().lower()
-                cand_competences = sorted([c.strip().lower() for c in candidate.get('competences', [])])
-                
-                # Vérifier si TOUS les champs principaux sont identiques
-                if (cand_email == new_email and
-                    cand_nom == new_nom and
-                    cand_prenom == new_prenom and
-                    cand_poste == new_poste and
-                    cand_exp == new_exp and
-                    cand_formation == new_formation and
-                    cand_competences == new_competences):
-                    return True  # CV exactement identique trouvé
-        
-        return False
+        return get_candidate_store().has_fingerprint(cv_data)
     
     except Exception as e:
         print(f"Erreur lors de la vérification: {e}")
         return False
 
-def add_candidate_to_database(cv_data: Dict) -> bool:
+def add_candidate_to_database(cv_data: Dict, signature=None) -> bool:
     """
     Ajoute un candidat à la base de données.
     Évite les doublons en vérifiant l'existence préalable.
     
     Args:
         cv_data: Données du candidat
+        signature: Signature MinHash du texte du CV (voir cv_minhash.py), optionnelle
     
     Returns:
         True si succès, False sinon
     """
-    cv_file = 'data/cv_data.json'
-    
     # Vérifier que le candidat n'existe pas déjà
     if candidate_exists(cv_data):
         print(f"⚠️  Candidat déjà présent: {cv_data.get('prenom')} {cv_data.get('nom')}")
         return False
     
     try:
-        # Charger les données existantes
-        if os.path.exists(cv_file):
-            with open(cv_file, 'r', encoding='utf-8') as f:
-                candidates = json.load(f)
-        else:
-            candidates = []
-        
-        # Générer nouvel ID
-        new_id = max((c.get('id', 0) for c in candidates), default=0) + 1
-        cv_data['id'] = new_id
-        
-        # Ajouter le candidat
-        candidates.append(cv_data)
-        
-        # Sauvegarder
-        with open(cv_file, 'w', encoding='utf-8') as f:
-            json.dump(candidates, f, ensure_ascii=False, indent=2)
+        # Insertion seule (nouvel ID = max + 1), regroupée avec les écritures concurrentes.
+        # Index BM25 mis à jour avec ce seul candidat, dans le thread d'écriture
+        # (ordre et versions des ajouts d'un même lot respectés)
+        new_id = get_candidate_writer().add_candidate(
+            cv_data, signature,
+            on_commit=lambda _, before, after: add_candidate_to_bm25_index(cv_data, before, after),
+        )
+
+        # La base a changé : les résultats de matching en cache sont périmés
+        invalidate_match_cache()
         
         print(f"✅ Candidat ajouté: {cv_data.get('prenom')} {cv_data.get('nom')} (ID: {new_id})")
         return True
@@ -381,4 +349,49 @@ def add_candidate_to_database(cv_data: Dict) -> bool:
         print(f"Erreur lors de l'ajout: {e}")
         return False
 
+def add_candidates_to_database(candidates: List[Tuple[Dict, Optional[object]]]) -> List[bool]:
+    """
+    Ajoute plusieurs candidats (import de CVs) en une seule transaction.
+    Même vérification des doublons et mêmes mises à jour que add_candidate_to_database,
+    avec un seul fsync pour tout l'import.
+    
+    Args:
+        candidates: Liste de (données du candidat, signature MinHash ou None)
+    
+    Returns:
+        Pour chaque candidat, dans l'ordre : True si ajouté, False sinon
+    """
+    added = [False] * len(candidates)
+    new_rows = []
+    for row, (cv_data, _) in enumerate(candidates):
+        if candidate_exists(cv_data):
+            print(f"⚠️  Candidat déjà présent: {cv_data.get('prenom')} {cv_data.get('nom')}")
+        else:
+            new_rows.append(row)
+    if not new_rows:
+        return added
+    
+    try:
+        # Index BM25 mis à jour candidat par candidat, dans le thread d'écriture
+        results = get_candidate_writer().add_candidates(
+            [candidates[row] for row in new_rows],
+            on_commit=lambda cv_data, _, before, after: add_candidate_to_bm25_index(cv_data, before, after),
+        )
+    except Exception as e:
+        print(f"Erreur lors de l'ajout: {e}")
+        return added
+    
+    for row, result in zip(new_rows, results):
+        cv_data = candidates[row][0]
+        if isinstance(result, Exception):
+            print(f"Erreur lors de l'ajout de {cv_data.get('prenom')} {cv_data.get('nom')}: {result}")
+            continue
+        added[row] = True
+        print(f"✅ Candidat ajouté: {cv_data.get('prenom')} {cv_data.get('nom')} (ID: {result})")
+    
+    # La base a changé : les résultats de matching en cache sont périmés
+    if any(added):
+        invalidate_match_cache()
+    return added
+
 import os
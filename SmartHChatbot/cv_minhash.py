@@ -0,0 +1,75 @@
+"""
+Détection des CV quasi identiques (MinHash + LSH).
+Un candidat qui renvoie son CV légèrement modifié produit une signature
+MinHash proche : les bandes LSH permettent de retrouver ces CV sans comparer
+le nouveau texte à tous les CV déjà reçus.
+"""
+
+import hashlib
+from typing import List
+
+import numpy as np
+
+from candidate_dedup import fold_accents
+
+
+# Taille des signatures et découpage LSH (NUM_PERMUTATIONS = LSH_BANDS * LSH_ROWS)
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = 8
+
+# Similarité de Jaccard estimée à partir de laquelle deux CV sont des quasi-doublons
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Nombre de mots par shingle
+SHINGLE_SIZE = 3
+
+# Nombre premier > 2^32 pour les permutations (a * x + b) mod p
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20240601)  # graine fixe: signatures stables d'un lancement à l'autre
+_A = _rng.randint(1, 2 ** 32 - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32 - 1, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str) -> set:
+    """Ensemble des suites de SHINGLE_SIZE mots du texte normalisé (sans accents, minuscules)."""
+    words = fold_accents(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    Signature MinHash d'un texte de CV.
+
+    Returns:
+        np.ndarray uint32 de NUM_PERMUTATIONS valeurs (vide si le texte n'a aucun mot)
+    """
+    tokens = shingles(text)
+    if not tokens:
+        return np.zeros(0, dtype=np.uint32)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=4).digest(), 'little') for t in tokens),
+        dtype=np.uint64, count=len(tokens),
+    )
+    # (a * x + b) tient sur 64 bits car a, b, x < 2^32
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def lsh_band_keys(signature: np.ndarray) -> List[int]:
+    """Clé (entier signé 64 bits, compatible SQLite) de chaque bande de la signature."""
+    keys = []
+    for band in range(LSH_BANDS):
+        chunk = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Similarité de Jaccard estimée entre deux signatures."""
+    if len(a) != len(b) or not len(a):
+        return 0.0
+    return float(np.mean(a == b))
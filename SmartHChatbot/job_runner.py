@@ -0,0 +1,144 @@
+"""
+Exécution en arrière-plan des actions longues du chatbot (recherche, synchro des emails).
+
+ChatbotEngine.execute_action(..., background=True) soumet l'action à un pool de
+threads et retourne aussitôt l'id du travail. Streamlit et le bot Teams
+interrogent ensuite son état (progression, puis résultat) avec
+ChatbotEngine.poll_job.
+Le code exécuté dans un travail signale sa progression avec report_progress(),
+sans effet lorsqu'il est appelé hors d'un travail.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+# Nombre de travaux exécutés en parallèle
+JOB_WORKERS = 2
+
+# Durée de conservation d'un travail terminé (secondes)
+JOB_RETENTION_SECONDS = 3600
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_current = threading.local()
+
+
+class Job:
+    """État d'un travail : statut, progression et résultat."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.status = PENDING
+        self.progress = 0.0
+        self.progress_message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'finished': self.is_finished,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+def report_progress(progress: float, message: str = "") -> None:
+    """
+    Signale la progression du travail en cours dans ce thread (sans effet sinon).
+
+    Args:
+        progress: Avancement entre 0 et 1
+        message: Étape en cours, affichée par l'interface
+    """
+    job = getattr(_current, 'job', None)
+    if job is None:
+        return
+    job.progress = min(max(float(progress), 0.0), 1.0)
+    if message:
+        job.progress_message = message
+
+
+class JobRunner:
+    """Pool de threads exécutant les travaux et registre de leur état."""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chatbot-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> str:
+        """
+        Soumet un travail et retourne aussitôt son id.
+
+        Args:
+            name: Nom du travail (action du chatbot)
+            fn: Fonction à exécuter ; son retour devient le résultat du travail
+
+        Returns:
+            Id du travail
+        """
+        job = Job(name)
+        with self._lock:
+            self._forget_finished()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: Dict) -> None:
+        _current.job = job
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, **kwargs)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            print(f"❌ Travail {job.name} ({job.id}) en échec: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            _current.job = None
+
+    def _forget_finished(self) -> None:
+        """Retire les travaux terminés depuis plus de retention_seconds (appelé sous _lock)."""
+        limit = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < limit]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Retourne le pool de travaux partagé du processus (créé au premier appel)."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -7,12 +7,14 @@ import requests
 import json
 from typing import Dict, Optional, List
 from datetime import datetime
-import re
+
+from query_plan import build_query_plan
 
 
 def _parse_request(job_description: str) -> Dict:
     """Analyse simple de la requête pour extraire le rôle, l'expérience et les compétences."""
-    text = job_description.lower()
+    plan = build_query_plan(job_description)
+    text = plan.text
     # Rôle
     role_map = {
         'medecin cardiovasculaire': ['medecin cardiovasculaire', 'médecin cardiovasculaire', 'cardiologue', 'cardiologie', 'cardio'],
@@ -24,21 +26,15 @@ def _parse_request(job_description: str) -> Dict:
             role_found = role
             break
 
-    # Expérience minimale
-    exp = 0
-    m = re.search(r'(\d+)\s*ans', text)
-    if m:
-        try:
-            exp = int(m.group(1))
-        except:
-            exp = 0
+    # Expérience minimale (mêmes règles que le matching: "5+ ans", senior, expert)
+    exp = plan.min_experience
 
     # Compétences (tokens >2 chars, filtrer mots génériques)
     stop = {
         'je','veux','cherche','besoin','recherche','trouve','trouver','candidat','candidats','profil','profils',
         'avec','pour','de','du','des','un','une','le','la','les','et','ou','dans','sur','poste'
     }
-    tokens = [t for t in re.findall(r"[a-zA-ZÀ-ÿ0-9+#]+", text) if len(t) > 2]
+    tokens = [t for t in plan.tokens if len(t) > 2]
     skills = [t for t in tokens if t not in stop]
 
     # Nettoyage basique
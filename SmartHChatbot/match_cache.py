@@ -0,0 +1,165 @@
+"""
+Cache persistant des résultats de matching Ollama.
+Évite de repayer un aller-retour LLM pour une recherche déjà faite
+sur la même base de candidats avec le même modèle.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+CACHE_FILE = 'data/match_cache.json'
+
+# Éviction LRU au-delà de ce nombre d'entrées
+CACHE_MAX_ENTRIES = 200
+
+# Durée de vie d'une entrée (secondes)
+CACHE_TTL_SECONDS = 24 * 3600
+
+
+def normalize_job_description(job_description: str) -> str:
+    """
+    Normalise une demande recruteur pour la clé de cache.
+    Minuscules, ponctuation retirée, espaces fusionnés ("3 developpeurs  python \\n\\n"
+    et "3 Developpeurs python" donnent la même clé). Les accents sont conservés
+    car le matching les distingue.
+    """
+    text = re.sub(r"[^\w+#]+", " ", job_description.lower())
+    return " ".join(text.split())
+
+
+def make_cache_key(job_description: str, candidates_fingerprint: str, model_name: str,
+                   num_candidates: int, shortlist_size: int) -> str:
+    """
+    Construit la clé de cache d'une recherche.
+
+    Args:
+        job_description: Description du poste recherché
+        candidates_fingerprint: Empreinte de la base de candidats
+        model_name: Modèle Ollama utilisé
+        num_candidates: Nombre de candidats demandés
+        shortlist_size: Taille de la présélection envoyée au LLM
+
+    Returns:
+        Clé hexadécimale (SHA-256)
+    """
+    raw = "|".join([
+        model_name,
+        candidates_fingerprint,
+        str(num_candidates),
+        str(shortlist_size),
+        normalize_job_description(job_description),
+    ])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class MatchCache:
+    """
+    Cache LRU + TTL sauvegardé dans un fichier JSON (réécrit à chaque put, pas à chaque get).
+    Le fichier est relu s'il a été modifié par un autre processus (Streamlit, Teams).
+    """
+
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._loaded_signature: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Retourne les résultats en cache (ou None si absent/expiré).
+        Un accès ne réécrit pas le fichier : l'ordre d'utilisation est mis à jour
+        en mémoire et enregistré au prochain put.
+        """
+        with self._lock:
+            self._load_if_changed()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry['created'] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            entry['last_used'] = now
+            self._entries.move_to_end(key)
+            return entry['results']
+
+    def put(self, key: str, results: List[Dict]) -> None:
+        """Enregistre les résultats d'une recherche et applique l'éviction."""
+        with self._lock:
+            self._load_if_changed()
+            now = time.time()
+            self._entries[key] = {'created': now, 'last_used': now, 'results': results}
+            self._entries.move_to_end(key)
+            self._evict(now)
+            self._save()
+
+    def clear(self) -> None:
+        """Vide le cache (mémoire et disque)."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def _evict(self, now: float) -> None:
+        expired = [k for k, e in self._entries.items() if now - e['created'] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_if_changed(self) -> None:
+        signature = self._file_signature()
+        if signature == self._loaded_signature:
+            return
+        entries = []
+        if signature is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f).get('entries', [])
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Cache de matching illisible, ignoré: {e}")
+        # Fichier ordonné du moins au plus récemment utilisé
+        self._entries = OrderedDict((e['key'], e) for e in entries if 'key' in e)
+        self._loaded_signature = signature
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            for key, entry in self._entries.items():
+                entry['key'] = key
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.values())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._loaded_signature = self._file_signature()
+        except OSError as e:
+            print(f"⚠️ Erreur sauvegarde cache de matching: {e}")
+
+
+_match_cache = MatchCache()
+
+
+def get_match_cache() -> MatchCache:
+    """Retourne le cache de matching partagé du processus."""
+    return _match_cache
+
+
+def invalidate_match_cache() -> None:
+    """Invalide le cache (appelé quand la base de candidats change)."""
+    _match_cache.clear()
@@ -1,15 +1,61 @@
 import requests
 import json
-import re
-from typing import List, Dict
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from bm25_index import document_terms, get_bm25_index
+from candidate_index import TOKEN_PATTERN, KeywordLookup, experience_value, get_candidate_index
+from candidate_model import MatchResult
+from candidate_snapshot import CandidateSnapshot, get_candidate_snapshot
+from match_cache import get_match_cache, make_cache_key
+from query_plan import (
+    KEYWORD_VARIATIONS, ROLE_KEYWORDS, LANGUAGE_MAP,
+    QueryPlan, build_query_plan,
+)
+from shared_resources import OLLAMA_BASE_URL, get_shared_resources
 
 
 # Modèle par défaut pour Ollama (facile à remplacer)
 MODEL_NAME = "tinyllama:latest"
 
+# Moteur de matching: "ollama" (LLM + secours mots-clés), "bm25" (classement local), "keywords"
+# ou "snapshot" (mots-clés sur l'instantané mmap de la base, pour les très grandes bases)
+MATCHING_ENGINE = os.getenv("MATCHING_ENGINE", "ollama")
+
 # NOUVEAU: Seuil minimum de matching (score minimal pour être pertinent)
 MINIMUM_MATCH_SCORE = 30  # Les candidats avec un score < 30% seront rejetés
 
+# Score BM25 brut affiché comme 100% (échelle absolue: le seuil ci-dessus s'applique aussi au BM25)
+BM25_FULL_MATCH_SCORE = 10.0
+
+# URL de l'API Ollama locale
+OLLAMA_API_URL = f"{OLLAMA_BASE_URL}/api/generate"
+
+# Nombre de candidats présélectionnés par mots-clés avant le re-classement par Ollama
+LLM_SHORTLIST_SIZE = 20
+
+# Re-classement par lots: taille d'un lot, requêtes Ollama simultanées, délais (secondes)
+LLM_CHUNK_SIZE = 10
+LLM_MAX_CONCURRENCY = 2
+LLM_CONNECT_TIMEOUT = 5
+LLM_CHUNK_TIMEOUT = 60
+
+# Technologies principales (bonus de score plus fort)
+MAIN_TECHNOLOGIES = {'python', 'java', 'javascript', 'react', 'angular', 'django', 'flask', 'spring', 'solidity', 'blockchain'}
+
+# Termes de rôle exigés dans le poste par le filtre de pertinence
+RELEVANCE_ROLE_TERMS = ['développeur', 'developpeur', 'developer', 'ingénieur', 'ingenieur', 'engineer', 'médecin', 'medecin', 'doctor']
+
+# Termes pré-résolus dans l'index inversé des candidats
+INDEX_WARM_TERMS = sorted(
+    {term for variants in KEYWORD_VARIATIONS.values() for term in variants}
+    | {term for variants in ROLE_KEYWORDS.values() for term in variants}
+    | set(LANGUAGE_MAP.values())
+)
+
 
 def extract_criteria_from_request(job_description: str) -> Dict:
     """
@@ -21,96 +67,165 @@ def extract_criteria_from_request(job_description: str) -> Dict:
     Returns:
         Dict avec min_experience, max_candidates, required_skills, languages, role_terms
     """
-    criteria = {
-        'min_experience': 0,
-        'max_candidates': 4,
-        'required_keywords': [],
-        'languages': [],
-        'role_terms': []
-    }
-    
-    # Chercher patterns comme "10 ans", "5+ ans", "senior" etc
-    experience_patterns = [
-        r'(\d+)\+\s*ans',  # "10+ ans"
-        r'(\d+)\s*ans',     # "10 ans"
-        r'senior',          # "senior"
-        r'expert',          # "expert"
-        r'confirmé'         # "confirmé"
-    ]
-    
-    desc_lower = job_description.lower()
-    for pattern in experience_patterns:
-        match = re.search(pattern, desc_lower)
-        if match:
-            if pattern == r'(\d+)\+\s*ans' or pattern == r'(\d+)\s*ans':
-                years = int(match.group(1))
-                if years > criteria['min_experience']:
-                    criteria['min_experience'] = years
-            elif 'senior' in pattern and criteria['min_experience'] < 5:
-                criteria['min_experience'] = 5
-            elif 'expert' in pattern and criteria['min_experience'] < 7:
-                criteria['min_experience'] = 7
-    
-    # Chercher le nombre de candidats
-    num_patterns = [
-        r'(\d+)\s*(?:développeurs|ingénieurs|candidats|spécialistes|experts)',
-        r'(?:je\s+veux|cherche|besoin)\s+(\d+)',
-        r'(?:trouver|recruter)\s+(\d+)'
-    ]
-    
-    for pattern in num_patterns:
-        match = re.search(pattern, desc_lower)
-        if match:
-            num = int(match.group(1))
-            criteria['max_candidates'] = num
-            break
-
-    # Détecter les langues demandées dans la requête
-    lang_map = {
-        'francais': 'français', 'français': 'français', 'french': 'français',
-        'anglais': 'anglais', 'english': 'anglais',
-        'espagnol': 'espagnol', 'spanish': 'espagnol',
-        'arabe': 'arabe', 'arabic': 'arabe',
-        'allemand': 'allemand', 'german': 'allemand'
-    }
-    langs = []
-    for k, v in lang_map.items():
-        if k in desc_lower and v not in langs:
-            langs.append(v)
-    criteria['languages'] = langs
-
-    # Détecter des termes de rôle utiles (souples)
-    role_variants = [
-        'developpeur', 'développeur', 'developpeurs', 'développeurs', 'developer', 'dev',
-        'software engineer', 'software engineers', 'software engineering',
-        'ingenieur logiciel', 'ingénieur logiciel', 'engineer', 'engineers', 'ingénieur', 'ingenieur', 'ingénieurs', 'ingenieurs',
-        'medecin', 'médecin', 'docteur', 'doctor', 'cardiologue'
-    ]
-    criteria['role_terms'] = [r for r in role_variants if r in desc_lower]
-
-    return criteria
+    return build_query_plan(job_description).criteria()
 
 
-def match_candidates(job_description: str, cv_data: List[Dict], num_candidates: int = 4) -> List[Dict]:
+def match_candidates(job_description: str, cv_data: List[Dict], num_candidates: int = 4,
+                     shortlist_size: int = LLM_SHORTLIST_SIZE,
+                     plan: Optional[QueryPlan] = None,
+                     diagnostics: Optional[Dict] = None) -> List[Dict]:
     """
     Utilise Ollama pour matcher les candidats avec la description du poste.
     AMÉLIORATION: Retourne une liste vide si aucun candidat pertinent.
+    AMÉLIORATION 2: Pipeline en deux étapes - le scoring mots-clés présélectionne
+    les `shortlist_size` meilleurs profils, seuls ceux-ci sont envoyés à Ollama.
+    AMÉLIORATION 3: La présélection est découpée en lots de LLM_CHUNK_SIZE profils,
+    scorés en parallèle (LLM_MAX_CONCURRENCY requêtes max) avec un timeout par lot.
+    Un lot en échec (timeout, erreur, JSON invalide) garde ses scores mots-clés.
+    AMÉLIORATION 4: Les résultats obtenus via Ollama sont mis en cache sur disque
+    (clé: demande normalisée + empreinte de la base + MODEL_NAME), seulement si
+    tous les lots ont répondu et que le classement final vient du LLM.
     
     Args:
         job_description: Description du poste recherché
         cv_data: Liste des CV au format JSON
         num_candidates: Nombre de candidats à retourner
+        shortlist_size: Taille de la présélection envoyée au LLM
+        plan: Demande déjà analysée (construite ici si absente)
+        diagnostics: Si fourni, complété avec partial_matches et near_misses
+            (calculés pendant le scoring, sans repasser sur la base ; laissé vide
+            si le résultat vient du cache, qui ne contient jamais de liste vide)
     
     Returns:
         Liste des candidats matchés avec leur score (vide si aucun pertinent)
     """
+    if plan is None:
+        plan = build_query_plan(job_description)
     
-    # URL de l'API Ollama locale
-    OLLAMA_API_URL = "http://localhost:11434/api/generate"
-    
+    try:
+        index = get_candidate_index(cv_data, INDEX_WARM_TERMS)
+
+        # Recherche déjà faite sur la même base avec le même modèle ?
+        cache = get_match_cache()
+        cache_key = make_cache_key(job_description, index.fingerprint, MODEL_NAME, num_candidates, shortlist_size)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            # Pas de diagnostic: seuls des classements non vides sont mis en cache
+            return [_cached_match(cv_data, entry) for entry in cached]
+
+        # Étape 1: présélection par mots-clés (la taille du prompt ne dépend plus de la base)
+        scores = _keyword_scores(index, plan)
+        threshold = _match_threshold(plan)
+        if diagnostics is not None:
+            _fill_diagnostics(diagnostics, index, plan, scores)
+        shortlist_rows = _shortlist_rows(scores, max(shortlist_size, num_candidates))
+        if not shortlist_rows:
+            print("ℹ️  Aucun candidat présélectionné pour cette recherche")
+            return []
+
+        # Étape 2: re-classement par Ollama, lot par lot, en parallèle
+        chunks = [shortlist_rows[i:i + LLM_CHUNK_SIZE] for i in range(0, len(shortlist_rows), LLM_CHUNK_SIZE)]
+        ranked: List[Tuple[int, Dict]] = []
+        llm_answered = False
+        all_answered = True
+        with ThreadPoolExecutor(max_workers=min(LLM_MAX_CONCURRENCY, len(chunks))) as executor:
+            futures = [
+                executor.submit(_llm_score_chunk, job_description, [cv_data[row] for row in rows])
+                for rows in chunks
+            ]
+            for rows, future in zip(chunks, futures):
+                selections = future.result()
+                if selections is None:
+                    # Lot en échec: scores mots-clés pour ce lot uniquement
+                    all_answered = False
+                    for row in rows:
+                        if scores['eligible'][row] and scores['score'][row] >= threshold:
+                            ranked.append((row, _keyword_match(cv_data[row], row, scores, plan)))
+                    continue
+
+                llm_answered = True
+                seen = set()
+                for selection in selections:
+                    candidate_idx = selection['candidate_number'] - 1
+                    if 0 <= candidate_idx < len(rows) and candidate_idx not in seen:
+                        seen.add(candidate_idx)
+                        candidate = MatchResult(cv_data[rows[candidate_idx]], selection['match_score'],
+                                                selection.get('match_reason', 'Bon profil pour le poste'))
+                        ranked.append((rows[candidate_idx], candidate))
+
+        if not llm_answered:
+            # Ollama indisponible pour tous les lots: fallback silencieux sur toute la base
+            return [c for _, c in _fallback_results(cv_data, scores, plan, num_candidates)]
+
+        # Fusionner les lots en un seul classement
+        ranked.sort(key=lambda item: item[1]['match_score'], reverse=True)
+
+        # NOUVEAU: Filtrer les candidats avec score trop bas
+        matched_candidates = []
+        for row, candidate in ranked[:num_candidates]:
+            match_score = candidate['match_score']
+            
+            # Rejeter si score trop bas
+            if match_score < MINIMUM_MATCH_SCORE:
+                print(f"⚠️  Candidat rejeté (score {match_score}% < {MINIMUM_MATCH_SCORE}%)")
+                continue
+            matched_candidates.append((row, candidate))
+
+        # NOUVEAU: Appliquer une pertinence post-filtre (titre/compétences/expérience)
+        role_in_query = any(t in plan.text for t in RELEVANCE_ROLE_TERMS)
+        # Si des mots techniques existent dans la requête, exiger au moins 1 match
+        tech_tokens = [t for t in plan.tokens if len(t) > 2 and t not in RELEVANCE_ROLE_TERMS]
+
+        def _is_relevant(cand: Dict) -> bool:
+            # Expérience
+            if experience_value(cand) < plan.min_experience:
+                return False
+            # Poste
+            poste = cand.get('poste', '').lower()
+            role_in_title = any(t in poste for t in RELEVANCE_ROLE_TERMS)
+            if role_in_query and not role_in_title:
+                return False
+            # Compétences
+            comp = ' '.join(cand.get('competences', [])).lower()
+            if tech_tokens and not any(t in comp for t in tech_tokens):
+                return False
+            return True
+
+        matched_candidates = [(row, c) for row, c in matched_candidates if _is_relevant(c)]
+
+        # NOUVEAU: Si aucun candidat pertinent, retourner liste vide
+        from_llm = all_answered
+        if len(matched_candidates) == 0:
+            print("ℹ️  Aucun candidat ne correspond aux critères (tous < {}%)".format(MINIMUM_MATCH_SCORE))
+
+        # Si pas assez de candidats, essayer le fallback
+        elif len(matched_candidates) < num_candidates:
+            matched_candidates = _fallback_results(cv_data, scores, plan, num_candidates)
+            from_llm = False
+
+        # Seul un classement complet d'Ollama est mis en cache (pas un résultat dégradé ou vide)
+        if from_llm and matched_candidates:
+            cache.put(cache_key, [
+                {'row': row, 'match_score': c['match_score'], 'match_reason': c['match_reason']}
+                for row, c in matched_candidates
+            ])
+        return [c for _, c in matched_candidates]
+
+    except Exception:
+        # Toute autre erreur : fallback pour garantir un résultat
+        return fallback_matching(job_description, cv_data, num_candidates, plan, diagnostics)
+
+
+def _cached_match(cv_data: List[Dict], entry: Dict) -> MatchResult:
+    """Reconstruit un candidat matché à partir d'une entrée du cache."""
+    return MatchResult(cv_data[entry['row']], entry['match_score'], entry['match_reason'])
+
+
+def _build_matching_prompt(job_description: str, candidates: List[Dict]) -> str:
+    """Construit le prompt de matching Ollama pour un lot de candidats."""
     # Préparer les données des CV pour l'IA
     cv_summaries = []
-    for idx, cv in enumerate(cv_data):
+    for idx, cv in enumerate(candidates):
         summary = f"""
         Candidat {idx + 1}:
         - Nom: {cv['nom']} {cv['prenom']}
@@ -139,7 +254,7 @@ Candidats disponibles:
 {chr(10).join(cv_summaries)}
 
 Pour chaque candidat QUI CORRESPOND RÉELLEMENT (score >= 30%), fournis:
-1. Le numéro du candidat (1-{len(cv_data)})
+1. Le numéro du candidat (1-{len(candidates)})
 2. Un score de matching de 0 à 100 (sois HONNÊTE)
 3. Une explication courte (2-3 phrases) justifiant le score
 
@@ -158,315 +273,369 @@ Réponds UNIQUEMENT au format JSON suivant (sans autre texte):
 
 Si aucun candidat pertinent: {{"selected_candidates": []}}
 """
+    return prompt
+
+
+def _llm_score_chunk(job_description: str, candidates: List[Dict]) -> Optional[List[Dict]]:
+    """
+    Score un lot de candidats avec Ollama, dans le délai LLM_CHUNK_TIMEOUT.
+    
+    Args:
+        job_description: Description du poste recherché
+        candidates: Candidats du lot (numérotés 1..n dans le prompt)
     
+    Returns:
+        Sélections valides du LLM (candidate_number, match_score numérique, match_reason),
+        ou None si le lot a échoué (timeout, Ollama indisponible, réponse invalide)
+    """
+    resources = get_shared_resources()
+    if not resources.ollama_available():
+        return None
     try:
-        response = requests.post(
+        response = resources.http.post(
             OLLAMA_API_URL,
             json={
                 "model": MODEL_NAME,
-                "prompt": prompt,
+                "prompt": _build_matching_prompt(job_description, candidates),
                 "stream": False,
                 "temperature": 0.3,
                 "num_predict": 500,
                 "format": "json"
             },
-            timeout=None
+            timeout=(LLM_CONNECT_TIMEOUT, LLM_CHUNK_TIMEOUT)
         )
+    except requests.exceptions.Timeout:
+        print(f"⏱️  Timeout Ollama (>{LLM_CHUNK_TIMEOUT}s) pour un lot de {len(candidates)} candidats, scores mots-clés conservés")
+        return None
+    except requests.exceptions.RequestException as e:
+        # Ollama pas démarré ou erreur réseau
+        if isinstance(e, requests.exceptions.ConnectionError):
+            resources.record_ollama(False)
+        return None
+
+    if response.status_code != 200:
+        return None
 
-        if response.status_code == 200:
-            result = response.json()
-            ai_response = result.get('response', '{}')
-
-            try:
-                matching_result = json.loads(ai_response)
-                selected = matching_result.get('selected_candidates', [])
-
-                # NOUVEAU: Filtrer les candidats avec score trop bas
-                matched_candidates = []
-                for selection in selected[:num_candidates]:
-                    match_score = selection.get('match_score', 0)
-                    
-                    # Rejeter si score trop bas
-                    if match_score < MINIMUM_MATCH_SCORE:
-                        print(f"⚠️  Candidat rejeté (score {match_score}% < {MINIMUM_MATCH_SCORE}%)")
-                        continue
-                    
-                    candidate_idx = selection.get('candidate_number', 1) - 1
-
-                    if 0 <= candidate_idx < len(cv_data):
-                        candidate = cv_data[candidate_idx].copy()
-                        candidate['match_score'] = match_score
-                        candidate['match_reason'] = selection.get('match_reason', 'Bon profil pour le poste')
-                        matched_candidates.append(candidate)
-
-                # NOUVEAU: Appliquer une pertinence post-filtre (titre/compétences/expérience)
-                def _is_relevant(cand: Dict) -> bool:
-                    # Expérience
-                    min_exp = extract_criteria_from_request(job_description)['min_experience']
-                    if cand.get('experience', 0) < min_exp:
-                        return False
-                    # Compétences
-                    comp = ' '.join(cand.get('competences', [])).lower()
-                    has_skill = any(k in comp for k in job_description.lower().split())
-                    # Poste
-                    poste = cand.get('poste', '').lower()
-                    role_terms = ['développeur', 'developpeur', 'developer', 'ingénieur', 'ingenieur', 'engineer', 'médecin', 'medecin', 'doctor']
-                    role_in_query = any(t in job_description.lower() for t in role_terms)
-                    role_in_title = any(t in poste for t in role_terms)
-                    if role_in_query and not role_in_title:
-                        return False
-                    # Si des mots techniques existent dans la requête, exiger au moins 1 match
-                    tokens = [t for t in re.findall(r"[a-zA-ZÀ-ÿ0-9+#]+", job_description.lower()) if len(t) > 2]
-                    tech_tokens = [t for t in tokens if t not in ['développeur','developpeur','developer','ingénieur','ingenieur','engineer','médecin','medecin','doctor']]
-                    if tech_tokens and not any(t in comp for t in tech_tokens):
-                        return False
-                    return True
-
-                matched_candidates = [c for c in matched_candidates if _is_relevant(c)]
-
-                # NOUVEAU: Si aucun candidat pertinent, retourner liste vide
-                if len(matched_candidates) == 0:
-                    print("ℹ️  Aucun candidat ne correspond aux critères (tous < {}%)".format(MINIMUM_MATCH_SCORE))
-                    return []
-
-                # Si pas assez de candidats, essayer le fallback
-                if len(matched_candidates) < num_candidates:
-                    return fallback_matching(job_description, cv_data, num_candidates)
-
-                return matched_candidates
-
-            except json.JSONDecodeError:
-                return fallback_matching(job_description, cv_data, num_candidates)
-
-        # Si Ollama répond avec erreur, basculer sur le fallback
-        return fallback_matching(job_description, cv_data, num_candidates)
-
-    except requests.exceptions.ConnectionError:
-        # Ollama pas démarré : fallback silencieux
-        return fallback_matching(job_description, cv_data, num_candidates)
-
-    except Exception:
-        # Toute autre erreur : fallback pour garantir un résultat
-        return fallback_matching(job_description, cv_data, num_candidates)
+    try:
+        ai_response = response.json().get('response', '{}')
+        selected = json.loads(ai_response).get('selected_candidates', [])
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(selected, list):
+        return None
+
+    selections = []
+    for selection in selected:
+        if not isinstance(selection, dict):
+            continue
+        try:
+            selection['candidate_number'] = int(selection.get('candidate_number', 1))
+            selection['match_score'] = int(float(selection.get('match_score', 0)))
+        except (TypeError, ValueError):
+            continue
+        selections.append(selection)
+    return selections
 
 
-def fallback_matching(job_description: str, cv_data: List[Dict], num_candidates: int) -> List[Dict]:
+def fallback_matching(job_description: str, cv_data: List[Dict], num_candidates: int,
+                      plan: Optional[QueryPlan] = None, diagnostics: Optional[Dict] = None) -> List[Dict]:
     """
     Système de matching de secours basé sur les mots-clés
     AMÉLIORATION: Retourne une liste vide si aucun candidat pertinent
     AMÉLIORATION 2: Respecte les critères d'expérience demandés
+    AMÉLIORATION 3: `diagnostics` (si fourni) est complété à partir des mêmes scores
     """
     
-    # Extraire les critères
-    criteria = extract_criteria_from_request(job_description)
-    min_experience = criteria['min_experience']
-    desired_languages = set(criteria.get('languages', []))
-    requested_role_terms = set(criteria.get('role_terms', []))
-    
-    # Mots à ignorer (stop words + mots génériques)
-    stop_words = {
-        'recherche', 'cherche', 'besoin', 'rechercher', 'trouver',
-        'développeur', 'développeurs', 'developer', 'dev', 'engineer', 'ingénieur',
-        'candidat', 'candidats', 'profil', 'profils', 'personne',
-        'poste', 'emploi', 'job', 'travail', 'mission',
-        'pour', 'avec', 'dans', 'sur', 'une', 'des', 'les', 'un',
-        'expérimenté', 'expérience', 'senior', 'junior', 'confirmé', 'expert',
-        'ans', 'year', 'years', 'mois', 'month', 'months'
-    }
-    
-    # Extraire les mots-clés techniques uniquement (> 2 lettres et pas dans stop words)
-    keywords = set(
-        word.lower() for word in re.findall(r"[a-zA-ZÀ-ÿ0-9+#]+", job_description.lower())
-        if len(word) > 2 and word.lower() not in stop_words
-    )
-    
-    # Ajouter des variantes de technologies
-    keyword_variations = {
-        'python': ['python', 'django', 'flask', 'fastapi', 'pydantic', 'pytorch', 'tensorflow'],
-        'javascript': ['javascript', 'js', 'react', 'vue', 'angular', 'node', 'nodejs'],
-        'java': ['java', 'spring', 'hibernate', 'maven', 'gradle'],
-        'data': ['data', 'scientist', 'analyst', 'engineer', 'machine learning', 'ml', 'ai'],
-        'web': ['web', 'frontend', 'backend', 'fullstack', 'full-stack'],
-        'mobile': ['mobile', 'android', 'ios', 'react native', 'flutter'],
-        'cloud': ['cloud', 'aws', 'azure', 'gcp', 'devops', 'kubernetes', 'docker'],
-        'blockchain': ['blockchain', 'solidity', 'web3', 'ethereum', 'crypto', 'smart', 'contract'],
-        'security': ['security', 'cybersecurity', 'cyber', 'secure', 'encryption', 'cryptography'],
-        # Médecine / santé (pour les demandes hors IT)
-        'medecin': ['médecin', 'medecin', 'docteur', 'doctor', 'cardio', 'cardiologie', 'cardiologue', 'cardiovascular', 'cardiovasculaire']
-    }
+    # Calculer le score avec contraintes flexibles (compétences OU titre OU langues)
+    if plan is None:
+        plan = build_query_plan(job_description)
+    index = get_candidate_index(cv_data, INDEX_WARM_TERMS)
+    scores = _keyword_scores(index, plan)
+    if diagnostics is not None:
+        _fill_diagnostics(diagnostics, index, plan, scores)
+    return [candidate for _, candidate in _fallback_results(cv_data, scores, plan, num_candidates)]
+
+
+def snapshot_matching(job_description: str, num_candidates: int, plan: Optional[QueryPlan] = None,
+                      snapshot: Optional[CandidateSnapshot] = None,
+                      diagnostics: Optional[Dict] = None) -> List[Dict]:
+    """
+    Même scoring que fallback_matching, exécuté directement sur l'instantané
+    en colonnes de la base : seuls les candidats retenus sont décodés.
 
-    role_keywords = {
-        'developpeur': ['développeur', 'developpeur', 'developer', 'dev', 'ingénieur', 'ingenieur', 'engineer', 'engineering'],
-        'medecin': ['médecin', 'medecin', 'docteur', 'doctor', 'cardiologue', 'cardio']
-    }
-    
-    # Étendre avec variantes
-    extended_keywords = set(keywords)
-    for keyword in list(keywords):
-        if keyword in keyword_variations:
-            extended_keywords.update(keyword_variations[keyword])
-    
-    # Si aucun mot-clé technique, chercher au moins le contexte
-    if not extended_keywords:
-        extended_keywords = keywords
-    
-    # Déterminer les rôles demandés ou implicites (ex: développeur, médecin)
-    role_terms_present = set()
-    for role, variants in role_keywords.items():
-        if any(v in extended_keywords for v in variants) or any(v in requested_role_terms for v in variants):
-            role_terms_present.add(role)
-
-    # Rôles explicitement demandés via la requête (si fournis, prioritaire)
-    requested_roles = set()
-    if requested_role_terms:
-        for role, variants in role_keywords.items():
-            if any(v in requested_role_terms for v in variants):
-                requested_roles.add(role)
-    else:
-        requested_roles = set(role_terms_present)
+    Args:
+        job_description: Description du poste recherché
+        num_candidates: Nombre de candidats à retourner
+        plan: Demande déjà analysée (construite ici si absente)
+        snapshot: Instantané à utiliser (celui de la base courante par défaut)
+        diagnostics: Si fourni, complété avec partial_matches et near_misses
 
-    # Calculer le score avec contraintes flexibles (compétences OU titre OU langues)
-    scored_candidates = []
-    
-    for candidate in cv_data:
-        # ✅ Vérifier l'expérience minimale requise
-        candidate_experience = candidate.get('experience', 0)
-        if candidate_experience < min_experience:
-            # Pénalité très forte pour ne pas respecter l'expérience requise
-            continue  # Ignorer complètement si l'expérience ne correspond pas
-        
-        score = 0
-        matching_skills = 0
-        matching_in_title = 0
-        matching_langs = 0
-        
-        # Vérifier compétences (priorité absolue)
-        competences_text = ' '.join(candidate.get('competences', [])).lower()
-        for keyword in extended_keywords:
-            if keyword in competences_text:
-                matching_skills += 1
-                # Bonus fort pour technologies clés
-                if keyword in ['python', 'java', 'javascript', 'react', 'angular', 'django', 'flask', 'spring', 'solidity', 'blockchain']:
-                    score += 30  # Encore plus fort pour technos principales
-                else:
-                    score += 20  # Bonus pour autres compétences
-        
-        # Vérifier le poste
-        poste = candidate.get('poste', '').lower()
-        for keyword in extended_keywords:
-            if keyword in poste:
-                matching_in_title += 1
-                score += 15  # Bonus modéré pour titre
-
-        # Si la requête implique un rôle, ne compter que les variantes de CE(S) rôle(s)
-        if requested_roles:
-            role_variants_flat = set()
-            for r in requested_roles:
-                role_variants_flat.update(role_keywords.get(r, []))
-            if any(var in poste for var in role_variants_flat):
-                matching_in_title += 1
-                score += 15
-
-        # Si des termes de rôle explicites sont demandés, bonus si le poste contient un de ces termes
-        if requested_role_terms:
-            if any(rt in poste for rt in requested_role_terms):
-                score += 15
-        
-        # Vérifier la formation
-        formation = candidate.get('formation', '').lower()
-        for keyword in extended_keywords:
-            if keyword in formation:
-                score += 5
-        
-        # Langues demandées (si présentes)
-        cand_langs = [l.lower() for l in candidate.get('langues', [])]
-        for lang in desired_languages:
-            if any(lang in l for l in cand_langs):
-                matching_langs += 1
-                score += 10
-
-        # ✅ Bonus pour l'expérience qui dépasse le minimum
-        # Si le candidat a plus d'expérience que demandé, ça vaut des points
-        if candidate_experience >= min_experience:
-            bonus_exp = min((candidate_experience - min_experience) * 2, 15)  # Max 15 points bonus
-            score += bonus_exp
-
-        # ❗ Exiger au moins 1 signal pertinent parmi (titre, compétences, langues)
-        signals_matched = (1 if matching_skills > 0 else 0) + (1 if matching_in_title > 0 else 0) + (1 if matching_langs > 0 else 0)
-        if signals_matched == 0:
-            continue
+    Returns:
+        Liste des candidats classés (vide si aucun pertinent)
+    """
+    if plan is None:
+        plan = build_query_plan(job_description)
+    if snapshot is None:
+        snapshot = get_candidate_snapshot()
+    scores = _keyword_scores(snapshot, plan)
+    if diagnostics is not None:
+        _fill_diagnostics(diagnostics, snapshot, plan, scores)
+    return [candidate for _, candidate in _fallback_results(snapshot.records, scores, plan, num_candidates)]
 
-        # Cas stricte: si un rôle médical est explicitement demandé, exiger présence dans le titre
-        if 'medecin' in requested_roles:
-            med_variants = set(role_keywords['medecin'])
-            if not any(v in poste for v in med_variants):
-                continue
 
-        # Ne garder que si score minimum atteint (seuil adaptatif selon nombre de critères fournis)
-        provided_signals = 0
-        if extended_keywords:
-            provided_signals += 1
-        if requested_role_terms:
-            provided_signals += 1
-        if desired_languages:
-            provided_signals += 1
-        role_only_query = bool(requested_role_terms) and not extended_keywords and not desired_languages
-        dynamic_threshold = MINIMUM_MATCH_SCORE - (10 if provided_signals <= 1 else 0)
-        if role_only_query:
-            dynamic_threshold -= 5
-        if score >= dynamic_threshold:
-            candidate_copy = candidate.copy()
-            candidate_copy['match_score'] = min(score, 100)
-            candidate_copy['match_reason'] = f"✓ {matching_skills} compétences techniques | ✓ {matching_in_title} match(s) titre | ✓ {candidate_experience} ans exp."
-            scored_candidates.append(candidate_copy)
-    
+def _fallback_results(cv_data: List[Dict], scores: Dict, plan: QueryPlan, num_candidates: int) -> List[Tuple[int, Dict]]:
+    """
+    Sélectionne les meilleurs candidats au-dessus du seuil à partir de scores déjà calculés.
+
+    Returns:
+        Liste de (position dans cv_data, MatchResult avec match_score/match_reason)
+    """
+    min_experience = plan.min_experience
+    selected = np.flatnonzero(scores['eligible'] & (scores['score'] >= _match_threshold(plan)))
+
     # Si aucun candidat ne dépasse le seuil
-    if len(scored_candidates) == 0:
+    if len(selected) == 0:
         min_exp_msg = f" avec minimum {min_experience} ans" if min_experience > 0 else ""
         # Utiliser un message sans emoji pour éviter les problèmes d'encodage console Windows
         print(f"Fallback: Aucun candidat ne depasse le seuil de {MINIMUM_MATCH_SCORE}%{min_exp_msg}")
         return []
     
-    # Trier par score
-    scored_candidates.sort(key=lambda x: x['match_score'], reverse=True)
+    # Trier par score (score plafonné à 100, ordre de la base en cas d'égalité)
+    capped = np.minimum(scores['score'][selected], 100)
+    top_rows = selected[np.lexsort((selected, -capped))][:num_candidates]
+    return [(int(row), _keyword_match(cv_data[row], row, scores, plan)) for row in top_rows]
+
+
+def bm25_matching(job_description: str, cv_data: List[Dict], num_candidates: int,
+                  plan: Optional[QueryPlan] = None, diagnostics: Optional[Dict] = None) -> List[Dict]:
+    """
+    Classement local BM25, sans appel LLM (utile quand Ollama est saturé).
+    Le score affiché est le score BM25 brut rapporté à BM25_FULL_MATCH_SCORE
+    (plafonné à 100%) : un profil qui ne partage qu'un terme courant reste
+    sous MINIMUM_MATCH_SCORE même s'il est le meilleur trouvé.
+
+    Args:
+        job_description: Description du poste recherché
+        cv_data: Liste des CV au format JSON
+        num_candidates: Nombre de candidats à retourner
+        plan: Demande déjà analysée (construite ici si absente)
+        diagnostics: Si fourni, complété d'après les scores BM25 : partial_matches
+            (profils contenant au moins un terme de la demande) et near_misses
+            (ceux-ci, hors candidats retenus)
+
+    Returns:
+        Liste des candidats classés (vide si aucun pertinent)
+    """
+    if plan is None:
+        plan = build_query_plan(job_description)
+
+    # Termes de la requête: mots-clés étendus, langues et variantes des rôles demandés
+    query_terms = set()
+    for text in list(plan.extended_keywords) + list(plan.languages) + list(plan.role_terms):
+        query_terms.update(TOKEN_PATTERN.findall(text))
+    for role in plan.requested_roles:
+        query_terms.update(ROLE_KEYWORDS.get(role, []))
+
+    scores = get_bm25_index(cv_data).score(query_terms)
+    experience = get_candidate_index(cv_data, INDEX_WARM_TERMS).experience
+    selected = np.flatnonzero((scores > 0) & (experience >= plan.min_experience))
+    partial_matches = int((scores > 0).sum())
+    if len(selected) == 0:
+        print("ℹ️  BM25: aucun candidat ne contient les termes recherchés")
+        if diagnostics is not None:
+            diagnostics['partial_matches'] = diagnostics['near_misses'] = partial_matches
+        return []
+
+    top_rows = selected[np.lexsort((selected, -scores[selected]))][:num_candidates]
+    matched = []
+    for row in top_rows:
+        match_score = min(int(round(100 * scores[row] / BM25_FULL_MATCH_SCORE)), 100)
+        if match_score < MINIMUM_MATCH_SCORE:
+            break
+        candidate = cv_data[row]
+        found = sorted(query_terms & set(document_terms(candidate)))
+        matched.append(MatchResult(
+            candidate, match_score,
+            f"✓ BM25: {', '.join(found)} | ✓ {candidate.get('experience', 0)} ans exp.",
+        ))
+    if diagnostics is not None:
+        diagnostics['partial_matches'] = partial_matches
+        diagnostics['near_misses'] = partial_matches - len(matched)
+    return matched
+
+
+def _keyword_match(candidate: Dict, row: int, scores: Dict, plan: QueryPlan) -> MatchResult:
+    """Candidat (référencé, non copié) avec son score et sa raison mots-clés."""
+    candidate_experience = candidate.get('experience', 0)
+    # Bonus calculé sur l'expérience numérique (même conversion que l'index)
+    bonus = min((experience_value(candidate) - plan.min_experience) * 2, 15)
+    score = int(round(scores['base'][row] + bonus))
+    return MatchResult(
+        candidate, min(score, 100),
+        f"✓ {int(scores['skills'][row])} compétences techniques | ✓ {int(scores['title'][row])} match(s) titre | ✓ {candidate_experience} ans exp.",
+    )
+
+
+def _match_threshold(plan: QueryPlan) -> int:
+    """Seuil adaptatif selon le nombre de critères fournis dans la demande."""
+    threshold = MINIMUM_MATCH_SCORE - (10 if plan.provided_signals <= 1 else 0)
+    if plan.role_only:
+        threshold -= 5
+    return threshold
+
+
+def shortlist_candidates(job_description: str, cv_data: List[Dict], shortlist_size: int,
+                         plan: Optional[QueryPlan] = None) -> List[int]:
+    """
+    Étape de présélection : classe tous les candidats avec le scoring mots-clés.
+    Contrairement à fallback_matching, aucun seuil de score n'est appliqué
+    (le LLM tranche), seules les contraintes dures (expérience, signal, rôle médical).
+    
+    Args:
+        job_description: Description du poste recherché
+        cv_data: Liste des CV au format JSON
+        shortlist_size: Nombre maximal de candidats présélectionnés
+        plan: Demande déjà analysée (construite ici si absente)
     
-    return scored_candidates[:num_candidates]
+    Returns:
+        Positions dans cv_data des meilleurs candidats, par score décroissant
+    """
+    if plan is None:
+        plan = build_query_plan(job_description)
+    index = get_candidate_index(cv_data, INDEX_WARM_TERMS)
+    scores = _keyword_scores(index, plan)
+    return _shortlist_rows(scores, shortlist_size)
+
 
+def _shortlist_rows(scores: Dict, shortlist_size: int) -> List[int]:
+    """Positions des candidats éligibles les mieux scorés (ordre de la base en cas d'égalité)."""
+    eligible = np.flatnonzero(scores['eligible'])
+    ranked = eligible[np.lexsort((eligible, -scores['score'][eligible]))]
+    return [int(row) for row in ranked[:shortlist_size]]
 
-def smart_match_candidates(job_description: str, cv_data: List[Dict], num_candidates: int = 4) -> Dict:
+
+def _keyword_scores(index: KeywordLookup, plan: QueryPlan) -> Dict:
+    """
+    Calcule en quelques opérations matricielles les scores mots-clés de tous les candidats.
+
+    Returns:
+        Dict de vecteurs NumPy (un élément par candidat):
+        - 'score': score total (bonus d'expérience inclus)
+        - 'base': score hors bonus d'expérience
+        - 'skills' / 'title' / 'langs': nombre de correspondances par signal
+        - 'eligible': expérience suffisante, au moins 1 signal, contrainte médicale respectée
+    """
+    requested_roles = plan.requested_roles
+    min_experience = plan.min_experience
+    keywords = sorted(plan.extended_keywords)
+    # Bonus fort pour technologies clés, bonus standard pour les autres compétences
+    skill_weights = np.array([30 if k in MAIN_TECHNOLOGIES else 20 for k in keywords], dtype=np.int64)
+
+    skill_matrix = index.keyword_matrix('competences', keywords)
+    title_matrix = index.keyword_matrix('poste', keywords)
+    formation_matrix = index.keyword_matrix('formation', keywords)
+    lang_matrix = index.keyword_matrix('langues', sorted(plan.languages))
+
+    skills = skill_matrix.sum(axis=0)
+    title = title_matrix.sum(axis=0)
+    langs = lang_matrix.sum(axis=0)
+
+    # Si la requête implique un rôle, ne compter que les variantes de CE(S) rôle(s)
+    role_variants = {v for r in requested_roles for v in ROLE_KEYWORDS.get(r, [])}
+    role_in_title = index.any_mask('poste', role_variants)
+    title = title + role_in_title
+
+    # Bonus titre, termes de rôle explicites dans le poste, formation et langues
+    role_terms_in_title = index.any_mask('poste', plan.role_terms)
+    base = (skill_weights @ skill_matrix
+            + 15 * title
+            + 15 * role_terms_in_title
+            + 5 * formation_matrix.sum(axis=0)
+            + 10 * langs)
+
+    # ✅ Expérience minimale requise (masque) + bonus si elle dépasse le minimum (max 15 points)
+    experience = index.experience
+    eligible = experience >= min_experience
+    score = base + np.minimum((experience - min_experience) * 2, 15)
+
+    # ❗ Exiger au moins 1 signal pertinent parmi (titre, compétences, langues)
+    eligible &= (skills > 0) | (title > 0) | (langs > 0)
+
+    # Cas stricte: si un rôle médical est explicitement demandé, exiger présence dans le titre
+    if 'medecin' in requested_roles:
+        eligible &= index.any_mask('poste', ROLE_KEYWORDS['medecin'])
+
+    return {
+        'score': score,
+        'base': base,
+        'skills': skills,
+        'title': title,
+        'langs': langs,
+        'eligible': eligible,
+    }
+
+
+def _fill_diagnostics(diagnostics: Dict, index: KeywordLookup, plan: QueryPlan, scores: Dict) -> None:
+    """
+    Complète `diagnostics` à partir des scores déjà calculés et de l'index.
+
+    - 'partial_matches': profils dont les compétences ou le poste contiennent
+      au moins un mot (> 3 lettres) de la demande
+    - 'near_misses': profils avec au moins un signal (compétence, titre, langue)
+      mais écartés (seuil de score, expérience minimale ou contrainte de rôle)
+    """
+    words = {word for word in plan.words if len(word) > 3}
+    partial = index.any_mask('competences', words) | index.any_mask('poste', words)
+    has_signal = (scores['skills'] > 0) | (scores['title'] > 0) | (scores['langs'] > 0)
+    selected = scores['eligible'] & (scores['score'] >= _match_threshold(plan))
+    diagnostics['partial_matches'] = int(partial.sum())
+    diagnostics['near_misses'] = int((has_signal & ~selected).sum())
+
+
+def smart_match_candidates(job_description: str, cv_data: List[Dict], num_candidates: int = 4,
+                           engine: Optional[str] = None) -> Dict:
     """
     NOUVELLE FONCTION: Matching intelligent avec analyse de pertinence
     
+    Args:
+        cv_data: Liste des CV (ignorée par le moteur "snapshot", qui lit l'instantané de la base)
+        engine: "ollama", "bm25", "keywords" ou "snapshot" (MATCHING_ENGINE par défaut)
+    
     Returns:
         Dict avec:
         - 'candidates': Liste des candidats matchés (peut être vide)
         - 'has_results': Boolean indiquant si des candidats pertinents ont été trouvés
+        - 'partial_matches' / 'near_misses': Diagnostic (seulement si aucun résultat)
         - 'reason': Raison si aucun résultat
     """
     
-    matched = match_candidates(job_description, cv_data, num_candidates)
-    
+    plan = build_query_plan(job_description)
+    diagnostics: Dict = {}
+    engine = engine or MATCHING_ENGINE
+    total_in_db = len(cv_data)
+    if engine == "snapshot":
+        snapshot = get_candidate_snapshot()
+        total_in_db = snapshot.size
+        matched = snapshot_matching(job_description, num_candidates, plan, snapshot, diagnostics)
+    elif engine == "bm25":
+        matched = bm25_matching(job_description, cv_data, num_candidates, plan, diagnostics)
+    elif engine == "keywords":
+        matched = fallback_matching(job_description, cv_data, num_candidates, plan, diagnostics)
+    else:
+        matched = match_candidates(job_description, cv_data, num_candidates, plan=plan, diagnostics=diagnostics)
+
     result = {
         'candidates': matched,
         'has_results': len(matched) > 0,
-        'total_in_db': len(cv_data),
-        'requested': num_candidates
+        'total_in_db': total_in_db,
+        'requested': num_candidates,
     }
     
     if not result['has_results']:
-        # Analyser pourquoi aucun résultat
-        keywords = set(word.lower() for word in job_description.lower().split() if len(word) > 3)
-        
-        # Compter les profils qui ont AU MOINS un mot-clé
-        partial_matches = 0
-        for candidate in cv_data:
-            competences = ' '.join(candidate.get('competences', [])).lower()
-            poste = candidate.get('poste', '').lower()
-            text = f"{competences} {poste}"
-            
-            if any(keyword in text for keyword in keywords):
-                partial_matches += 1
-        
+        # Analyser pourquoi aucun résultat (diagnostic collecté pendant le scoring, par chaque moteur)
+        result['partial_matches'] = diagnostics['partial_matches']
+        result['near_misses'] = diagnostics['near_misses']
+        partial_matches = diagnostics['partial_matches']
         if partial_matches == 0:
             result['reason'] = "Aucun profil dans la base ne correspond aux compétences recherchées."
         else:
@@ -482,11 +651,7 @@ def test_ollama_connection() -> bool:
     Returns:
         True si Ollama est accessible, False sinon
     """
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    return get_shared_resources().ollama_available(max_age=0)
 
 
 # ==================== TESTS ====================
@@ -0,0 +1,185 @@
+"""
+Analyse d'une demande recruteur, faite une seule fois par requête.
+Le QueryPlan regroupe tout ce que les étapes de matching (critères, scoring
+mots-clés, filtre de pertinence, diagnostic) et la génération du post
+LinkedIn extraient du texte : expérience, nombre de profils, langues,
+termes de rôle, tokens et mots-clés étendus.
+"""
+
+import re
+from typing import Dict, List
+
+
+# Mots à ignorer (stop words + mots génériques)
+STOP_WORDS = {
+    'recherche', 'cherche', 'besoin', 'rechercher', 'trouver',
+    'développeur', 'développeurs', 'developer', 'dev', 'engineer', 'ingénieur',
+    'candidat', 'candidats', 'profil', 'profils', 'personne',
+    'poste', 'emploi', 'job', 'travail', 'mission',
+    'pour', 'avec', 'dans', 'sur', 'une', 'des', 'les', 'un',
+    'expérimenté', 'expérience', 'senior', 'junior', 'confirmé', 'expert',
+    'ans', 'year', 'years', 'mois', 'month', 'months'
+}
+
+# Variantes de technologies
+KEYWORD_VARIATIONS = {
+    'python': ['python', 'django', 'flask', 'fastapi', 'pydantic', 'pytorch', 'tensorflow'],
+    'javascript': ['javascript', 'js', 'react', 'vue', 'angular', 'node', 'nodejs'],
+    'java': ['java', 'spring', 'hibernate', 'maven', 'gradle'],
+    'data': ['data', 'scientist', 'analyst', 'engineer', 'machine learning', 'ml', 'ai'],
+    'web': ['web', 'frontend', 'backend', 'fullstack', 'full-stack'],
+    'mobile': ['mobile', 'android', 'ios', 'react native', 'flutter'],
+    'cloud': ['cloud', 'aws', 'azure', 'gcp', 'devops', 'kubernetes', 'docker'],
+    'blockchain': ['blockchain', 'solidity', 'web3', 'ethereum', 'crypto', 'smart', 'contract'],
+    'security': ['security', 'cybersecurity', 'cyber', 'secure', 'encryption', 'cryptography'],
+    # Médecine / santé (pour les demandes hors IT)
+    'medecin': ['médecin', 'medecin', 'docteur', 'doctor', 'cardio', 'cardiologie', 'cardiologue', 'cardiovascular', 'cardiovasculaire']
+}
+
+ROLE_KEYWORDS = {
+    'developpeur': ['développeur', 'developpeur', 'developer', 'dev', 'ingénieur', 'ingenieur', 'engineer', 'engineering'],
+    'medecin': ['médecin', 'medecin', 'docteur', 'doctor', 'cardiologue', 'cardio']
+}
+
+# Langues reconnues dans les requêtes
+LANGUAGE_MAP = {
+    'francais': 'français', 'français': 'français', 'french': 'français',
+    'anglais': 'anglais', 'english': 'anglais',
+    'espagnol': 'espagnol', 'spanish': 'espagnol',
+    'arabe': 'arabe', 'arabic': 'arabe',
+    'allemand': 'allemand', 'german': 'allemand'
+}
+
+# Termes de rôle utiles (souples) repérés dans la demande
+ROLE_VARIANTS = [
+    'developpeur', 'développeur', 'developpeurs', 'développeurs', 'developer', 'dev',
+    'software engineer', 'software engineers', 'software engineering',
+    'ingenieur logiciel', 'ingénieur logiciel', 'engineer', 'engineers', 'ingénieur', 'ingenieur', 'ingénieurs', 'ingenieurs',
+    'medecin', 'médecin', 'docteur', 'doctor', 'cardiologue'
+]
+
+# Découpage en tokens (identique à l'index des candidats)
+TOKEN_PATTERN = re.compile(r"[a-zA-ZÀ-ÿ0-9+#]+")
+
+# Années d'expérience: "10+ ans", "10 ans"
+EXPERIENCE_YEARS_PATTERNS = [re.compile(r'(\d+)\+\s*ans'), re.compile(r'(\d+)\s*ans')]
+
+# Niveaux implicites: mot-clé -> années minimales
+EXPERIENCE_LEVELS = [(re.compile(r'senior'), 5), (re.compile(r'expert'), 7)]
+
+# Nombre de candidats demandés (premier motif trouvé)
+COUNT_PATTERNS = [
+    re.compile(r'(\d+)\s*(?:développeurs|ingénieurs|candidats|spécialistes|experts)'),
+    re.compile(r'(?:je\s+veux|cherche|besoin)\s+(\d+)'),
+    re.compile(r'(?:trouver|recruter)\s+(\d+)'),
+]
+
+DEFAULT_MAX_CANDIDATES = 4
+
+# Au-delà, le cache des plans est vidé
+MAX_CACHED_PLANS = 256
+
+
+class QueryPlan:
+    """
+    Demande recruteur analysée une fois, puis transmise à chaque étape.
+
+    Attributs:
+        job_description: Texte d'origine
+        text: Texte en minuscules
+        words: Mots séparés par des espaces
+        tokens: Tokens alphanumériques (même découpage que l'index)
+        min_experience / max_candidates / languages / role_terms: critères extraits
+        keywords: Tokens techniques (> 2 lettres, hors STOP_WORDS)
+        extended_keywords: keywords + variantes de KEYWORD_VARIATIONS
+        requested_roles: Rôles (clés de ROLE_KEYWORDS) demandés ou implicites
+    """
+
+    def __init__(self, job_description: str):
+        self.job_description = job_description
+        self.text = job_description.lower()
+        self.words = tuple(self.text.split())
+        self.tokens = tuple(TOKEN_PATTERN.findall(self.text))
+
+        # Chercher patterns comme "10 ans", "5+ ans", "senior" etc
+        min_experience = 0
+        for pattern in EXPERIENCE_YEARS_PATTERNS:
+            match = pattern.search(self.text)
+            if match:
+                min_experience = max(min_experience, int(match.group(1)))
+        for pattern, years in EXPERIENCE_LEVELS:
+            if pattern.search(self.text):
+                min_experience = max(min_experience, years)
+        self.min_experience = min_experience
+
+        # Chercher le nombre de candidats
+        self.max_candidates = DEFAULT_MAX_CANDIDATES
+        for pattern in COUNT_PATTERNS:
+            match = pattern.search(self.text)
+            if match:
+                self.max_candidates = int(match.group(1))
+                break
+
+        # Détecter les langues demandées dans la requête
+        languages: List[str] = []
+        for k, v in LANGUAGE_MAP.items():
+            if k in self.text and v not in languages:
+                languages.append(v)
+        self.languages = tuple(languages)
+        self.role_terms = tuple(r for r in ROLE_VARIANTS if r in self.text)
+
+        # Mots-clés techniques uniquement (> 2 lettres et pas dans stop words)
+        self.keywords = frozenset(t for t in self.tokens if len(t) > 2 and t not in STOP_WORDS)
+        extended_keywords = set(self.keywords)
+        for keyword in self.keywords:
+            if keyword in KEYWORD_VARIATIONS:
+                extended_keywords.update(KEYWORD_VARIATIONS[keyword])
+        self.extended_keywords = frozenset(extended_keywords)
+
+        # Rôles explicitement demandés (prioritaires), sinon rôles implicites
+        sources = set(self.role_terms) if self.role_terms else self.extended_keywords
+        self.requested_roles = frozenset(
+            role for role, variants in ROLE_KEYWORDS.items() if any(v in sources for v in variants)
+        )
+
+    @property
+    def provided_signals(self) -> int:
+        """Nombre de types de critères fournis (mots-clés, rôle, langues)."""
+        return sum(1 for signal in (self.extended_keywords, self.role_terms, self.languages) if signal)
+
+    @property
+    def role_only(self) -> bool:
+        """Vrai si la demande ne contient qu'un rôle (ni compétence ni langue)."""
+        return bool(self.role_terms) and not self.extended_keywords and not self.languages
+
+    def criteria(self) -> Dict:
+        """Critères au format historique d'extract_criteria_from_request."""
+        return {
+            'min_experience': self.min_experience,
+            'max_candidates': self.max_candidates,
+            'required_keywords': [],
+            'languages': list(self.languages),
+            'role_terms': list(self.role_terms),
+        }
+
+
+_plan_cache: Dict[str, QueryPlan] = {}
+
+
+def build_query_plan(job_description: str) -> QueryPlan:
+    """
+    Retourne le QueryPlan d'une demande (analysée une seule fois par texte).
+
+    Args:
+        job_description: Description de la recherche de candidat
+
+    Returns:
+        QueryPlan partagé (à traiter en lecture seule)
+    """
+    plan = _plan_cache.get(job_description)
+    if plan is None:
+        if len(_plan_cache) >= MAX_CACHED_PLANS:
+            _plan_cache.clear()
+        plan = QueryPlan(job_description)
+        _plan_cache[job_description] = plan
+    return plan
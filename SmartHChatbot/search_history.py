@@ -0,0 +1,259 @@
+"""
+Historique des recherches en journal append-only.
+
+Chaque recherche est une ligne JSON de data/search_history.jsonl qui référence les
+candidats par id, sans copier leur profil. L'index data/search_history.idx
+(horodatage + position de la ligne, 16 octets par recherche) permet de relire une
+période ou la dernière recherche sans parcourir le journal.
+L'ancien fichier data/search_history.json est importé une seule fois.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+
+SEARCH_LOG_FILE = 'data/search_history.jsonl'
+SEARCH_INDEX_FILE = 'data/search_history.idx'
+LEGACY_HISTORY_FILE = 'data/search_history.json'
+
+# Une entrée d'index par recherche: horodatage (secondes) et position dans le journal
+INDEX_DTYPE = np.dtype([('timestamp', '<i8'), ('offset', '<i8')])
+
+DATE_FORMAT = '%d/%m/%Y'
+TIME_FORMAT = '%H:%M:%S'
+
+
+def _timestamp(entry: Dict) -> int:
+    """Horodatage d'une entrée à partir de ses champs date/time (0 si illisibles)."""
+    try:
+        when = datetime.strptime(f"{entry.get('date', '')} {entry.get('time', '')}", f"{DATE_FORMAT} {TIME_FORMAT}")
+    except ValueError:
+        return 0
+    return int(when.timestamp())
+
+
+def derived_paths(log_path: str) -> Dict[str, str]:
+    """
+    Chemins de l'index et de l'ancien JSON associés à un journal
+    (data/x.jsonl -> data/x.idx et data/x.json).
+    """
+    base = log_path[:-len('.jsonl')] if log_path.endswith('.jsonl') else log_path
+    return {'index': base + '.idx', 'legacy': base + '.json'}
+
+
+def _ids(candidates: Iterable[Mapping]) -> List:
+    return [c.get('id') for c in candidates]
+
+
+class SearchHistory:
+    """Journal des recherches et son index horodaté."""
+
+    def __init__(self, log_path: str = SEARCH_LOG_FILE, index_path: Optional[str] = None,
+                 legacy_path: Optional[str] = None):
+        """
+        Args:
+            log_path: Journal des recherches
+            index_path: Index horodaté (déduit de log_path si absent, voir derived_paths)
+            legacy_path: Ancien historique JSON à importer (déduit de log_path si absent)
+        """
+        paths = derived_paths(log_path)
+        self.log_path = log_path
+        self.index_path = index_path or paths['index']
+        self.legacy_path = legacy_path or paths['legacy']
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        self.migrate_from_json()
+
+    # ==================== MIGRATION ====================
+    def migrate_from_json(self) -> int:
+        """
+        Importe l'ancien historique JSON (une seule fois: le journal existe ensuite).
+
+        Returns:
+            Nombre de recherches importées
+        """
+        with self._lock:
+            if os.path.exists(self.log_path):
+                return 0
+            history = []
+            if os.path.exists(self.legacy_path):
+                try:
+                    with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                        history = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Import impossible depuis {self.legacy_path}: {e}")
+            entries = []
+            for old in history:
+                entries.append({
+                    'date': old.get('date', ''),
+                    'time': old.get('time', ''),
+                    'description': old.get('description', ''),
+                    'num_candidates_requested': old.get('num_candidates_requested', 0),
+                    'num_results': old.get('num_results', len(old.get('candidates', []))),
+                    'candidate_ids': _ids(old.get('candidates', [])),
+                    'match_scores': [c.get('match_score') for c in old.get('candidates', [])],
+                    'selected_emails': list(old.get('selected_candidates') or []),
+                })
+            self._write_lines(entries)
+        if entries:
+            print(f"✅ {len(entries)} recherches importées de {self.legacy_path} vers {self.log_path}")
+        return len(entries)
+
+    # ==================== ÉCRITURE ====================
+    def record(self, description: str, num_requested: int, candidates: Iterable[Mapping],
+               selected: Iterable[Mapping] = (), when: Optional[datetime] = None) -> Dict:
+        """
+        Ajoute une recherche au journal (une ligne, sans réécrire l'historique).
+
+        Args:
+            description: Demande du recruteur
+            num_requested: Nombre de candidats demandés
+            candidates: Candidats retournés (seuls id et match_score sont conservés)
+            selected: Candidats déjà sélectionnés, le cas échéant (seul l'email est conservé)
+            when: Date de la recherche (maintenant par défaut)
+
+        Returns:
+            Entrée enregistrée
+        """
+        when = when or datetime.now()
+        candidates = list(candidates)
+        entry = {
+            'date': when.strftime(DATE_FORMAT),
+            'time': when.strftime(TIME_FORMAT),
+            'description': description,
+            'num_candidates_requested': num_requested,
+            'num_results': len(candidates),
+            'candidate_ids': _ids(candidates),
+            'match_scores': [c.get('match_score') for c in candidates],
+            'selected_emails': [c.get('email') for c in selected],
+        }
+        with self._lock:
+            self._index()  # rattrape un éventuel retard de l'index avant d'ajouter
+            self._write_lines([entry])
+        return entry
+
+    def _write_lines(self, entries: List[Dict]) -> None:
+        """Ajoute des lignes au journal puis leurs entrées d'index (appelé sous _lock)."""
+        records = np.zeros(len(entries), dtype=INDEX_DTYPE)
+        with open(self.log_path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for i, entry in enumerate(entries):
+                line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+                records[i] = (_timestamp(entry), offset)
+                f.write(line)
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, 'ab') as f:
+            f.write(records.tobytes())
+
+    # ==================== INDEX ====================
+    def _index(self) -> np.ndarray:
+        """
+        Index complet du journal. Les lignes non indexées (arrêt entre l'écriture
+        du journal et celle de l'index) sont rattrapées ici.
+        """
+        try:
+            index = np.fromfile(self.index_path, dtype=INDEX_DTYPE)
+        except (OSError, ValueError):
+            index = np.zeros(0, dtype=INDEX_DTYPE)
+        try:
+            log_size = os.path.getsize(self.log_path)
+        except OSError:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        if len(index) and index['offset'][-1] >= log_size:
+            # Index d'un autre journal: reconstruction complète
+            index = np.zeros(0, dtype=INDEX_DTYPE)
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+        missing = []
+        with open(self.log_path, 'rb') as f:
+            if len(index):
+                f.seek(int(index['offset'][-1]))
+                f.readline()
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break  # fin du journal (ou ligne en cours d'écriture)
+                try:
+                    missing.append((_timestamp(json.loads(line)), offset))
+                except ValueError:
+                    continue
+        if missing:
+            added = np.array(missing, dtype=INDEX_DTYPE)
+            with open(self.index_path, 'ab') as f:
+                f.write(added.tobytes())
+            index = np.concatenate([index, added])
+        return index
+
+    # ==================== LECTURE ====================
+    def _read_at(self, f, offset: int) -> Dict:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    def iter_entries(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Parcourt les recherches une à une, dans l'ordre d'enregistrement.
+
+        Args:
+            start: Inclure les recherches à partir de cette date
+            end: Exclure les recherches à partir de cette date
+
+        Yields:
+            Entrées de l'historique
+        """
+        with self._lock:
+            index = self._index()
+        mask = np.ones(len(index), dtype=bool)
+        if start is not None:
+            mask &= index['timestamp'] >= int(start.timestamp())
+        if end is not None:
+            mask &= index['timestamp'] < int(end.timestamp())
+        with open(self.log_path, 'rb') as f:
+            for offset in index['offset'][mask]:
+                yield self._read_at(f, int(offset))
+
+    def count(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Nombre de recherches sur la période (lu dans l'index seul)."""
+        with self._lock:
+            timestamps = self._index()['timestamp']
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= int(start.timestamp())
+        if end is not None:
+            mask &= timestamps < int(end.timestamp())
+        return int(mask.sum())
+
+    def last(self) -> Optional[Dict]:
+        """Dernière recherche enregistrée (None si l'historique est vide)."""
+        with self._lock:
+            index = self._index()
+        if not len(index):
+            return None
+        with open(self.log_path, 'rb') as f:
+            return self._read_at(f, int(index['offset'][-1]))
+
+
+_histories: Dict[str, SearchHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_search_history(path: str = SEARCH_LOG_FILE) -> SearchHistory:
+    """
+    Retourne l'historique des recherches (importé depuis l'ancien JSON au premier appel).
+    L'index et l'ancien JSON sont à côté du journal `path` (voir derived_paths).
+    """
+    key = os.path.abspath(path)
+    with _histories_lock:
+        history = _histories.get(key)
+        if history is None:
+            history = SearchHistory(path)
+            _histories[key] = history
+        return history
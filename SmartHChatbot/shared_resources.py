@@ -0,0 +1,140 @@
+"""
+Ressources partagées par toutes les sessions du processus (Streamlit, bot Teams).
+
+Chaque session garde son ChatbotEngine (contexte de conversation), mais ce qui
+coûte à préparer n'est fait qu'une fois par processus :
+- le cache des candidats et les index de matching (préchauffés par warm_up) ;
+- le client HTTP d'Ollama, dont les connexions sont réutilisées (keep-alive) ;
+- l'état de santé d'Ollama, revérifié au plus toutes les OLLAMA_HEALTH_TTL
+  secondes : s'il est arrêté, les appels LLM passent directement au fallback
+  au lieu d'attendre un échec de connexion ;
+- l'instance LinkedIn OAuth.
+"""
+
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from candidate_repository import CandidateRepository, get_candidate_repository
+
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+
+# Durée de validité de l'état de santé d'Ollama (secondes)
+OLLAMA_HEALTH_TTL = 30
+OLLAMA_HEALTH_TIMEOUT = 2
+
+# Import LinkedIn OAuth avec gestion d'erreur
+_linkedin_oauth = None
+try:
+    from linkedin_oauth import linkedin_oauth as _imported_oauth
+    _linkedin_oauth = _imported_oauth
+except Exception as e:  # pragma: no cover
+    print(f"⚠️ Erreur import linkedin_oauth: {e}")
+    _linkedin_oauth = None
+
+
+class SharedResources:
+    """Ressources du processus, construites une fois et réutilisées par toutes les sessions."""
+
+    def __init__(self, health_ttl: float = OLLAMA_HEALTH_TTL):
+        self.health_ttl = health_ttl
+        # Client HTTP des appels LLM: pool de connexions partagé entre threads
+        self.http = requests.Session()
+        self._ollama_available: Optional[bool] = None
+        self._ollama_checked = 0.0
+        self._lock = threading.Lock()
+        self._warm_thread: Optional[threading.Thread] = None
+
+    @property
+    def candidates(self) -> CandidateRepository:
+        return get_candidate_repository()
+
+    @property
+    def linkedin_oauth(self):
+        """Instance LinkedIn OAuth (ou None si indisponible)."""
+        return _linkedin_oauth
+
+    # ==================== SANTÉ D'OLLAMA ====================
+    def ollama_available(self, max_age: Optional[float] = None) -> bool:
+        """
+        Indique si Ollama répond, sans le réinterroger tant que l'état est récent.
+
+        Args:
+            max_age: Âge maximal de l'état en secondes (health_ttl par défaut, 0 = vérifier)
+
+        Returns:
+            True si Ollama est joignable
+        """
+        max_age = self.health_ttl if max_age is None else max_age
+        with self._lock:
+            if self._ollama_available is not None and time.monotonic() - self._ollama_checked < max_age:
+                return self._ollama_available
+        try:
+            response = self.http.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=OLLAMA_HEALTH_TIMEOUT)
+            available = response.status_code == 200
+        except requests.exceptions.RequestException:
+            available = False
+        self.record_ollama(available)
+        return available
+
+    def record_ollama(self, available: bool) -> None:
+        """Met à jour l'état d'Ollama d'après le résultat d'un appel (réussi ou connexion refusée)."""
+        with self._lock:
+            if available != self._ollama_available:
+                print(f"{'✅ Ollama disponible' if available else '⚠️ Ollama indisponible, réponses de secours'}")
+            self._ollama_available = available
+            self._ollama_checked = time.monotonic()
+
+    # ==================== PRÉCHAUFFAGE ====================
+    def warm_up(self, background: bool = True) -> None:
+        """
+        Charge les candidats, construit les index de matching et vérifie Ollama
+        (une seule fois par processus).
+
+        Args:
+            background: Préchauffer dans un thread (la première page s'affiche sans attendre)
+        """
+        with self._lock:
+            if self._warm_thread is not None:
+                return
+            self._warm_thread = threading.Thread(target=self._warm_up, name='shared-warm-up', daemon=True)
+        if background:
+            self._warm_thread.start()
+        else:
+            self._warm_thread.run()
+
+    def _warm_up(self) -> None:
+        from bm25_index import get_bm25_index
+        from candidate_index import get_candidate_index
+        from candidate_snapshot import get_candidate_snapshot
+        from matching import INDEX_WARM_TERMS, MATCHING_ENGINE
+
+        started = time.perf_counter()
+        try:
+            if MATCHING_ENGINE == "snapshot":
+                get_candidate_snapshot()
+            else:
+                cv_data = self.candidates.candidates()
+                get_candidate_index(cv_data, INDEX_WARM_TERMS)
+                if MATCHING_ENGINE == "bm25":
+                    get_bm25_index(cv_data)
+        except Exception as e:
+            print(f"⚠️ Préchauffage des candidats impossible: {e}")
+        self.ollama_available()
+        print(f"🔥 Ressources partagées prêtes en {time.perf_counter() - started:.2f}s")
+
+
+_resources: Optional[SharedResources] = None
+_resources_lock = threading.Lock()
+
+
+def get_shared_resources() -> SharedResources:
+    """Retourne les ressources partagées du processus (créées au premier appel)."""
+    global _resources
+    with _resources_lock:
+        if _resources is None:
+            _resources = SharedResources()
+        return _resources
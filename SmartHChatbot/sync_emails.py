@@ -7,7 +7,12 @@ Récupère les CVs, les traite avec l'IA et les ajoute à la base de données
 
 import json
 from email_receiver import connect_to_email, fetch_cv_emails, mark_email_as_processed
-from cv_extractor import extract_text_from_file, extract_cv_data_with_ai, add_candidate_to_database
+from cv_extractor import extract_text_from_file, extract_cv_data_with_ai, add_candidates_to_database
+from bm25_index import compact_bm25_index_in_background
+from candidate_dedup import content_fingerprint
+from candidate_store import get_candidate_store
+from cv_minhash import NEAR_DUPLICATE_THRESHOLD, estimated_similarity, minhash_signature
+from job_runner import report_progress
 from typing import Dict, List
 
 def sync_emails_with_database(email_address: str, app_password: str, imap_server: str = "imap.gmail.com") -> Dict:
@@ -38,6 +43,7 @@ def sync_emails_with_database(email_address: str, app_password: str, imap_server
     
     # Étape 1: Connexion
     print("\n1️⃣  Connexion à la boîte mail...")
+    report_progress(0.0, "📡 Connexion à la boîte mail...")
     mail = connect_to_email(email_address, app_password, imap_server)
     
     if not mail:
@@ -50,6 +56,7 @@ def sync_emails_with_database(email_address: str, app_password: str, imap_server
     
     # Étape 2: Récupérer les emails
     print("\n2️⃣  Récupération des emails avec CVs...")
+    report_progress(0.05, "📬 Récupération des emails avec CVs...")
     print("   🔍 Recherche uniquement les emails NON LUS...")
     emails = fetch_cv_emails(mail, unread_only=True)
     print(f"   ✅ {len(emails)} email(s) avec pièces jointes trouvé(s)")
@@ -63,8 +70,14 @@ def sync_emails_with_database(email_address: str, app_password: str, imap_server
     # Étape 3: Traiter chaque email
     print("\n3️⃣  Traitement des CVs avec l'IA...")
     
+    # Candidats à ajouter, écrits ensemble à la fin (une seule transaction pour tout l'import)
+    pending = []
+    pending_fingerprints = set()
+    processed_msg_ids = []
+    
     for idx, email_data in enumerate(emails, 1):
         print(f"\n   📨 Email {idx}/{len(emails)}")
+        report_progress(0.1 + 0.85 * (idx - 1) / len(emails), f"🤖 Analyse des CVs: email {idx}/{len(emails)}")
         print(f"      De: {email_data['sender_name']} ({email_data['sender_email']})")
         print(f"      Sujet: {email_data['subject'][:50]}...")
         print(f"      Pièces jointes: {len(email_data['attachments'])}")
@@ -85,6 +98,20 @@ def sync_emails_with_database(email_address: str, app_password: str, imap_server
                     continue
                 
                 summary['cvs_processed'] += 1
+
+                # CV quasi identique à un CV déjà reçu: inutile de repayer l'analyse IA
+                signature = minhash_signature(cv_text)
+                near_duplicates = get_candidate_store().find_near_duplicates(signature)
+                if near_duplicates:
+                    candidate_id, similarity = near_duplicates[0]
+                    print(f"         ℹ️  CV quasi identique à celui du candidat ID {candidate_id} ({similarity:.0%}), analyse IA ignorée")
+                    summary['errors'].append(f"{filename}: CV quasi identique (candidat ID {candidate_id})")
+                    continue
+                # ... ou à un CV de cette synchro, pas encore écrit en base
+                if any(estimated_similarity(signature, other) >= NEAR_DUPLICATE_THRESHOLD for _, other in pending):
+                    print(f"         ℹ️  CV quasi identique à un CV déjà reçu pendant cette synchronisation, analyse IA ignorée")
+                    summary['errors'].append(f"{filename}: CV quasi identique (reçu pendant cette synchronisation)")
+                    continue
                 
                 # Étape 3b: Analyser avec l'IA
                 print(f"         🤖 Analyse avec l'IA...")
@@ -114,38 +141,58 @@ def sync_emails_with_database(email_address: str, app_password: str, imap_server
                 
                 # Étape 3c: Vérifier si le candidat existe déjà
                 from cv_extractor import candidate_exists
-                if candidate_exists(cv_data):
+                fingerprint = content_fingerprint(cv_data)
+                if fingerprint in pending_fingerprints or candidate_exists(cv_data):
                     print(f"         ℹ️  Candidat déjà présent (doublon)")
                     summary['errors'].append(f"{filename}: Candidat déjà présent")
                     continue
+
+                # Profil proche (même email, téléphone ou nom): signalé, mais ajouté
+                similar = get_candidate_store().possible_duplicates(cv_data)
+                if similar:
+                    details = ", ".join(f"{kind} = ID {candidate_id}" for kind, candidate_id in similar)
+                    print(f"         ℹ️  Profil proche déjà en base ({details})")
                 
-                # Étape 3d: Ajouter à la base de données
-                print(f"         💾 Ajout à la base de données...")
-                if add_candidate_to_database(cv_data):
-                    print(f"         ✅ {cv_data['prenom']} {cv_data['nom']} ajouté(e)")
-                    summary['cvs_added'] += 1
-                    summary['candidates_added'].append({
-                        'nom': cv_data['nom'],
-                        'prenom': cv_data['prenom'],
-                        'email': cv_data['email'],
-                        'poste': cv_data['poste']
-                    })
-                else:
-                    print(f"         ❌ Erreur lors de l'ajout")
-                    summary['errors'].append(f"{filename}: Erreur lors de l'ajout à la BD")
+                # Étape 3d: Ajout à la base, regroupé avec les autres CVs de la synchro
+                pending.append((cv_data, signature))
+                pending_fingerprints.add(fingerprint)
+                print(f"         📥 {cv_data.get('prenom')} {cv_data.get('nom')} prêt(e) pour l'ajout")
             
             except Exception as e:
                 print(f"         ❌ Erreur: {str(e)[:50]}")
                 summary['errors'].append(f"{filename}: {str(e)}")
         
-        # Marquer l'email comme traité
+        processed_msg_ids.append(email_data['msg_id'])
+    
+    # Étape 4: Ajouter tous les candidats en une seule transaction
+    if pending:
+        print(f"\n4️⃣  Ajout de {len(pending)} candidat(s) à la base de données...")
+        report_progress(0.95, "💾 Ajout des candidats à la base...")
+        for (cv_data, _), added in zip(pending, add_candidates_to_database(pending)):
+            if added:
+                summary['cvs_added'] += 1
+                summary['candidates_added'].append({
+                    'nom': cv_data['nom'],
+                    'prenom': cv_data['prenom'],
+                    'email': cv_data['email'],
+                    'poste': cv_data['poste']
+                })
+            else:
+                summary['errors'].append(f"{cv_data.get('prenom')} {cv_data.get('nom')}: Erreur lors de l'ajout à la BD")
+    
+    # Marquer les emails comme traités, une fois leurs candidats écrits
+    for msg_id in processed_msg_ids:
         try:
-            mark_email_as_processed(mail, email_data['msg_id'])
+            mark_email_as_processed(mail, msg_id)
         except:
             pass
     
     # Fermer la connexion
     mail.close()
+
+    # Fusionner les ajouts journalisés dans l'index BM25, sans faire attendre l'appelant
+    if summary['cvs_added']:
+        compact_bm25_index_in_background()
     
     # Afficher le résumé
     print("\n" + "="*70)
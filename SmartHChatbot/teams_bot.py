@@ -8,9 +8,10 @@ import asyncio
 import json
 from flask import Flask, request, Response
 from botbuilder.core import TurnContext, BotAdapter, InvokeResponse
-from botbuilder.schema import Activity, ActivityTypes, ChannelAccount
+from botbuilder.schema import Activity, ActivityTypes, ActionTypes, CardAction, ChannelAccount, SuggestedActions
 from dotenv import load_dotenv
-from chatbot_engine import ChatbotEngine
+from chatbot_engine import BACKGROUND_ACTIONS, ChatbotEngine
+from shared_resources import get_shared_resources
 
 load_dotenv()
 
@@ -24,8 +25,10 @@ if APP_PASSWORD:
 else:
     print("🔑 APP_PASSWORD: NON DEFINI")
 
-# Initialiser le chatbot
-chatbot = ChatbotEngine()
+# Un chatbot (contexte de conversation) par utilisateur Teams ;
+# candidats, index et état d'Ollama partagés et préchauffés en arrière-plan
+user_engines = {}
+get_shared_resources().warm_up()
 
 app = Flask(__name__)
 
@@ -33,6 +36,16 @@ app = Flask(__name__)
 last_responses = []
 last_request = None
 
+# Travaux en arrière-plan de chaque utilisateur (actions longues lancées depuis Teams)
+pending_jobs = {}
+
+
+def get_user_engine(user_id: str) -> ChatbotEngine:
+    """Retourne le chatbot de l'utilisateur (créé à son premier message)."""
+    if user_id not in user_engines:
+        user_engines[user_id] = ChatbotEngine()
+    return user_engines[user_id]
+
 
 class SimpleAdapter(BotAdapter):
     """Adaptateur personnalisé sans validation JWT"""
@@ -67,6 +80,46 @@ ADAPTER = SimpleAdapter()
 
 
 
+def pending_job_text(user_id: str) -> str:
+    """Texte des résultats des travaux terminés de l'utilisateur, puis de l'avancement de ceux en cours."""
+    finished, running = [], []
+    chatbot = get_user_engine(user_id)
+    for job_id in list(pending_jobs.get(user_id, [])):
+        state = chatbot.poll_job(job_id)
+        if not state["finished"]:
+            step = state["progress_message"] or "Traitement en cours..."
+            running.append(f"⏳ {step} ({state['progress']:.0%})")
+            continue
+        pending_jobs[user_id].remove(job_id)
+        job_result = state["result"]
+        lines = [job_result.get("message", "")]
+        for idx, candidate in enumerate(job_result.get("data", {}).get("matched_candidates", []), 1):
+            lines.append(
+                f"{idx}. {candidate.get('prenom', '')} {candidate.get('nom', '')} - "
+                f"{candidate.get('poste', 'N/A')} ({candidate.get('match_score', '?')}%)"
+            )
+        finished.append("\n".join(lines))
+    if not pending_jobs.get(user_id):
+        pending_jobs.pop(user_id, None)
+    return "\n\n".join(finished + running)
+
+
+def suggested_actions(actions):
+    """Boutons Teams des actions proposées par le chatbot (renvoyées en messageBack)."""
+    if not actions:
+        return None
+    return SuggestedActions(actions=[
+        CardAction(
+            type=ActionTypes.message_back,
+            title=item["label"],
+            text=item["label"],
+            display_text=item["label"],
+            value={"action": item["action"]},
+        )
+        for item in actions
+    ])
+
+
 async def on_message_activity(context: TurnContext):
     """Traiter les messages"""
     try:
@@ -75,9 +128,26 @@ async def on_message_activity(context: TurnContext):
         
         print(f"📩 Message de {user_id}: {user_message}")
         
-        # Obtenir la réponse du chatbot
-        result = chatbot.process_message(user_message)
-        response_text = result.get("response", "Je n'ai pas compris votre message.")
+        chatbot = get_user_engine(user_id)
+        
+        # Résultat (ou avancement) des actions lancées aux messages précédents
+        job_text = pending_job_text(user_id)
+        
+        # Bouton d'action cliqué (messageBack): {"action": ..., "params": {...}}
+        value = context.activity.value if isinstance(context.activity.value, dict) else {}
+        action = value.get("action")
+        if action:
+            # Les actions longues tournent en arrière-plan: accusé immédiat, résultat au prochain message
+            result = chatbot.execute_action(action, value.get("params") or {}, background=True)
+            if action in BACKGROUND_ACTIONS and "job_id" in result.get("data", {}):
+                pending_jobs.setdefault(user_id, []).append(result["data"]["job_id"])
+            response_text = result.get("message") or "✅ Action effectuée."
+        else:
+            # Obtenir la réponse du chatbot
+            result = chatbot.process_message(user_message)
+            response_text = result.get("response") or "Je n'ai pas compris votre message."
+        if job_text:
+            response_text = f"{job_text}\n\n{response_text}"
         
         print(f"✅ Réponse générée: {response_text}")
         
@@ -97,7 +167,8 @@ async def on_message_activity(context: TurnContext):
             from_property=ChannelAccount(
                 id=context.activity.recipient.id if context.activity.recipient else "28:49c10136-0c24-4053-be90-3133bb75ebed",
                 name=context.activity.recipient.name if context.activity.recipient else "SMART-HIRE Bot"
-            )
+            ),
+            suggested_actions=suggested_actions(result.get("actions", []))
         )
         
         # Envoyer la réponse
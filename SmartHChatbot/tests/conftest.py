@@ -0,0 +1,25 @@
+"""
+Configuration pytest : les modules du chatbot sont importés depuis le dossier parent,
+les tests qui écrivent sur disque travaillent dans un dossier temporaire
+(mêmes chemins relatifs data/... que l'application).
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Dossier de travail temporaire avec data/, base de candidats et caches remis à zéro."""
+    import candidate_repository
+    import candidate_store
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    monkeypatch.setattr(candidate_store, '_stores', {})
+    monkeypatch.setattr(candidate_repository, '_repository', candidate_repository.CandidateRepository())
+    return tmp_path
@@ -0,0 +1,133 @@
+import os
+
+import pytest
+
+import bm25_index
+import matching
+from bm25_index import (BM25_INDEX_FILE, BM25_JOURNAL_FILE, BM25Index, add_candidate_to_bm25_index, get_bm25_index,
+                        invalidate_bm25_index)
+from candidate_index import invalidate_candidate_index
+from candidate_repository import get_candidate_repository
+from candidate_store import get_candidate_store
+
+
+def _candidate(name, skills, poste='Développeur'):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': poste,
+            'competences': skills, 'langues': [], 'experience': 3}
+
+
+@pytest.fixture
+def bm25(workdir, monkeypatch):
+    monkeypatch.setattr(bm25_index, '_bm25_cache', {'index': None, 'data': None, 'journal_entries': 0})
+    invalidate_candidate_index()
+    return workdir
+
+
+def test_same_ids_different_content_get_different_indexes(bm25):
+    python = [dict(_candidate('a', ['Python']), id=1), dict(_candidate('b', ['Excel']), id=2)]
+    java = [dict(_candidate('a', ['Java']), id=1), dict(_candidate('b', ['Excel']), id=2)]
+
+    assert get_bm25_index(python).score(['python'])[0] > 0
+    index = get_bm25_index(java)
+    assert index.score(['python'])[0] == 0
+    assert index.score(['java'])[0] > 0
+
+
+def test_in_place_edit_needs_invalidation(bm25):
+    cv_data = [dict(_candidate('a', ['Python']), id=1)]
+    index = get_bm25_index(cv_data)
+    assert get_bm25_index(cv_data) is index
+    cv_data[0]['competences'] = ['Rust']
+    invalidate_bm25_index(cv_data)
+    assert get_bm25_index(cv_data).score(['rust'])[0] > 0
+
+
+def test_only_store_index_is_saved(bm25):
+    get_bm25_index([dict(_candidate('x', ['Java']), id=1)])
+    assert not os.path.exists(BM25_INDEX_FILE)
+
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    cv_data = get_candidate_repository().candidates()
+    index = get_bm25_index(cv_data)
+    assert os.path.exists(BM25_INDEX_FILE)
+    assert get_bm25_index(cv_data) is index
+
+
+def test_added_candidate_goes_to_journal(bm25):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    get_bm25_index(get_candidate_repository().candidates())
+
+    candidate = _candidate('b', ['Go'])
+    previous_source = store.version()
+    store.add_candidate(candidate)
+    add_candidate_to_bm25_index(candidate, previous_source)
+    assert os.path.exists(BM25_JOURNAL_FILE)
+
+    bm25_index._bm25_cache['index'] = None
+    index = get_bm25_index(get_candidate_repository().candidates())
+    assert index.ids == [1, 2]
+    assert index.score(['go'])[1] > 0
+
+
+def test_weak_single_match_is_rejected(bm25):
+    cv_data = [dict(_candidate(f'c{i}', ['Python']), id=i, langues=['Anglais']) for i in range(1, 10)]
+    cv_data.append(dict(_candidate('compta', ['Excel', 'Sage'], poste='Comptable'), id=10, langues=['Anglais']))
+
+    # "anglais" est partagé par tous les profils: le meilleur n'atteint plus 100% d'office
+    assert matching.bm25_matching("anglais", cv_data, 3) == []
+    assert [c['id'] for c in matching.bm25_matching("comptable excel sage", cv_data, 3)] == [10]
+
+
+def test_build_matches_incremental_add():
+    cv_data = [dict(_candidate('a', ['Python']), id=1), dict(_candidate('b', ['Excel']), id=2)]
+    built = BM25Index.build(cv_data)
+    incremental = BM25Index.build(cv_data[:1])
+    incremental.add(cv_data[1])
+    assert built.to_dict() == incremental.to_dict()
+
+
+def test_adds_in_one_writer_batch_keep_the_index(bm25):
+    import threading
+    from candidate_writer import CandidateWriter
+
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    get_bm25_index(get_candidate_repository().candidates())
+
+    writer = CandidateWriter(store, batch_window=0.2)
+    added = [_candidate('b', ['Go']), _candidate('c', ['Rust'])]
+
+    def add(candidate):
+        writer.add_candidate(candidate, on_commit=lambda _, before, after: add_candidate_to_bm25_index(
+            candidate, before, after))
+
+    threads = [threading.Thread(target=add, args=(candidate,)) for candidate in added]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Les deux ajouts sont journalisés: l'instantané n'a pas été supprimé
+    assert os.path.exists(BM25_INDEX_FILE)
+    with open(BM25_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    bm25_index._bm25_cache['index'] = None
+    index = get_bm25_index(get_candidate_repository().candidates())
+    assert index.source == store.version()
+    assert sorted(index.ids) == [1, 2, 3]
+
+
+def test_added_candidate_reuses_index_for_next_version(bm25):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    index = get_bm25_index(get_candidate_repository().candidates())
+
+    candidate = _candidate('b', ['Go'])
+    previous_source = store.version()
+    store.add_candidate(candidate)
+    add_candidate_to_bm25_index(candidate, previous_source)
+
+    assert get_bm25_index(get_candidate_repository().candidates()) is index
+    assert index.ids == [1, 2]
@@ -0,0 +1,101 @@
+import candidate_index
+from candidate_index import candidates_fingerprint, get_candidate_index, invalidate_candidate_index
+from candidate_model import Candidate
+from candidate_repository import get_candidate_repository
+from candidate_store import get_candidate_store
+
+
+def _candidates():
+    return [
+        {'id': 1, 'poste': 'Développeur', 'competences': ['Python'], 'experience': 3},
+        {'id': 2, 'poste': 'Comptable', 'competences': ['Excel'], 'experience': '5'},
+    ]
+
+
+def setup_function():
+    invalidate_candidate_index()
+
+
+def test_index_reused_for_same_list():
+    cv_data = _candidates()
+    assert get_candidate_index(cv_data) is get_candidate_index(cv_data)
+
+
+def test_new_list_gets_its_own_index():
+    first = get_candidate_index(_candidates())
+    other = _candidates()
+    index = get_candidate_index(other)
+    assert index is not first
+    assert index.cv_data is other
+
+
+def test_in_place_edit_needs_invalidation():
+    cv_data = _candidates()
+    index = get_candidate_index(cv_data)
+    assert list(index.rows_containing('competences', 'python')) == [0]
+
+    cv_data[1]['competences'].append('Python')
+    cv_data[0]['experience'] = 7
+    invalidate_candidate_index(cv_data)
+
+    index = get_candidate_index(cv_data)
+    assert list(index.rows_containing('competences', 'python')) == [0, 1]
+    assert list(index.experience) == [7.0, 5.0]
+
+
+def test_append_rebuilds_index():
+    cv_data = _candidates()
+    get_candidate_index(cv_data)
+    cv_data.append({'id': 3, 'poste': 'Développeur', 'competences': ['Python'], 'experience': 1})
+    assert list(get_candidate_index(cv_data).rows_containing('competences', 'python')) == [0, 2]
+
+
+def test_lookup_does_not_hash_the_base(monkeypatch):
+    calls = []
+    monkeypatch.setattr(candidate_index, 'candidates_fingerprint', lambda cv_data: calls.append(1) or 'x')
+    cv_data = _candidates()
+    for _ in range(3):
+        get_candidate_index(cv_data)
+    assert calls == []
+    # L'empreinte (clé du cache de matching) est calculée une fois par index
+    index = get_candidate_index(cv_data)
+    assert index.fingerprint == index.fingerprint == 'x'
+    assert calls == [1]
+
+
+def test_repository_list_rebuilt_after_store_change(workdir):
+    store = get_candidate_store()
+    store.add_candidate({'nom': 'A', 'email': 'a@example.com', 'poste': 'Comptable', 'competences': ['Excel']})
+    repository = get_candidate_repository()
+    first = get_candidate_index(repository.candidates())
+    assert get_candidate_index(repository.candidates()) is first
+
+    store.add_candidate({'nom': 'B', 'email': 'b@example.com', 'poste': 'Développeur', 'competences': ['Python']})
+    index = get_candidate_index(repository.candidates())
+    assert index is not first
+    assert list(index.rows_containing('competences', 'python')) == [1]
+
+
+def test_fingerprint_depends_on_content():
+    cv_data = _candidates()
+    before = candidates_fingerprint(cv_data)
+    assert candidates_fingerprint(_candidates()) == before
+    cv_data[0]['poste'] = 'Data scientist'
+    assert candidates_fingerprint(cv_data) != before
+
+
+def test_fingerprint_of_candidate_list_matches_dicts():
+    frozen = [Candidate(c) for c in _candidates()]
+    assert candidates_fingerprint(frozen) == candidates_fingerprint(_candidates())
+
+
+def test_keyword_lookup_requires_size_and_rows_containing():
+    import pytest
+    from candidate_index import KeywordLookup
+
+    class Incomplete(KeywordLookup):
+        def rows_containing(self, field, keyword):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,99 @@
+from candidate_model import Candidate
+from candidate_repository import CandidateRepository
+from candidate_store import get_candidate_store
+
+
+def _candidate(name, skills):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': 'Développeur',
+            'competences': skills, 'langues': [], 'experience': 2}
+
+
+def test_same_list_until_store_version_changes(workdir):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+
+    first = repository.candidates()
+    assert repository.candidates() is first
+    assert all(isinstance(c, Candidate) for c in first)
+
+    store.add_candidate(_candidate('b', ['Java']))
+    second = repository.candidates()
+    assert second is not first
+    assert [c['nom'] for c in second] == ['a', 'b']
+    # L'ancienne liste n'est pas modifiée (caches indexés dessus encore cohérents)
+    assert [c['nom'] for c in first] == ['a']
+
+
+def test_reload_sees_writes_from_another_store_instance(workdir):
+    from candidate_store import CandidateStore
+
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+    repository.candidates()
+
+    # Autre processus: autre instance sur le même fichier
+    CandidateStore(store.path).add_candidate(_candidate('b', ['Go']))
+    assert [c['nom'] for c in repository.candidates()] == ['a', 'b']
+
+
+def test_added_candidates_read_incrementally(workdir, monkeypatch):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+    first = repository.candidates()
+
+    full_reads = []
+    all_candidates = store.all_candidates
+    monkeypatch.setattr(store, 'all_candidates', lambda: full_reads.append(1) or all_candidates())
+    store.add_candidate(_candidate('b', ['Java']))
+    store.add_candidate(_candidate('c', ['Rust']))
+
+    candidates = repository.candidates()
+    assert full_reads == []
+    assert [c['nom'] for c in candidates] == ['a', 'b', 'c']
+    # Les profils déjà chargés sont réutilisés, pas relus
+    assert candidates[0] is first[0]
+
+
+def test_incomplete_increment_falls_back_to_full_reload(workdir, monkeypatch):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+    repository.candidates()
+
+    store.add_candidate(_candidate('b', ['Java']))
+    monkeypatch.setattr(store, 'candidates_after', lambda last_id: [])
+    assert [c['nom'] for c in repository.candidates()] == ['a', 'b']
+
+
+def test_derived_built_once_per_version(workdir):
+    store = get_candidate_store()
+    store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+    builds = []
+
+    def build(candidates):
+        builds.append(len(candidates))
+        return {c['nom'] for c in candidates}
+
+    assert repository.derived('names', build) == {'a'}
+    assert repository.derived('names', build) == {'a'}
+    assert builds == [1]
+
+    store.add_candidate(_candidate('b', ['Java']))
+    assert repository.derived('names', build) == {'a', 'b'}
+    assert builds == [1, 2]
+
+
+def test_by_id_and_invalidate(workdir):
+    store = get_candidate_store()
+    candidate_id = store.add_candidate(_candidate('a', ['Python']))
+    repository = CandidateRepository(store)
+    assert repository.get(candidate_id)['nom'] == 'a'
+    assert repository.get(candidate_id + 1) is None
+
+    first = repository.candidates()
+    repository.invalidate()
+    assert repository.candidates() is not first
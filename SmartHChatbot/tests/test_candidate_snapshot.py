@@ -0,0 +1,74 @@
+import gc
+import os
+import weakref
+
+import pytest
+
+import candidate_snapshot
+import matching
+from candidate_snapshot import get_candidate_snapshot, snapshot_path
+from candidate_store import get_candidate_store
+
+
+def _candidate(name, skills, experience=3):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': 'Développeur Python',
+            'competences': skills, 'langues': ['Anglais'], 'experience': experience}
+
+
+@pytest.fixture
+def store(workdir, monkeypatch):
+    monkeypatch.setattr(candidate_snapshot, '_snapshot_cache', {'snapshot': None})
+    monkeypatch.setattr(candidate_snapshot, '_open_snapshots', weakref.WeakValueDictionary())
+    store = get_candidate_store()
+    store.add_candidate(_candidate('alami', ['Python', 'Django'], 5))
+    return store
+
+
+def test_snapshot_scores_like_fallback(store):
+    store.add_candidate(_candidate('bennani', ['Java'], 1))
+    cv_data = store.all_candidates()
+    query = "développeur python 2 ans"
+    assert matching.snapshot_matching(query, 4) == matching.fallback_matching(query, cv_data, 4)
+
+
+def test_snapshot_in_use_is_kept_until_released(store):
+    old = get_candidate_snapshot()
+    old_path = old.path
+    store.add_candidate(_candidate('bennani', ['Java']))
+
+    current = get_candidate_snapshot()
+    assert current.source == store.version()
+    # Encore référencé (recherche en cours): conservé
+    assert os.path.exists(old_path)
+
+    del old
+    gc.collect()
+    store.add_candidate(_candidate('chraibi', ['Go']))
+    get_candidate_snapshot()
+    assert not os.path.exists(old_path)
+    # `current` est toujours référencé ici
+    assert os.path.exists(current.path)
+    assert os.path.exists(snapshot_path(store.version()))
+
+
+def test_failed_removal_is_retried_at_next_cleanup(store, monkeypatch, capsys):
+    old_path = get_candidate_snapshot().path
+    store.add_candidate(_candidate('bennani', ['Java']))
+    gc.collect()
+
+    real_remove = os.remove
+
+    def locked(path):
+        raise PermissionError("fichier projeté par un autre processus")
+
+    monkeypatch.setattr(candidate_snapshot.os, 'remove', locked)
+    get_candidate_snapshot()
+    assert os.path.exists(old_path)
+    assert 'conservé' in capsys.readouterr().out
+
+    monkeypatch.setattr(candidate_snapshot.os, 'remove', real_remove)
+    # Redémarrage: le premier appel du processus nettoie
+    candidate_snapshot._snapshot_cache['snapshot'] = None
+    gc.collect()
+    get_candidate_snapshot()
+    assert not os.path.exists(old_path)
@@ -0,0 +1,116 @@
+import threading
+
+from candidate_store import CandidateStore
+
+
+def _candidate(name, skills=('Python',), experience=3):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': 'Développeur',
+            'competences': list(skills), 'langues': [], 'experience': experience}
+
+
+def test_add_candidate_assigns_next_id(tmp_path):
+    store = CandidateStore(str(tmp_path / 'candidates.db'), str(tmp_path / 'cv_data.json'))
+    version = store.version()
+    first = _candidate('alami')
+    assert store.add_candidate(first) == 1
+    # Un id déjà présent dans le dict est remplacé
+    assert store.add_candidate(dict(_candidate('bennani'), id=1)) == 2
+
+    assert store.get(1) == first
+    assert store.get(2)['id'] == 2
+    assert [c['nom'] for c in store.find_by_skill('python')] == ['alami', 'bennani']
+    assert store.version() == version + 2
+
+
+def test_concurrent_writers_never_reuse_an_id(tmp_path):
+    path = str(tmp_path / 'candidates.db')
+    json_path = str(tmp_path / 'cv_data.json')
+    # Une instance par "processus": les verrous Python ne sont pas partagés
+    stores = [CandidateStore(path, json_path) for _ in range(4)]
+    errors = []
+
+    def add_many(store, prefix):
+        for i in range(25):
+            try:
+                store.add_candidate(_candidate(f'{prefix}{i}'))
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=add_many, args=(store, f'w{n}_')) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    ids = [c['id'] for c in stores[0].all_candidates()]
+    assert ids == list(range(1, 101))
+
+
+def test_failed_write_does_not_block_batch(tmp_path):
+    store = CandidateStore(str(tmp_path / 'candidates.db'), str(tmp_path / 'cv_data.json'))
+    results = store.write_batch([
+        ('add_candidate', (_candidate('alami'), None)),
+        ('add_minhash', (999, [1, 2, 3])),
+        ('add_candidate', (_candidate('bennani'), None)),
+    ])
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], Exception)
+    assert store.count() == 2
+
+
+def _write_json(path, candidates):
+    import json
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(candidates, f)
+
+
+def test_migration_keeps_ids_and_order(tmp_path):
+    json_path = str(tmp_path / 'cv_data.json')
+    _write_json(json_path, [dict(_candidate('a'), id=3), dict(_candidate('b'), id=7), _candidate('c')])
+    store = CandidateStore(str(tmp_path / 'candidates.db'), json_path)
+    assert [(c['id'], c['nom']) for c in store.all_candidates()] == [(3, 'a'), (7, 'b'), (8, 'c')]
+    assert store.migrate_from_json() == 0
+
+
+def test_migration_reassigns_duplicate_ids(tmp_path):
+    json_path = str(tmp_path / 'cv_data.json')
+    _write_json(json_path, [dict(_candidate('a'), id=1), dict(_candidate('b'), id=1), dict(_candidate('c'), id=2)])
+    store = CandidateStore(str(tmp_path / 'candidates.db'), json_path)
+    assert sorted((c['nom'], c['id']) for c in store.all_candidates()) == [('a', 1), ('b', 3), ('c', 2)]
+    # La base reste utilisable: une nouvelle instance ne relance pas l'import
+    assert CandidateStore(str(tmp_path / 'candidates.db'), json_path).count() == 3
+
+
+def test_concurrent_migrations_import_once(tmp_path):
+    json_path = str(tmp_path / 'cv_data.json')
+    _write_json(json_path, [dict(_candidate(f'c{i}'), id=i) for i in range(1, 51)])
+    path = str(tmp_path / 'candidates.db')
+    stores, errors = [], []
+
+    def open_store():
+        try:
+            stores.append(CandidateStore(path, json_path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert stores[0].count() == 50
+
+
+def test_batch_reports_consecutive_versions(tmp_path):
+    store = CandidateStore(str(tmp_path / 'candidates.db'), str(tmp_path / 'cv_data.json'))
+    start = store.version()
+    results, versions = store.write_batch_with_versions([
+        ('add_candidate', (_candidate('alami'), None)),
+        ('add_minhash', (999, [1, 2, 3])),
+        ('add_candidate', (_candidate('bennani'), None)),
+    ])
+    assert versions == [(start, start + 1), None, (start + 1, start + 2)]
+    assert store.version() == start + 2
@@ -0,0 +1,72 @@
+import numpy as np
+
+from candidate_store import CandidateStore
+from candidate_writer import CandidateWriter
+
+
+def _candidate(name):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': 'Développeur',
+            'competences': ['Python'], 'langues': [], 'experience': 3}
+
+
+def _store(tmp_path):
+    return CandidateStore(str(tmp_path / 'candidates.db'), str(tmp_path / 'cv_data.json'))
+
+
+def _count_batches(store, monkeypatch):
+    batches = []
+    write = store.write_batch_with_versions
+
+    def counted(writes):
+        batches.append(len(writes))
+        return write(writes)
+
+    monkeypatch.setattr(store, 'write_batch_with_versions', counted)
+    return batches
+
+
+def test_import_committed_in_one_transaction(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    batches = _count_batches(store, monkeypatch)
+    writer = CandidateWriter(store, max_batch_size=8)
+    start = store.version()
+    committed = []
+
+    candidates = [(_candidate(f'c{i}'), None) for i in range(20)]
+    ids = writer.add_candidates(candidates, timeout=5,
+                                on_commit=lambda candidate, result, before, after: committed.append(
+                                    (candidate['nom'], result, before, after)))
+
+    # Au-delà de max_batch_size, un import reste un seul lot
+    assert batches == [20]
+    assert ids == list(range(1, 21))
+    assert committed == [(f'c{i}', i + 1, start + i, start + i + 1) for i in range(20)]
+    assert store.count() == 20
+
+
+def test_failed_candidate_does_not_block_import(tmp_path):
+    store = _store(tmp_path)
+    writer = CandidateWriter(store)
+    broken = _candidate('broken')
+    broken['competences'] = None  # compétences illisibles: insertion en erreur
+
+    results = writer.add_candidates([(_candidate('a'), np.zeros(0, dtype=np.uint32)), (broken, None),
+                                     (_candidate('b'), None)], timeout=5)
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], Exception)
+    assert [c['nom'] for c in store.all_candidates()] == ['a', 'b']
+    assert writer.add_candidates([], timeout=5) == []
+
+
+def test_single_adds_still_grouped(tmp_path, monkeypatch):
+    import threading
+
+    store = _store(tmp_path)
+    batches = _count_batches(store, monkeypatch)
+    writer = CandidateWriter(store, batch_window=0.2)
+    threads = [threading.Thread(target=writer.add_candidate, args=(_candidate(f'c{i}'),)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(batches) == 3 and len(batches) < 3
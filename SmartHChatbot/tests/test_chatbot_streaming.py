@@ -0,0 +1,126 @@
+import json
+
+import pytest
+import requests
+
+import shared_resources
+from chatbot_engine import ChatbotEngine
+from shared_resources import SharedResources
+
+
+class _Response:
+    """Réponse HTTP en streaming: une ligne NDJSON par fragment, comme /api/generate."""
+
+    def __init__(self, lines, status_code=200, error=None):
+        self.lines = lines
+        self.status_code = status_code
+        self.error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self, chunk_size=None):
+        for line in self.lines:
+            yield line
+        if self.error:
+            raise self.error
+
+
+class _Http:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def _lines(*tokens):
+    chunks = [json.dumps({"response": token, "done": False}).encode() for token in tokens]
+    return chunks + [b'', json.dumps({"response": "", "done": True}).encode(),
+                     json.dumps({"response": " ignoré", "done": False}).encode()]
+
+
+@pytest.fixture
+def resources(monkeypatch):
+    resources = SharedResources(health_ttl=3600)
+    resources.record_ollama(True)
+    monkeypatch.setattr(shared_resources, '_resources', resources)
+    return resources
+
+
+def test_stream_yields_chunks_as_they_arrive(resources):
+    resources.http = _Http(_Response(_lines("  Bonjour", " !", " Je cherche.")))
+    engine = ChatbotEngine()
+
+    chunks = list(engine.stream_response_with_ollama("bonjour", {}))
+    assert chunks == ["Bonjour", " !", " Je cherche."]
+    url, kwargs = resources.http.calls[0]
+    assert url.endswith('/api/generate')
+    assert kwargs['stream'] is True and kwargs['json']['stream'] is True
+
+
+def test_blocking_response_joins_the_stream(resources):
+    resources.http = _Http(_Response(_lines(" Voici", " les", " candidats. ")))
+    assert ChatbotEngine().generate_response_with_ollama("liste", {}) == "Voici les candidats."
+
+
+def test_process_message_stream_records_reply_once_consumed(resources):
+    resources.http = _Http(_Response(_lines("Bonjour", " !")))
+    engine = ChatbotEngine()
+
+    result = engine.process_message_stream("bonjour")
+    assert result["intent"] == "greeting"
+    assert [m["role"] for m in engine.conversation_history] == ["user"]
+    assert list(result["response_stream"]) == ["Bonjour", " !"]
+    assert engine.conversation_history[-1]["role"] == "assistant"
+    assert engine.conversation_history[-1]["message"] == "Bonjour !"
+
+
+def test_process_message_returns_joined_response(resources):
+    resources.http = _Http(_Response(_lines("Bonjour", " !")))
+    result = ChatbotEngine().process_message("bonjour")
+    assert result["response"] == "Bonjour !"
+    assert "response_stream" not in result
+
+
+def test_fallback_when_ollama_is_down(resources):
+    resources.record_ollama(False)
+    resources.http = _Http(_Response(_lines("jamais")))
+    engine = ChatbotEngine()
+
+    fallback = engine.generate_fallback_response("bonjour", {})
+    assert list(engine.stream_response_with_ollama("bonjour", {})) == [fallback]
+    assert resources.http.calls == []
+    assert engine.process_message("bonjour")["response"] == fallback
+
+
+def test_fallback_and_marked_down_when_connection_refused(resources):
+    resources.http = _Http(error=requests.exceptions.ConnectionError("refusé"))
+    engine = ChatbotEngine()
+
+    assert engine.generate_response_with_ollama("bonjour", {}) == engine.generate_fallback_response("bonjour", {})
+    assert resources.ollama_available() is False
+
+
+def test_fallback_on_http_error_status(resources):
+    resources.http = _Http(_Response(_lines("erreur"), status_code=500))
+    engine = ChatbotEngine()
+    assert list(engine.stream_response_with_ollama("aide", {})) == [engine.generate_fallback_response("aide", {})]
+
+
+def test_interrupted_stream_keeps_started_reply(resources):
+    lines = [json.dumps({"response": "Je cherche", "done": False}).encode()]
+    resources.http = _Http(_Response(lines, error=requests.exceptions.ConnectionError("coupé")))
+    engine = ChatbotEngine()
+
+    # Déjà commencée: pas de réponse de secours ajoutée, Ollama toujours considéré disponible
+    assert list(engine.stream_response_with_ollama("cherche", {})) == ["Je cherche"]
+    assert resources.ollama_available() is True
@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime
+
+from conversation_log import (
+    ConversationWriter, delete_conversation_files, list_conversation_ids, read_conversation, to_serializable,
+)
+
+
+def _messages(n):
+    return [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'message {i}'} for i in range(n)]
+
+
+def test_save_appends_only_new_messages(tmp_path):
+    history_dir = str(tmp_path)
+    writer = ConversationWriter('c1', history_dir, checkpoint_interval=3600)
+    messages = _messages(2)
+    assert writer.save(messages, {}, 'Titre')
+    log_path = os.path.join(history_dir, 'c1.jsonl')
+    size = os.path.getsize(log_path)
+
+    # Rerun sans changement: rien n'est écrit
+    assert not writer.save(messages, {}, 'Titre')
+    assert os.path.getsize(log_path) == size
+
+    messages.append({'role': 'user', 'content': 'suite'})
+    assert writer.save(messages, {}, 'Titre')
+    with open(log_path, 'r', encoding='utf-8') as f:
+        assert len(f.readlines()) == 3
+
+
+def test_context_checkpoint_is_debounced(tmp_path):
+    writer = ConversationWriter('c1', str(tmp_path), checkpoint_interval=3600)
+    writer.save(_messages(1), {'step': 1}, 'Titre')
+    writer.save(_messages(2), {'step': 2}, 'Titre')
+    assert read_conversation('c1', str(tmp_path))['context'] == {'step': 1}
+
+    writer.save(_messages(2), {'step': 2}, 'Titre', force_checkpoint=True)
+    conversation = read_conversation('c1', str(tmp_path))
+    assert conversation['context'] == {'step': 2}
+    assert conversation['title'] == 'Titre'
+    assert len(conversation['messages']) == 2
+
+
+def test_reset_conversation_rewrites_log(tmp_path):
+    writer = ConversationWriter('c1', str(tmp_path))
+    writer.save(_messages(4), {}, 'Titre')
+    writer.save(_messages(1), {}, 'Titre')
+    assert read_conversation('c1', str(tmp_path))['messages'] == _messages(1)
+
+
+def test_reload_resumes_without_rewriting(tmp_path):
+    ConversationWriter('c1', str(tmp_path)).save(_messages(2), {'a': 1}, 'Titre', force_checkpoint=True)
+    persisted = read_conversation('c1', str(tmp_path))
+    writer = ConversationWriter('c1', str(tmp_path), persisted=persisted)
+    assert not writer.save(persisted['messages'], persisted['context'], 'Titre', force_checkpoint=True)
+    assert writer.save(_messages(3), {'a': 1}, 'Titre')
+    assert read_conversation('c1', str(tmp_path))['messages'] == _messages(3)
+
+
+def test_incomplete_last_line_is_ignored(tmp_path):
+    ConversationWriter('c1', str(tmp_path)).save(_messages(2), {}, 'Titre')
+    with open(os.path.join(str(tmp_path), 'c1.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"role": "user", "cont')
+    assert read_conversation('c1', str(tmp_path))['messages'] == _messages(2)
+
+
+def test_legacy_json_is_read_then_converted(tmp_path):
+    legacy = {'id': 'old', 'title': 'Ancienne', 'timestamp': '2024-01-01T10:00:00',
+              'messages': _messages(2), 'context': {'x': 1}}
+    with open(os.path.join(str(tmp_path), 'old.json'), 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+
+    conversation = read_conversation('old', str(tmp_path))
+    assert conversation['legacy'] and conversation['messages'] == _messages(2)
+    writer = ConversationWriter('old', str(tmp_path), persisted=conversation)
+    writer.save(conversation['messages'], conversation['context'], 'Ancienne', force_checkpoint=True)
+
+    converted = read_conversation('old', str(tmp_path))
+    assert not converted['legacy']
+    assert converted['messages'] == _messages(2)
+    assert converted['context'] == {'x': 1}
+
+
+def test_list_and_delete(tmp_path):
+    ConversationWriter('a', str(tmp_path)).save(_messages(1), {}, 'A', force_checkpoint=True)
+    with open(os.path.join(str(tmp_path), 'b.json'), 'w', encoding='utf-8') as f:
+        json.dump({'messages': []}, f)
+    assert list_conversation_ids(str(tmp_path)) == ['a', 'b']
+
+    delete_conversation_files('a', str(tmp_path))
+    assert list_conversation_ids(str(tmp_path)) == ['b']
+    assert read_conversation('a', str(tmp_path)) is None
+
+
+def test_to_serializable_converts_dates_and_sets():
+    data = to_serializable({'when': datetime(2024, 1, 2, 3, 4, 5), 'skills': {'python'}, 'items': [(1, 2)]})
+    assert data == {'when': '2024-01-02T03:04:05', 'skills': ['python'], 'items': [(1, 2)]}
+    json.dumps(data)
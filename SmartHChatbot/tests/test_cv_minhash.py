@@ -0,0 +1,116 @@
+import random
+import sqlite3
+
+import numpy as np
+
+from candidate_dedup import KEY_EMAIL, KEY_NAME, KEY_PHONE, dedup_keys
+from candidate_store import get_candidate_store
+from cv_minhash import (LSH_BANDS, NEAR_DUPLICATE_THRESHOLD, NUM_PERMUTATIONS, estimated_similarity,
+                        minhash_signature, shingles)
+
+
+WORDS = ('python django java spring docker kubernetes projet équipe client développement api données '
+         'analyse migration cloud sécurité tests agile scrum livraison architecture service base '
+         'performance supervision formation master ingénieur stage mission responsable conception').split()
+
+
+def _cv_text(seed, length=220):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def _edited(text, changes):
+    words = text.split()
+    for position in changes:
+        words[position] = 'modifié'
+    return ' '.join(words)
+
+
+def _candidate(name):
+    return {'nom': name, 'prenom': 'Test', 'email': f'{name}@example.com', 'poste': 'Développeur',
+            'competences': ['Python'], 'langues': [], 'experience': 2}
+
+
+def _jaccard(a, b):
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+
+def test_signature_is_stable_and_accent_insensitive():
+    text = _cv_text(1)
+    signature = minhash_signature(text)
+    assert signature.dtype == np.uint32
+    assert len(signature) == NUM_PERMUTATIONS
+    assert np.array_equal(signature, minhash_signature(text))
+    assert np.array_equal(minhash_signature("Équipe Développement Sécurité"),
+                          minhash_signature("equipe  developpement securite"))
+    assert len(minhash_signature("   ")) == 0
+
+
+def test_estimate_follows_jaccard_similarity():
+    text = _cv_text(2)
+    near = _edited(text, [50, 150])
+    other = _cv_text(3)
+    assert abs(estimated_similarity(minhash_signature(text), minhash_signature(near)) - _jaccard(text, near)) < 0.1
+    assert estimated_similarity(minhash_signature(text), minhash_signature(other)) < 0.2
+
+
+def test_near_identical_cv_is_found(workdir):
+    store = get_candidate_store()
+    text = _cv_text(4)
+    candidate_id = store.add_candidate(_candidate('alami'), minhash_signature(text))
+    store.add_candidate(_candidate('bennani'), minhash_signature(_cv_text(5)))
+
+    matches = store.find_near_duplicates(minhash_signature(_edited(text, [10, 100, 200])))
+    assert [m[0] for m in matches] == [candidate_id]
+    assert matches[0][1] >= NEAR_DUPLICATE_THRESHOLD
+
+
+def test_unrelated_or_heavily_edited_cv_is_not_found(workdir):
+    store = get_candidate_store()
+    text = _cv_text(6)
+    store.add_candidate(_candidate('alami'), minhash_signature(text))
+
+    assert store.find_near_duplicates(minhash_signature(_cv_text(7))) == []
+    # Un mot sur trois réécrit: même gabarit, mais pas le même CV
+    rewritten = _edited(text, range(0, 220, 3))
+    assert _jaccard(text, rewritten) < NEAR_DUPLICATE_THRESHOLD
+    assert store.find_near_duplicates(minhash_signature(rewritten)) == []
+    assert store.find_near_duplicates(np.zeros(0, dtype=np.uint32)) == []
+
+
+def test_lsh_buckets_written_on_insert(workdir):
+    store = get_candidate_store()
+    with_signature = store.add_candidate(_candidate('alami'), minhash_signature(_cv_text(8)))
+    without_signature = store.add_candidate(_candidate('bennani'))
+
+    with sqlite3.connect(store.path) as conn:
+        def buckets(candidate_id):
+            return conn.execute(
+                "SELECT COUNT(*) FROM lsh_buckets WHERE candidate_id = ?", (candidate_id,)).fetchone()[0]
+
+        assert buckets(with_signature) == LSH_BANDS
+        assert buckets(without_signature) == 0
+
+        # Signature ajoutée après coup (add_minhash): remplace les bandes
+        store.add_minhash(without_signature, minhash_signature(_cv_text(9)))
+        store.add_minhash(without_signature, minhash_signature(_cv_text(10)))
+        assert buckets(without_signature) == LSH_BANDS
+    assert [m[0] for m in store.find_near_duplicates(minhash_signature(_cv_text(10)))] == [without_signature]
+
+
+def test_possible_duplicates_by_email_phone_and_name(workdir):
+    store = get_candidate_store()
+    existing = dict(_candidate('Benoît'), prenom='Léa', email='Lea.Benoit@Example.com',
+                    telephone='+33 6 12 34 56 78')
+    candidate_id = store.add_candidate(existing)
+
+    assert store.has_fingerprint(dict(existing))
+    incoming = {'nom': 'benoit', 'prenom': 'lea', 'email': ' lea.benoit@example.com ',
+                'telephone': '06 12 34 56 78', 'poste': 'Comptable'}
+    kinds = {kind for kind, _ in dedup_keys(incoming)}
+    assert {KEY_EMAIL, KEY_PHONE, KEY_NAME} <= kinds
+    assert sorted(store.possible_duplicates(incoming)) == sorted(
+        [(KEY_EMAIL, candidate_id), (KEY_PHONE, candidate_id), (KEY_NAME, candidate_id)])
+    assert not store.has_fingerprint(incoming)
+    assert store.possible_duplicates(_candidate('martin')) == []
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+import chatbot_engine
+import job_runner
+from chatbot_engine import ChatbotEngine
+from job_runner import DONE, FAILED, JobRunner, report_progress
+
+
+def _wait(runner, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = runner.get(job_id)
+        if job.is_finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"travail {job_id} non terminé")
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    runner = JobRunner(max_workers=2)
+    monkeypatch.setattr(job_runner, '_runner', runner)
+    yield runner
+    runner._executor.shutdown(wait=True)
+
+
+def test_submit_returns_id_then_result(runner):
+    release = threading.Event()
+    job_id = runner.submit('calcul', lambda a, b: release.wait(5) and a + b, 2, b=3)
+
+    job = runner.get(job_id)
+    assert job.name == 'calcul'
+    assert not job.is_finished
+    release.set()
+    job = _wait(runner, job_id)
+    assert job.status == DONE
+    assert job.result == 5
+    assert job.progress == 1.0
+    state = job.to_dict()
+    assert state['finished'] and state['result'] == 5 and state['error'] is None
+
+
+def test_report_progress_updates_running_job(runner):
+    reported = threading.Event()
+    release = threading.Event()
+
+    def work():
+        report_progress(0.4, "étape 1")
+        reported.set()
+        release.wait(5)
+        return 'ok'
+
+    job_id = runner.submit('progression', work)
+    assert reported.wait(5)
+    job = runner.get(job_id)
+    assert job.progress == 0.4
+    assert job.progress_message == "étape 1"
+    release.set()
+    assert _wait(runner, job_id).result == 'ok'
+
+
+def test_report_progress_outside_job_is_noop():
+    report_progress(0.5, "hors travail")
+
+
+def test_failed_job_keeps_error(runner):
+    def work():
+        raise ValueError("boum")
+
+    job = _wait(runner, runner.submit('erreur', work))
+    assert job.status == FAILED
+    assert job.error == "boum"
+    assert job.result is None
+
+
+def test_finished_jobs_forgotten_after_retention(runner):
+    runner.retention_seconds = 60
+    old_id = runner.submit('ancien', lambda: 1)
+    _wait(runner, old_id).finished = time.time() - 120
+    recent_id = runner.submit('récent', lambda: 2)
+    _wait(runner, recent_id)
+
+    assert runner.get(old_id) is None
+    runner.submit('suivant', lambda: 3)
+    assert runner.get(recent_id) is not None
+
+
+def _fake_search(started, release):
+    def run_search(job_desc, num_candidates):
+        started.set()
+        release.wait(5)
+        matched = [{'nom': 'Durand', 'match_score': 80}]
+        return ({"success": True, "message": "ok", "actions": [], "data": {"matched_candidates": matched}},
+                {"matched_candidates": matched})
+    return run_search
+
+
+def test_background_search_leaves_context_to_poll_job(runner, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(chatbot_engine, 'run_search', _fake_search(started, release))
+    engine = ChatbotEngine()
+    engine.user_context = {"job_description": "développeur python"}
+
+    job_id = engine.execute_action("execute_search", background=True)["data"]["job_id"]
+    assert started.wait(5)
+    release.set()
+    _wait(runner, job_id)
+    # Le travail terminé n'a pas modifié le contexte: poll_job l'applique une fois
+    assert "matched_candidates" not in engine.user_context
+
+    state = engine.poll_job(job_id)
+    assert state["result"]["data"]["matched_candidates"][0]["nom"] == 'Durand'
+    assert engine.user_context["matched_candidates"][0]["nom"] == 'Durand'
+
+    engine.user_context["matched_candidates"] = []
+    engine.poll_job(job_id)
+    assert engine.user_context["matched_candidates"] == []
+
+
+def test_search_from_previous_conversation_is_not_applied(runner, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(chatbot_engine, 'run_search', _fake_search(started, release))
+    engine = ChatbotEngine()
+    engine.user_context = {"job_description": "développeur python"}
+
+    job_id = engine.execute_action("execute_search", background=True)["data"]["job_id"]
+    assert started.wait(5)
+    engine.clear_context()
+    release.set()
+    _wait(runner, job_id)
+
+    assert engine.poll_job(job_id)["finished"]
+    assert engine.user_context == {}
+
+    job_id = engine.execute_action("execute_search", {"job_description": "data"}, background=True)["data"]["job_id"]
+    engine.set_context({"title": "conversation rechargée"})
+    _wait(runner, job_id)
+    engine.poll_job(job_id)
+    assert engine.user_context == {"title": "conversation rechargée"}
+
+
+def test_failed_and_unknown_jobs_report_error(runner):
+    engine = ChatbotEngine()
+    job_id = runner.submit('erreur', lambda: 1 / 0)
+    _wait(runner, job_id)
+
+    state = engine.poll_job(job_id)
+    assert state["status"] == FAILED
+    assert state["result"]["success"] is False
+    assert engine.poll_job("inconnu")["status"] == "unknown"
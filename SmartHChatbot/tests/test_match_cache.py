@@ -0,0 +1,60 @@
+import json
+import time
+
+from match_cache import MatchCache, make_cache_key
+
+
+def _saved_keys(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [entry['key'] for entry in json.load(f)['entries']]
+
+
+def test_hit_does_not_rewrite_file(tmp_path, monkeypatch):
+    cache = MatchCache(str(tmp_path / 'match_cache.json'))
+    cache.put('a', [{'row': 0}])
+    saves = []
+    monkeypatch.setattr(cache, '_save', lambda: saves.append(1))
+
+    for _ in range(5):
+        assert cache.get('a') == [{'row': 0}]
+    assert cache.get('missing') is None
+    assert saves == []
+
+
+def test_usage_order_written_on_next_put(tmp_path):
+    path = str(tmp_path / 'match_cache.json')
+    cache = MatchCache(path, max_entries=2)
+    cache.put('a', [])
+    cache.put('b', [])
+    cache.get('a')
+    assert _saved_keys(path) == ['a', 'b']
+
+    cache.put('c', [])
+    # 'b' était le moins récemment utilisé
+    assert _saved_keys(path) == ['a', 'c']
+    assert MatchCache(path).get('a') == []
+
+
+def test_expired_entry_is_not_returned(tmp_path):
+    path = str(tmp_path / 'match_cache.json')
+    cache = MatchCache(path, ttl_seconds=60)
+    cache.put('a', [{'row': 1}])
+    cache._entries['a']['created'] = time.time() - 120
+    assert cache.get('a') is None
+
+    cache.put('b', [])
+    assert _saved_keys(path) == ['b']
+
+
+def test_reloads_entries_written_by_another_process(tmp_path):
+    path = str(tmp_path / 'match_cache.json')
+    reader = MatchCache(path)
+    assert reader.get('a') is None
+    MatchCache(path).put('a', [{'row': 2}])
+    assert reader.get('a') == [{'row': 2}]
+
+
+def test_cache_key_ignores_case_and_spacing():
+    key = make_cache_key("3 Developpeurs  python\n", 'fp', 'model', 4, 20)
+    assert key == make_cache_key("3 developpeurs python", 'fp', 'model', 4, 20)
+    assert key != make_cache_key("3 developpeurs python", 'other', 'model', 4, 20)
@@ -0,0 +1,159 @@
+import pytest
+
+import matching
+from candidate_index import invalidate_candidate_index
+from match_cache import MatchCache
+
+
+def _candidates():
+    return [
+        {'id': 1, 'nom': 'Alami', 'prenom': 'Sara', 'poste': 'Développeur Python',
+         'competences': ['Python', 'Django'], 'langues': ['Français'], 'experience': '6'},
+        {'id': 2, 'nom': 'Bennani', 'prenom': 'Omar', 'poste': 'Comptable',
+         'competences': ['Excel'], 'langues': ['Arabe'], 'experience': 2},
+    ]
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    invalidate_candidate_index()
+    cache = MatchCache(str(tmp_path / 'match_cache.json'))
+    monkeypatch.setattr(matching, 'get_match_cache', lambda: cache)
+    return cache
+
+
+def test_fallback_accepts_string_experience():
+    results = matching.fallback_matching("développeur python 3 ans", _candidates(), 4)
+    assert [c['id'] for c in results] == [1]
+    assert isinstance(results[0]['match_score'], int)
+
+
+def test_llm_post_filter_accepts_string_experience(monkeypatch):
+    def llm_scores(job_description, candidates):
+        return [{'candidate_number': 1, 'match_score': 90, 'match_reason': 'Profil Django'}]
+
+    monkeypatch.setattr(matching, '_llm_score_chunk', llm_scores)
+    results = matching.match_candidates("développeur python 3 ans", _candidates(), 1)
+    assert [(c['id'], c['match_reason']) for c in results] == [(1, 'Profil Django')]
+
+
+def _python_team():
+    return [
+        {'id': i, 'nom': f'Nom{i}', 'prenom': 'P', 'poste': 'Développeur Python',
+         'competences': ['Python'], 'langues': [], 'experience': 3}
+        for i in range(1, 4)
+    ]
+
+
+def test_complete_llm_ranking_is_cached(monkeypatch, isolated_cache):
+    def llm_scores(job_description, candidates):
+        return [{'candidate_number': n, 'match_score': 80, 'match_reason': 'LLM'} for n in range(1, len(candidates) + 1)]
+
+    monkeypatch.setattr(matching, '_llm_score_chunk', llm_scores)
+    matching.match_candidates("développeur python", _python_team(), 2)
+    assert len(isolated_cache._entries) == 1
+
+
+def test_timed_out_chunk_is_not_cached(monkeypatch, isolated_cache):
+    calls = []
+
+    def llm_scores(job_description, candidates):
+        calls.append(len(candidates))
+        if len(calls) == 1:
+            return [{'candidate_number': 1, 'match_score': 80, 'match_reason': 'LLM'}]
+        return None
+
+    monkeypatch.setattr(matching, 'LLM_CHUNK_SIZE', 1)
+    monkeypatch.setattr(matching, 'LLM_MAX_CONCURRENCY', 1)
+    monkeypatch.setattr(matching, '_llm_score_chunk', llm_scores)
+    results = matching.match_candidates("développeur python", _python_team(), 2)
+    assert results
+    assert len(isolated_cache._entries) == 0
+
+
+def test_fallback_completed_and_empty_results_are_not_cached(monkeypatch, isolated_cache):
+    # Le LLM ne retient qu'un profil sur deux demandés: complété par les mots-clés
+    monkeypatch.setattr(matching, '_llm_score_chunk', lambda job, candidates: [
+        {'candidate_number': 1, 'match_score': 80, 'match_reason': 'LLM'}])
+    assert len(matching.match_candidates("développeur python", _python_team(), 2)) == 2
+    assert len(isolated_cache._entries) == 0
+
+    # Scores trop bas: résultat vide
+    monkeypatch.setattr(matching, '_llm_score_chunk', lambda job, candidates: [
+        {'candidate_number': 1, 'match_score': 5, 'match_reason': 'LLM'}])
+    assert matching.match_candidates("développeur python", _python_team(), 2) == []
+    assert len(isolated_cache._entries) == 0
+
+
+def test_cache_hit_skips_keyword_scoring(monkeypatch):
+    monkeypatch.setattr(matching, '_llm_score_chunk', lambda job, candidates: [
+        {'candidate_number': n, 'match_score': 80, 'match_reason': 'LLM'} for n in range(1, len(candidates) + 1)])
+    cv_data = _python_team()
+    first = matching.smart_match_candidates("développeur python", cv_data, 2, engine="ollama")
+
+    def no_scoring(index, plan):
+        raise AssertionError("scoring mots-clés recalculé")
+
+    monkeypatch.setattr(matching, '_keyword_scores', no_scoring)
+    second = matching.smart_match_candidates("développeur python", cv_data, 2, engine="ollama")
+    assert [c['id'] for c in second['candidates']] == [c['id'] for c in first['candidates']]
+    assert 'partial_matches' not in second
+
+
+def test_empty_result_explains_partial_matches():
+    result = matching.smart_match_candidates("chirurgien cardiaque", _python_team(), 2, engine="keywords")
+    assert not result['has_results']
+    assert result['partial_matches'] == 0
+    assert 'reason' in result
+
+
+def _count_scoring(monkeypatch):
+    calls = []
+    scores = matching._keyword_scores
+
+    def counted(index, plan):
+        calls.append(plan.text)
+        return scores(index, plan)
+
+    monkeypatch.setattr(matching, '_keyword_scores', counted)
+    return calls
+
+
+@pytest.mark.parametrize('engine', ['keywords', 'ollama'])
+def test_empty_result_diagnostics_reuse_scoring_pass(monkeypatch, engine):
+    # Ollama indisponible: le classement mots-clés déjà calculé sert de repli
+    monkeypatch.setattr(matching, '_llm_score_chunk', lambda job, candidates: None)
+    calls = _count_scoring(monkeypatch)
+    result = matching.smart_match_candidates("développeur python 15 ans", _python_team(), 2, engine=engine)
+    assert not result['has_results']
+    assert result['partial_matches'] > 0
+    assert result['near_misses'] > 0
+    assert len(calls) == 1
+
+
+def test_snapshot_diagnostics_reuse_scoring_pass(workdir, monkeypatch):
+    import weakref
+
+    import candidate_snapshot
+    from candidate_store import get_candidate_store
+
+    monkeypatch.setattr(candidate_snapshot, '_snapshot_cache', {'snapshot': None})
+    monkeypatch.setattr(candidate_snapshot, '_open_snapshots', weakref.WeakValueDictionary())
+    store = get_candidate_store()
+    for candidate in _python_team():
+        store.add_candidate(dict(candidate, id=None, email=f"{candidate['nom']}@example.com"))
+    calls = _count_scoring(monkeypatch)
+    result = matching.smart_match_candidates("développeur python 15 ans", [], 2, engine="snapshot")
+    assert not result['has_results']
+    assert result['partial_matches'] > 0
+    assert len(calls) == 1
+
+
+def test_bm25_diagnostics_from_bm25_scores(workdir, monkeypatch):
+    import bm25_index
+    monkeypatch.setattr(bm25_index, '_bm25_cache', {'index': None, 'data': None, 'journal_entries': 0})
+    calls = _count_scoring(monkeypatch)
+    result = matching.smart_match_candidates("développeur python 15 ans", _python_team(), 2, engine="bm25")
+    assert not result['has_results']
+    assert result['partial_matches'] == result['near_misses'] > 0
+    assert calls == []
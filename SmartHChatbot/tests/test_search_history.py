@@ -0,0 +1,51 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from search_history import INDEX_DTYPE, SearchHistory, get_search_history
+
+
+def _candidates(*ids):
+    return [{'id': i, 'match_score': 80, 'nom': 'X', 'competences': ['Python']} for i in ids]
+
+
+def test_paths_derived_from_log_path(tmp_path):
+    log_path = str(tmp_path / 'archive' / 'recherches.jsonl')
+    os.makedirs(os.path.dirname(log_path))
+    with open(tmp_path / 'archive' / 'recherches.json', 'w', encoding='utf-8') as f:
+        json.dump([{'date': '01/02/2024', 'time': '10:00:00', 'description': 'ancienne',
+                    'candidates': _candidates(4)}], f)
+
+    history = get_search_history(log_path)
+    assert history.index_path == str(tmp_path / 'archive' / 'recherches.idx')
+    assert [e['description'] for e in history.iter_entries()] == ['ancienne']
+    assert get_search_history(log_path) is history
+    assert os.path.exists(history.index_path)
+
+
+def test_record_stores_ids_and_filters_by_period(tmp_path):
+    history = SearchHistory(str(tmp_path / 'h.jsonl'))
+    history.record("python", 2, _candidates(1, 2), when=datetime(2024, 1, 10, 9, 0))
+    history.record("java", 1, _candidates(3), selected=[{'email': 'a@b.c'}], when=datetime(2024, 2, 10, 9, 0))
+
+    last = history.last()
+    assert last['candidate_ids'] == [3]
+    assert last['selected_emails'] == ['a@b.c']
+    assert 'competences' not in json.dumps(last)
+    assert history.count() == 2
+    february = list(history.iter_entries(start=datetime(2024, 2, 1)))
+    assert [e['description'] for e in february] == ['java']
+
+
+def test_missing_index_entries_are_rebuilt(tmp_path):
+    history = SearchHistory(str(tmp_path / 'h.jsonl'))
+    history.record("python", 2, _candidates(1), when=datetime(2024, 1, 10, 9, 0))
+    # Arrêt entre l'écriture du journal et celle de l'index
+    with open(history.log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'date': '11/01/2024', 'time': '09:00:00', 'description': 'perdue'}) + '\n')
+
+    assert history.count() == 2
+    assert len(np.fromfile(history.index_path, dtype=INDEX_DTYPE)) == 2
+    assert history.last()['description'] == 'perdue'